@@ -0,0 +1,180 @@
+"""
+Backtest walk-forward untuk mode prediksi rekursif yang dipakai dashboard (predict_future_price).
+
+Untuk setiap emiten, sejumlah titik asal (origin) terakhir diputar ulang: dari window WINDOW_SIZE hari
+sebelum origin, model memprediksi H hari bursa ke depan secara rekursif, lalu dibandingkan dengan harga
+aktual. Semua origin dijalankan bersamaan, sehingga setiap langkah horizon hanya satu pemanggilan model.
+Hasil: MAPE per horizon (1..H) per emiten.
+
+Secara default origin hanya diambil dari porsi 20% testing (split 80/20 seperti train_pipeline.py) sehingga
+tidak ada harga aktual yang ikut dipakai saat training; --include-train-overlap mematikan batas ini.
+
+Dengan --direct-horizon K, varian direct Dense(K) (train_pipeline.py --direct-horizon K) diuji pada origin yang
+sama sehingga akurasi per horizon dan latensi satu prediksi (rekursif: H forward pass, direct: satu) bisa dibandingkan.
+
+Contoh:
+    python backtest.py --origins 250 --horizon 20
+    python backtest.py --horizon 20 --direct-horizon 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_prep import (DEFAULT_ARTIFACTS_DIR, MODELLING_DIR, TIME_STEP, TRAIN_RATIO, download_close,
+                       list_ticker_saham, tanggal_akhir, tanggal_mulai)
+from emiten_config import direct_variant_suffix
+from forecasting import direct_forecast_scaled_windows, rollout_scaled_windows
+from lstm_engine import LSTMStack
+
+DEFAULT_REPORT_PATH = os.path.join(MODELLING_DIR, 'backtest_mape_per_horizon.csv')
+
+
+def walk_forward_backtest(model, scaler, close_values, num_origins=250, horizon=20, window_size=TIME_STEP,
+                          incremental=False, direct=False, min_origin=0):
+    """
+    Menjalankan backtest pada `num_origins` origin terakhir yang masih memiliki `horizon` harga aktual.
+    Origin sebelum indeks `min_origin` (mis. akhir porsi training) tidak dipakai, sehingga jumlah origin bisa lebih sedikit.
+    direct=True memakai model direct Dense(K >= horizon) dengan satu forward pass untuk semua origin.
+    Mengembalikan (prediksi, aktual), keduanya berbentuk (origin, horizon) dalam Rupiah.
+    """
+    close_values = np.asarray(close_values, dtype=float).reshape(-1)
+    min_origin = max(min_origin, window_size)
+    num_origins = min(num_origins, len(close_values) - min_origin - horizon + 1)
+    if num_origins < 1:
+        raise ValueError(f"Data historis ({len(close_values)}) kurang untuk window {window_size} dan horizon {horizon}.")
+    # origin o: window = close[o - window_size:o], aktual = close[o:o + horizon]
+    first_origin = len(close_values) - horizon - num_origins + 1
+    scaled_close = scaler.transform(close_values.reshape(-1, 1))[:, 0]
+    windows = np.lib.stride_tricks.sliding_window_view(scaled_close, window_size)
+    scaled_windows = windows[first_origin - window_size:first_origin - window_size + num_origins, :, np.newaxis]
+    actual = np.lib.stride_tricks.sliding_window_view(close_values, horizon)[first_origin:first_origin + num_origins]
+
+    if direct:
+        scaled_path = direct_forecast_scaled_windows(model, scaled_windows, horizon)
+    else:
+        scaled_path = rollout_scaled_windows(model, scaled_windows, horizon, incremental)
+    predicted = scaler.inverse_transform(scaled_path.reshape(-1, 1)).reshape(num_origins, horizon)
+    return predicted, actual
+
+
+def mape_per_horizon(predicted, actual):
+    """MAPE (%) per kolom horizon; harga aktual nol dibuang seperti evaluasi di notebook."""
+    actual = np.asarray(actual, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(actual != 0, np.abs((actual - predicted) / actual), np.nan)
+    return np.nanmean(ape, axis=0) * 100
+
+
+def single_forecast_latency_ms(model, scaled_window, horizon, incremental=False, direct=False, repeat=10):
+    """Median waktu (ms) satu prediksi horizon langkah dari satu window, seperti satu permintaan di dashboard."""
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        if direct:
+            direct_forecast_scaled_windows(model, scaled_window, horizon)
+        else:
+            rollout_scaled_windows(model, scaled_window, horizon, incremental)
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(samples)
+
+
+def backtest_ticker(ticker, artifacts_dir=DEFAULT_ARTIFACTS_DIR, num_origins=250, horizon=20, incremental=False,
+                    start=tanggal_mulai, end=tanggal_akhir, csv_dir=None, direct_horizon=None, include_train_overlap=False):
+    """
+    Backtest satu emiten dengan mesin NumPy (LSTMStack). Mengembalikan DataFrame per horizon.
+    Origin dibatasi pada porsi testing kecuali include_train_overlap=True; kolom train_overlap_origins mencatat
+    berapa origin yang harga aktualnya masih berada di porsi training (selalu 0 secara default).
+    Jika direct_horizon diberikan, varian direct ikut diuji pada origin yang sama (kolom mape_direct; horizon <= K)
+    beserta latensi satu prediksi kedua model.
+    """
+    engine = LSTMStack.from_keras_archive(os.path.join(artifacts_dir, f"{ticker}_model.keras"))
+    scaler = joblib.load(os.path.join(artifacts_dir, f"{ticker}_scaler.joblib"))
+    close_values = download_close(ticker, start, end, csv_dir)['Close'].values
+    # Akhir porsi training pada rentang data ini (sama dengan split_train_test)
+    training_size = int(len(close_values) * TRAIN_RATIO)
+    min_origin = 0 if include_train_overlap else training_size
+    predicted, actual = walk_forward_backtest(engine, scaler, close_values, num_origins, horizon,
+                                              incremental=incremental, min_origin=min_origin)
+    first_origin = len(close_values) - horizon - len(predicted) + 1
+    report = pd.DataFrame({
+        "ticker": ticker,
+        "horizon": np.arange(1, horizon + 1),
+        "origins": len(predicted),
+        "train_overlap_origins": max(0, min(len(predicted), training_size - first_origin)),
+        "mape": mape_per_horizon(predicted, actual),
+    })
+    if direct_horizon is None:
+        return report
+
+    suffix = direct_variant_suffix(direct_horizon)
+    direct_engine = LSTMStack.from_keras_archive(os.path.join(artifacts_dir, f"{ticker}{suffix}_model.keras"))
+    direct_scaler = joblib.load(os.path.join(artifacts_dir, f"{ticker}{suffix}_scaler.joblib"))
+    if direct_engine.output_steps < horizon:
+        raise ValueError(f"Varian direct{direct_horizon} hanya memprediksi {direct_engine.output_steps} langkah; "
+                         f"gunakan --horizon <= {direct_engine.output_steps}.")
+    direct_predicted, direct_actual = walk_forward_backtest(direct_engine, direct_scaler, close_values, num_origins,
+                                                            horizon, direct=True, min_origin=min_origin)
+    report["mape_direct"] = mape_per_horizon(direct_predicted, direct_actual)
+    # Latensi satu prediksi horizon langkah dari window terakhir (batch 1), seperti satu permintaan dashboard
+    last_window = scaler.transform(close_values[-TIME_STEP:].reshape(-1, 1))[np.newaxis]
+    report["latency_ms"] = single_forecast_latency_ms(engine, last_window, horizon, incremental)
+    report["latency_ms_direct"] = single_forecast_latency_ms(direct_engine, direct_scaler.transform(
+        close_values[-TIME_STEP:].reshape(-1, 1))[np.newaxis], horizon, direct=True)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest walk-forward: MAPE per horizon per emiten.")
+    parser.add_argument("--tickers", nargs="+", default=list_ticker_saham)
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--origins", type=int, default=250, help="Jumlah titik asal prediksi terakhir.")
+    parser.add_argument("--horizon", type=int, default=20, help="Horizon maksimum (hari bursa).")
+    parser.add_argument("--incremental", action="store_true", help="Gunakan mode inkremental (stateful).")
+    parser.add_argument("--direct-horizon", type=int, default=None,
+                        help="Bandingkan dengan varian direct Dense(K) (artefak <ticker>_direct<K>_*).")
+    parser.add_argument("--start", default=tanggal_mulai)
+    parser.add_argument("--end", default=tanggal_akhir)
+    parser.add_argument("--csv-dir", default=None, help="Baca data dari <csv-dir>/<ticker>.csv alih-alih Yahoo Finance.")
+    parser.add_argument("--include-train-overlap", action="store_true",
+                        help="Izinkan origin yang harga aktualnya berada di porsi training 80% (default: hanya porsi testing).")
+    parser.add_argument("--output", default=DEFAULT_REPORT_PATH, help="Path laporan CSV.")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for ticker in args.tickers:
+        start_time = time.perf_counter()
+        report = backtest_ticker(ticker, args.artifacts_dir, args.origins, args.horizon, args.incremental,
+                                 args.start, args.end, args.csv_dir, args.direct_horizon, args.include_train_overlap)
+        reports.append(report)
+        print(f"{ticker}: {report['origins'].iloc[0]} origin ({report['train_overlap_origins'].iloc[0]} tumpang tindih "
+              f"dengan data training) x {args.horizon} langkah dalam "
+              f"{time.perf_counter() - start_time:.1f} detik - MAPE h=1 {report['mape'].iloc[0]:.2f}%, "
+              f"h={args.horizon} {report['mape'].iloc[-1]:.2f}%")
+        if args.direct_horizon is not None:
+            print(f"    direct: MAPE h=1 {report['mape_direct'].iloc[0]:.2f}%, h={args.horizon} "
+                  f"{report['mape_direct'].iloc[-1]:.2f}% - latensi satu prediksi {report['latency_ms'].iloc[0]:.1f} ms "
+                  f"(rekursif) vs {report['latency_ms_direct'].iloc[0]:.1f} ms (direct)")
+
+    report = pd.concat(reports, ignore_index=True)
+    report.to_csv(args.output, index=False)
+    table = report.pivot(index="horizon", columns="ticker", values="mape")
+    table["Rata-rata"] = table.mean(axis=1)
+    print("\nMAPE (%) per horizon:")
+    print(table.round(2).to_string())
+    if args.direct_horizon is not None:
+        direct_table = report.pivot(index="horizon", columns="ticker", values="mape_direct")
+        direct_table["Rata-rata"] = direct_table.mean(axis=1)
+        print(f"\nMAPE (%) per horizon, varian direct{args.direct_horizon}:")
+        print(direct_table.round(2).to_string())
+    print(f"\nLaporan disimpan di {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
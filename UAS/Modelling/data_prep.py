@@ -0,0 +1,142 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --- KONFIGURASI (sama dengan notebook prediksi_harga_saham1a) ---
+list_ticker_saham = ['BBCA.JK', 'BBRI.JK', 'TLKM.JK', 'BMRI.JK', 'ASII.JK']
+tanggal_mulai = '2019-06-01'
+tanggal_akhir = '2024-06-01'
+
+TIME_STEP = 25      # Jurnal menguji 25, 50, 75, 100
+N_LSTM_LAYERS = 4   # Jurnal menguji 4 dan 8
+N_NEURONS = 96      # Jurnal menggunakan 96 neuron per layer LSTM
+DROPOUT_RATE = 0.2  # Dropout setelah setiap layer LSTM
+EPOCHS = 50         # Jurnal menguji 12, 25, 50, 100
+BATCH_SIZE = 32     # Ukuran batch umum
+TRAIN_RATIO = 0.80  # 80% data training dan 20% data testing
+
+# --- PATH ---
+MODELLING_DIR = os.path.dirname(os.path.abspath(__file__))
+UI_STREAMLIT_DIR = os.path.join(MODELLING_DIR, '..', 'UI-Streamlit')
+# Folder artefak yang dibaca dashboard (ARTIFACTS_DIR_NAME di Dashboard_Prediksi.py)
+DEFAULT_ARTIFACTS_DIR = os.path.join(UI_STREAMLIT_DIR, 'streamlit_deployment_artifacts')
+
+# Modul dashboard (normalisasi data, mesin inferensi) dipakai ulang oleh skrip modelling
+if UI_STREAMLIT_DIR not in sys.path:
+    sys.path.insert(0, UI_STREAMLIT_DIR)
+
+from price_store import normalize_ohlcv  # noqa: E402
+
+
+def download_close(ticker, start=tanggal_mulai, end=tanggal_akhir, csv_dir=None):
+    """
+    Mengambil harga penutupan sebagai DataFrame satu kolom 'Close'.
+    Jika csv_dir diberikan, data dibaca dari `<csv_dir>/<ticker>.csv` (tanpa akses jaringan).
+    """
+    if csv_dir is not None:
+        raw_df = pd.read_csv(os.path.join(csv_dir, f"{ticker}.csv"), index_col="Date", parse_dates=True)
+        raw_df = raw_df.loc[(raw_df.index >= pd.Timestamp(start)) & (raw_df.index < pd.Timestamp(end))]
+    else:
+        import yfinance as yf
+        raw_df = yf.download(ticker, start=start, end=end, progress=False)
+    data = normalize_ohlcv(raw_df, ticker)
+    return data[['Close']].dropna()
+
+
+def split_train_test(data_close, train_ratio=TRAIN_RATIO):
+    """Pembagian data 80% training / 20% testing tanpa pengacakan, seperti di notebook."""
+    training_size = int(len(data_close) * train_ratio)
+    return data_close[:training_size], data_close[training_size:]
+
+
+def create_dataset(dataset, time_step=1):
+    """
+    Membuat dataset X dan y untuk LSTM.
+    dataset: array numpy input (biasanya harga penutupan ternormalisasi).
+    time_step: jumlah langkah waktu sebelumnya yang digunakan untuk prediksi.
+
+    X dan y adalah view (tanpa salinan) di atas `dataset` dengan jumlah sampel yang sama seperti loop
+    di notebook, yaitu len(dataset) - time_step - 1. Keduanya read-only.
+    """
+    dataset = np.asarray(dataset)
+    num_samples = len(dataset) - time_step - 1
+    # Perlu setidaknya time_step + 2 data untuk membuat satu pasangan X, y (sama dengan loop notebook)
+    if num_samples <= 0:
+        return np.array([]), np.array([]) # Kembalikan array kosong jika tidak cukup data
+
+    series = dataset[:, 0]
+    dataX = np.lib.stride_tricks.sliding_window_view(series, time_step)[:num_samples]
+    dataY = series[time_step:time_step + num_samples]
+    # Slice biasa tetap writable; dikunci agar perilakunya sama dengan dataX (mengubahnya akan mengubah dataset)
+    dataY.setflags(write=False)
+    return dataX, dataY
+
+
+def create_multistep_dataset(dataset, time_step=1, output_steps=1):
+    """
+    Seperti create_dataset, tetapi target berisi `output_steps` harga berikutnya untuk model direct
+    multi-horizon: y[i] = dataset[i + time_step : i + time_step + output_steps]. Dengan output_steps=1
+    jumlah sampel dan isinya sama dengan create_dataset (y berbentuk (samples, 1)).
+    """
+    dataset = np.asarray(dataset)
+    num_samples = len(dataset) - time_step - output_steps
+    if num_samples <= 0:
+        return np.array([]), np.array([])
+
+    series = dataset[:, 0]
+    dataX = np.lib.stride_tricks.sliding_window_view(series, time_step)[:num_samples]
+    dataY = np.lib.stride_tricks.sliding_window_view(series[time_step:], output_steps)[:num_samples]
+    return dataX, dataY
+
+
+def make_window_dataset(dataX, dataY, batch_size=32, shuffle=False, seed=0, initial_epoch=0):
+    """
+    Pipeline tf.data streaming di atas view dari create_dataset: batch dirakit dari generator
+    (hanya satu batch yang disalin setiap kali) dan disiapkan di latar belakang dengan prefetch.
+    Jika shuffle=True urutan sampel diacak per epoch dengan seed (seed, epoch), sehingga run
+    yang dilanjutkan dari initial_epoch mendapat urutan yang sama dengan run tanpa jeda.
+    """
+    import itertools
+
+    import tensorflow as tf
+
+    epochs = itertools.count(initial_epoch)
+    time_step = dataX.shape[1]
+
+    def generate_batches():
+        order = np.arange(len(dataX))
+        if shuffle:
+            np.random.default_rng((seed, next(epochs))).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            if not shuffle:
+                batch = slice(batch[0], batch[-1] + 1)
+            yield (dataX[batch, :, np.newaxis].astype(np.float32), dataY[batch].astype(np.float32))
+
+    dataset = tf.data.Dataset.from_generator(
+        generate_batches,
+        output_signature=(tf.TensorSpec(shape=(None, time_step, 1), dtype=tf.float32),
+                          tf.TensorSpec(shape=(None,) + dataY.shape[1:], dtype=tf.float32)))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def mape(actual, predicted):
+    """MAPE (%) dengan nilai aktual nol dibuang, seperti evaluasi Fase 7 di notebook."""
+    actual = np.asarray(actual, dtype=float).flatten()
+    predicted = np.asarray(predicted, dtype=float).flatten()
+    non_zero_mask = actual != 0
+    if not np.any(non_zero_mask):
+        return np.nan
+    return float(np.mean(np.abs((actual[non_zero_mask] - predicted[non_zero_mask]) / actual[non_zero_mask])) * 100)
+
+
+def test_windows(scaler, data_close, time_step=TIME_STEP, train_ratio=TRAIN_RATIO):
+    """X_test (samples, time_step, 1) dan y_test aktual (Rp) dari porsi 20% testing."""
+    _, test_df = split_train_test(data_close, train_ratio)
+    scaled_test_data = scaler.transform(test_df)
+    X_test, y_test = create_dataset(scaled_test_data, time_step)
+    X_test = X_test.reshape(X_test.shape[0], X_test.shape[1], 1)
+    y_test_actual = scaler.inverse_transform(y_test.reshape(-1, 1))
+    return X_test, y_test_actual
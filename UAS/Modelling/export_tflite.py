@@ -0,0 +1,119 @@
+"""
+Ekspor model .keras menjadi artefak TFLite terkuantisasi untuk dashboard (backend "tflite").
+
+Setiap model dievaluasi ulang pada porsi 20% testing (split 80/20 seperti notebook). Artefak
+.tflite hanya ditulis jika kenaikan MAPE terhadap model float tidak melebihi --max-mape-delta; jika ditolak,
+.tflite lama (dari versi .keras sebelumnya) dihapus. Laporan menyimpan SHA-256 file .keras sumber sehingga
+dashboard bisa menolak .tflite yang tidak lagi cocok setelah model dilatih ulang atau di-fine-tune.
+
+Contoh:
+    python export_tflite.py --quantization dynamic --max-mape-delta 0.25
+"""
+import argparse
+import json
+import os
+import sys
+
+import joblib
+
+from data_prep import (DEFAULT_ARTIFACTS_DIR, TIME_STEP, download_close, list_ticker_saham, mape,
+                       tanggal_akhir, tanggal_mulai, test_windows)
+from forecasting import artifact_hash
+from tflite_engine import TFLiteModel, tflite_path_for, tflite_report_path_for
+
+QUANTIZATION_MODES = ("dynamic", "float16")
+
+
+def convert_to_tflite(model, quantization="dynamic", time_step=TIME_STEP):
+    """
+    Mengonversi model Keras ke flatbuffer TFLite.
+    "dynamic": bobot int8 (dynamic-range), "float16": bobot float16.
+    Batch input ditetapkan 1 agar layer LSTM bisa dikonversi menjadi operator LSTM bawaan TFLite.
+    """
+    import tensorflow as tf
+
+    fixed_input = tf.keras.Input(batch_shape=(1, time_step, 1))
+    x = fixed_input
+    for layer in model.layers:
+        x = layer(x)
+    fixed_batch_model = tf.keras.Model(fixed_input, x)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed_batch_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization != "dynamic":
+        raise ValueError(f"Mode kuantisasi '{quantization}' tidak didukung. Pilih salah satu dari {QUANTIZATION_MODES}.")
+    return converter.convert()
+
+
+def _write_atomic(path, content, mode="wb"):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def export_ticker(ticker, artifacts_dir=DEFAULT_ARTIFACTS_DIR, quantization="dynamic", max_mape_delta=0.25,
+                  start=tanggal_mulai, end=tanggal_akhir, csv_dir=None):
+    """Mengonversi, mengevaluasi, dan (jika lolos) menyimpan artefak TFLite untuk satu ticker."""
+    from tensorflow.keras.models import load_model
+
+    model_path = os.path.join(artifacts_dir, f"{ticker}_model.keras")
+    scaler_path = os.path.join(artifacts_dir, f"{ticker}_scaler.joblib")
+    model = load_model(model_path, compile=False)
+    scaler = joblib.load(scaler_path)
+
+    X_test, y_test_actual = test_windows(scaler, download_close(ticker, start, end, csv_dir))
+    float_predict = scaler.inverse_transform(model.predict(X_test, verbose=0))
+
+    tflite_content = convert_to_tflite(model, quantization)
+    quantized_predict = scaler.inverse_transform(TFLiteModel(model_content=tflite_content).predict(X_test))
+
+    mape_float = mape(y_test_actual, float_predict)
+    mape_quantized = mape(y_test_actual, quantized_predict)
+    report = {
+        "ticker": ticker,
+        "quantization": quantization,
+        "test_samples": int(len(X_test)),
+        "mape_float": mape_float,
+        "mape_tflite": mape_quantized,
+        "mape_delta": mape_quantized - mape_float,
+        "max_mape_delta": max_mape_delta,
+        "source_sha256": artifact_hash(model_path),
+        "keras_bytes": os.path.getsize(model_path),
+        "tflite_bytes": len(tflite_content),
+        "published": bool(mape_quantized - mape_float <= max_mape_delta),
+    }
+    if report["published"]:
+        _write_atomic(tflite_path_for(model_path), tflite_content)
+    elif os.path.exists(tflite_path_for(model_path)):
+        # .tflite yang ada berasal dari versi .keras sebelumnya; jangan biarkan backend "tflite" memakainya
+        os.remove(tflite_path_for(model_path))
+    _write_atomic(tflite_report_path_for(model_path), json.dumps(report, indent=2), mode="w")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor model LSTM ke TFLite terkuantisasi dengan gerbang akurasi MAPE.")
+    parser.add_argument("--tickers", nargs="+", default=list_ticker_saham)
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default="dynamic")
+    parser.add_argument("--max-mape-delta", type=float, default=0.25,
+                        help="Kenaikan MAPE maksimum (poin persen) terhadap model float agar artefak dipublikasikan.")
+    parser.add_argument("--csv-dir", default=None, help="Baca data dari <csv-dir>/<ticker>.csv alih-alih Yahoo Finance.")
+    args = parser.parse_args(argv)
+
+    all_published = True
+    for ticker in args.tickers:
+        report = export_ticker(ticker, args.artifacts_dir, args.quantization, args.max_mape_delta, csv_dir=args.csv_dir)
+        status = "DIPUBLIKASIKAN" if report["published"] else "DITOLAK"
+        print(f"{ticker}: MAPE float {report['mape_float']:.4f}% -> TFLite {report['mape_tflite']:.4f}% "
+              f"(delta {report['mape_delta']:+.4f}), {report['keras_bytes'] / 1e6:.2f} MB -> "
+              f"{report['tflite_bytes'] / 1e6:.2f} MB [{status}]")
+        all_published = all_published and report["published"]
+    return 0 if all_published else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Fine-tuning inkremental (warm-start) untuk menjaga model tetap mutakhir tanpa training ulang 50 epoch.
+
+Model dan scaler yang sudah dipublikasikan dimuat apa adanya (scaler TIDAK di-fit ulang agar bobot tetap
+cocok). Window dibangun hanya untuk bar setelah batas data training (data_end di manifest) ditambah sampel
+replay dari data lama agar model tidak melupakan pola sebelumnya. Window bar baru yang paling akhir
+(urut waktu) ditahan sebagai validasi: dipakai untuk early stopping dan gerbang publikasi, tidak ikut training.
+Versi baru hanya dipublikasikan jika MAPE validasi tidak memburuk lebih dari --tolerance dibanding model lama.
+
+Data dibaca dari price store dashboard (hanya bar baru yang diunduh) atau dari --csv-dir.
+
+Contoh:
+    python finetune.py
+    python finetune.py --tickers BBCA.JK --csv-dir data --end 2024-09-01
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_prep import (BATCH_SIZE, DEFAULT_ARTIFACTS_DIR, TIME_STEP, UI_STREAMLIT_DIR, download_close,
+                       list_ticker_saham, make_window_dataset, mape, tanggal_akhir)
+from train_pipeline import configure_worker, publish_artifacts, ticker_seed, worker_pool
+
+DEFAULT_PRICE_STORE_DIR = os.path.join(UI_STREAMLIT_DIR, 'price_data')
+# Jumlah minimal window bar baru yang ditahan untuk validasi; di bawahnya fine-tuning ditunda
+MIN_VAL_WINDOWS = 5
+
+
+def read_manifest(artifacts_dir, ticker):
+    """Manifest artefak (train_pipeline.py), atau None untuk model lama dari notebook yang belum memilikinya."""
+    path = os.path.join(artifacts_dir, f"{ticker}_manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def completed_sessions_end():
+    """Batas akhir (eksklusif) yang hanya mencakup sesi BEI yang sudah selesai, tanpa bar intraday hari ini."""
+    from idx_calendar import IDXCalendar
+
+    return IDXCalendar().last_completed_session() + datetime.timedelta(days=1)
+
+
+def load_close(ticker, start, end, csv_dir=None, price_store_dir=DEFAULT_PRICE_STORE_DIR):
+    """Harga penutupan [start, end) dari CSV atau price store (yang diperbarui inkremental terlebih dahulu)."""
+    if csv_dir is not None:
+        return download_close(ticker, start, end, csv_dir)
+    from price_store import PriceStore
+
+    # Store ini dipakai bersama dashboard dan tidak pernah mengunduh ulang tanggal yang sudah ada,
+    # jadi bar sesi yang belum selesai tidak boleh ikut tersimpan
+    end = min(pd.Timestamp(end).date(), completed_sessions_end())
+    price_store = PriceStore(price_store_dir)
+    price_store.update(ticker, end=end, initial_start=pd.Timestamp(start).date())
+    data_close = price_store.get_close(ticker, start=pd.Timestamp(start).date())[['Close']].dropna()
+    return data_close.loc[data_close.index < pd.Timestamp(end)]
+
+
+def split_finetune_windows(target_dates, cutoff, val_windows=20, replay_ratio=4, min_replay=128, rng=None):
+    """
+    Indeks window untuk fine-tuning berdasarkan tanggal target tiap window:
+    - validasi: window baru (target setelah cutoff) yang paling akhir, paling banyak val_windows
+      dan paling banyak separuh window baru, agar selalu di luar sampel dan setelah semua window training,
+    - baru: sisa window baru (dipakai untuk training),
+    - replay: sampel acak dari window lama (target <= cutoff), max(replay_ratio x baru, min_replay) window.
+    Mengembalikan (indeks training, indeks validasi, jumlah window baru untuk training).
+    """
+    rng = rng or np.random.default_rng()
+    is_new = np.asarray(target_dates > pd.Timestamp(cutoff))
+    new_idx = np.flatnonzero(is_new)
+    old_idx = np.flatnonzero(~is_new)
+    num_val = min(val_windows, len(new_idx) // 2)
+    train_new_idx, val_idx = new_idx[:len(new_idx) - num_val], new_idx[len(new_idx) - num_val:]
+    replay_size = min(len(old_idx), max(replay_ratio * len(train_new_idx), min_replay))
+    replay_idx = rng.choice(old_idx, size=replay_size, replace=False)
+    return np.sort(np.concatenate([train_new_idx, replay_idx])), val_idx, len(train_new_idx)
+
+
+def finetune_ticker(ticker, artifacts_dir=DEFAULT_ARTIFACTS_DIR, end=None, cutoff=None, csv_dir=None,
+                    price_store_dir=DEFAULT_PRICE_STORE_DIR, epochs=5, patience=2, learning_rate=1e-4,
+                    batch_size=BATCH_SIZE, replay_days=730, replay_ratio=4, min_replay=128, val_windows=20,
+                    tolerance=0.05, seed=42, threads_per_worker=1, dry_run=False):
+    """Fine-tuning satu ticker dari artefak yang ada. Dijalankan di proses worker."""
+    start_time = time.perf_counter()
+    seed = ticker_seed(ticker, seed)
+    configure_worker(threads_per_worker, seed)
+    from tensorflow.keras.callbacks import EarlyStopping
+    from tensorflow.keras.models import load_model
+    from tensorflow.keras.optimizers import Adam
+
+    manifest = read_manifest(artifacts_dir, ticker) or {}
+    time_step = manifest.get("window_size", TIME_STEP)
+    if manifest.get("output_steps", 1) != 1:
+        return {"ticker": ticker, "status": "failed", "reason": "hanya model rekursif Dense(1) yang didukung"}
+    # Model dari notebook (tanpa manifest) dilatih hingga tanggal_akhir
+    cutoff = pd.Timestamp(cutoff or manifest.get("data_end") or tanggal_akhir)
+    end = end or completed_sessions_end().isoformat()
+    data_close = load_close(ticker, cutoff - pd.Timedelta(days=replay_days), end, csv_dir, price_store_dir)
+    new_bars = int((data_close.index > cutoff).sum())
+    if new_bars == 0:
+        return {"ticker": ticker, "status": "skipped", "reason": f"tidak ada bar baru setelah {cutoff.date()}"}
+
+    scaler = joblib.load(os.path.join(artifacts_dir, f"{ticker}_scaler.joblib"))
+    scaled_close = scaler.transform(data_close)[:, 0]
+    # Semua window hingga bar terakhir: X[i] = close[i:i + time_step], y[i] = close[i + time_step]
+    windows = np.lib.stride_tricks.sliding_window_view(scaled_close[:-1], time_step)
+    targets = scaled_close[time_step:]
+    train_idx, val_idx, new_windows = split_finetune_windows(data_close.index[time_step:], cutoff, val_windows,
+                                                             replay_ratio, min_replay, np.random.default_rng(seed))
+    if len(val_idx) < MIN_VAL_WINDOWS:
+        return {"ticker": ticker, "status": "skipped",
+                "reason": f"{new_bars} bar baru setelah {cutoff.date()} belum cukup untuk validasi "
+                          f"(butuh minimal {2 * MIN_VAL_WINDOWS})"}
+
+    model_path = os.path.join(artifacts_dir, f"{ticker}_model.keras")
+    model = load_model(model_path, compile=False)
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mean_squared_error')
+
+    def evaluate(indices):
+        actual = scaler.inverse_transform(targets[indices].reshape(-1, 1))
+        predicted = scaler.inverse_transform(model.predict(windows[indices][..., np.newaxis], verbose=0))
+        return mape(actual, predicted)
+
+    new_idx = train_idx[-new_windows:]
+    # MAPE validasi: window bar baru terbaru yang tidak ikut training (di luar sampel)
+    mape_val_before, mape_new_before = evaluate(val_idx), evaluate(new_idx)
+    history = model.fit(make_window_dataset(windows[train_idx], targets[train_idx], batch_size, shuffle=True, seed=seed),
+                        validation_data=make_window_dataset(windows[val_idx], targets[val_idx], batch_size),
+                        epochs=epochs,
+                        callbacks=[EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)],
+                        verbose=0)
+    mape_val_after, mape_new_after = evaluate(val_idx), evaluate(new_idx)
+
+    result = {
+        "ticker": ticker,
+        "cutoff": cutoff.strftime('%Y-%m-%d'),
+        "data_end": data_close.index[-1].strftime('%Y-%m-%d'),
+        "new_bars": new_bars,
+        "val_start": data_close.index[time_step:][val_idx[0]].strftime('%Y-%m-%d'),
+        "train_windows": len(train_idx),
+        "replay_windows": len(train_idx) - new_windows,
+        "val_windows": len(val_idx),
+        "epochs_run": len(history.history["loss"]),
+        "mape_val_before": mape_val_before,
+        "mape_val_after": mape_val_after,
+        "mape_new_before": mape_new_before,
+        "mape_new_after": mape_new_after,
+        "seconds": time.perf_counter() - start_time,
+    }
+    if mape_val_after > mape_val_before * (1 + tolerance):
+        return dict(result, status="rejected",
+                    reason=f"MAPE validasi memburuk {mape_val_before:.2f}% -> {mape_val_after:.2f}%")
+    if dry_run:
+        return dict(result, status="validated")
+
+    fine_tune = {key: result[key] for key in ("cutoff", "new_bars", "val_start", "train_windows", "replay_windows",
+                                               "val_windows", "epochs_run", "mape_val_before", "mape_val_after")}
+    fine_tune["base_model_sha256"] = manifest.get("model_sha256")
+    new_manifest = {key: value for key, value in manifest.items() if key not in ("model_sha256", "scaler_sha256")}
+    new_manifest.update({
+        "ticker": ticker,
+        "window_size": time_step,
+        "data_end": result["data_end"],
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "fine_tune": fine_tune,
+    })
+    publish_artifacts(ticker, model, scaler, new_manifest, artifacts_dir)
+    result["seconds"] = time.perf_counter() - start_time
+    return dict(result, status="published")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fine-tuning inkremental model LSTM pada bar baru (warm-start).")
+    parser.add_argument("--tickers", nargs="+", default=list_ticker_saham)
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--end", default=None, help="Batas akhir data (eksklusif, default: setelah sesi terakhir yang sudah selesai).")
+    parser.add_argument("--cutoff", default=None,
+                        help="Batas data training model lama (default: data_end di manifest, atau tanggal akhir notebook).")
+    parser.add_argument("--csv-dir", default=None, help="Baca data dari <csv-dir>/<ticker>.csv alih-alih price store.")
+    parser.add_argument("--price-store-dir", default=DEFAULT_PRICE_STORE_DIR)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--patience", type=int, default=2, help="Early stopping pada val_loss.")
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--replay-days", type=int, default=730, help="Rentang data lama (hari) untuk sampel replay.")
+    parser.add_argument("--replay-ratio", type=int, default=4, help="Jumlah window replay per window baru.")
+    parser.add_argument("--min-replay", type=int, default=128)
+    parser.add_argument("--val-windows", type=int, default=20,
+                        help="Jumlah maksimum window bar baru terbaru yang ditahan untuk validasi (paling banyak separuhnya).")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Kenaikan MAPE validasi relatif maksimum agar versi baru dipublikasikan.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Jalankan dan validasi tanpa mempublikasikan.")
+    args = parser.parse_args(argv)
+
+    workers = min(args.workers or max(1, (os.cpu_count() or 1) // args.threads_per_worker), len(args.tickers))
+    all_succeeded = True
+    with worker_pool(workers, args.threads_per_worker) as executor:
+        futures = {
+            executor.submit(finetune_ticker, ticker, args.artifacts_dir, args.end, args.cutoff, args.csv_dir,
+                            args.price_store_dir, args.epochs, args.patience, args.learning_rate, args.batch_size,
+                            args.replay_days, args.replay_ratio, args.min_replay, args.val_windows, args.tolerance,
+                            args.seed, args.threads_per_worker, args.dry_run): ticker
+            for ticker in args.tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"{ticker}: GAGAL - {e}")
+                all_succeeded = False
+                continue
+            if "mape_val_before" in result:
+                print(f"{ticker}: {result['status']} - {result['new_bars']} bar baru setelah {result['cutoff']}, "
+                      f"{result['train_windows']} window ({result['replay_windows']} replay), {result['epochs_run']} epoch, "
+                      f"{result['seconds']:.1f} detik - MAPE validasi {result['mape_val_before']:.2f}% -> "
+                      f"{result['mape_val_after']:.2f}% (sejak {result['val_start']}), bar baru training {result['mape_new_before']:.2f}% -> "
+                      f"{result['mape_new_after']:.2f}%")
+            else:
+                print(f"{ticker}: {result['status']} - {result['reason']}")
+            all_succeeded = all_succeeded and result["status"] != "failed"
+    return 0 if all_succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Skrip modelling diimpor dengan nama datar (seperti saat dijalankan dari folder Modelling)
+MODELLING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MODELLING_DIR)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from data_prep import create_dataset
+
+
+def create_dataset_loop(dataset, time_step=1):
+    """create_dataset versi notebook prediksi_harga_saham1a (loop Python), sebagai acuan."""
+    dataX, dataY = [], []
+    for i in range(len(dataset) - time_step - 1):
+        dataX.append(dataset[i:(i + time_step), 0])
+        dataY.append(dataset[i + time_step, 0])
+    return np.array(dataX), np.array(dataY)
+
+
+@pytest.mark.parametrize("time_step", [1, 5, 25])
+@pytest.mark.parametrize("length", [0, 1, 5, 6, 7, 26, 27, 100])
+def test_create_dataset_matches_notebook_loop(length, time_step):
+    dataset = np.random.default_rng(length).random((length, 1))
+    dataX, dataY = create_dataset(dataset, time_step)
+    expectedX, expectedY = create_dataset_loop(dataset, time_step)
+    assert len(dataX) == len(expectedX) and len(dataY) == len(expectedY)
+    if len(expectedX):
+        np.testing.assert_array_equal(dataX, expectedX)
+        np.testing.assert_array_equal(dataY, expectedY)
+
+
+def test_create_dataset_returns_read_only_views():
+    dataset = np.arange(40, dtype=float).reshape(-1, 1)
+    dataX, dataY = create_dataset(dataset, 5)
+    assert np.shares_memory(dataX, dataset) and np.shares_memory(dataY, dataset)
+    assert not dataX.flags.writeable and not dataY.flags.writeable
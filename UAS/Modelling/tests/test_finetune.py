@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from finetune import split_finetune_windows
+
+CUTOFF = pd.Timestamp("2024-05-31")
+
+
+def make_target_dates(num_old, num_new):
+    return pd.bdate_range(end=CUTOFF, periods=num_old).append(pd.bdate_range(CUTOFF + pd.Timedelta(days=1), periods=num_new))
+
+
+def test_validation_holds_out_most_recent_new_windows():
+    target_dates = make_target_dates(300, 60)
+    train_idx, val_idx, new_windows = split_finetune_windows(target_dates, CUTOFF, val_windows=20,
+                                                             rng=np.random.default_rng(0))
+    np.testing.assert_array_equal(val_idx, np.arange(340, 360))
+    assert new_windows == 40
+    # Validasi di luar sampel dan sepenuhnya setelah semua window training
+    assert not set(val_idx) & set(train_idx)
+    assert train_idx.max() < val_idx.min()
+    np.testing.assert_array_equal(train_idx[-new_windows:], np.arange(300, 340))
+    # Replay hanya dari window sebelum cutoff
+    assert (target_dates[train_idx[:-new_windows]] <= CUTOFF).all()
+
+
+def test_validation_takes_at_most_half_of_new_windows():
+    target_dates = make_target_dates(300, 9)
+    train_idx, val_idx, new_windows = split_finetune_windows(target_dates, CUTOFF, val_windows=20,
+                                                             rng=np.random.default_rng(0))
+    assert (len(val_idx), new_windows) == (4, 5)
+    assert train_idx.max() < val_idx.min()
+
+
+def test_no_new_windows_gives_empty_validation():
+    _, val_idx, new_windows = split_finetune_windows(make_target_dates(300, 0), CUTOFF, rng=np.random.default_rng(0))
+    assert len(val_idx) == 0 and new_windows == 0
@@ -0,0 +1,300 @@
+"""
+Pipeline training multi-ticker yang paralel dan bisa dilanjutkan (resumable).
+
+Versi skrip dari loop training di notebook prediksi_harga_saham1a: setiap ticker dilatih di proses
+terpisah dengan batas thread per proses dan seed deterministik. Checkpoint disimpan setiap epoch
+sehingga run yang terputus dilanjutkan dari epoch terakhir (hanya jika konfigurasi run dan datanya sama). Model, scaler, dan manifest
+(window size, MAPE, rentang data, hash) ditulis secara atomik ke folder artefak dashboard.
+
+Dengan --direct-horizon K dilatih varian direct multi-horizon: arsitektur yang sama dengan kepala Dense(K)
+yang memprediksi K hari berikutnya sekaligus dari window yang sama. Artefaknya diberi akhiran _direct<K>
+(mis. BBCA.JK_direct20_model.keras) dan dipakai dashboard secara otomatis untuk horizon <= K.
+
+Contoh:
+    python train_pipeline.py --workers 5 --threads-per-worker 2
+    python train_pipeline.py --direct-horizon 20
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_prep import (BATCH_SIZE, DEFAULT_ARTIFACTS_DIR, DROPOUT_RATE, EPOCHS, MODELLING_DIR, N_LSTM_LAYERS,
+                       N_NEURONS, TIME_STEP, create_multistep_dataset, download_close, list_ticker_saham, make_window_dataset,
+                       mape, split_train_test, tanggal_akhir, tanggal_mulai)
+from emiten_config import direct_variant_suffix
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(MODELLING_DIR, 'training_checkpoints')
+
+
+def ticker_seed(ticker, base_seed):
+    """Seed deterministik per ticker, tidak bergantung pada urutan atau jumlah worker."""
+    return (base_seed + zlib.crc32(ticker.encode())) % (2 ** 31)
+
+
+def worker_thread_env(threads_per_worker):
+    """Variabel lingkungan pembatas thread OpenMP/BLAS/TensorFlow untuk satu worker."""
+    env = {env_var: str(threads_per_worker)
+           for env_var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS")}
+    env["TF_NUM_INTEROP_THREADS"] = "1"
+    return env
+
+
+def worker_pool(max_workers, threads_per_worker):
+    """
+    ProcessPoolExecutor "spawn" dengan batas thread per worker. Variabel lingkungan diset di proses induk
+    sebelum worker dibuat, karena worker sudah mengimpor NumPy (lewat modul ini) sebelum fungsi worker berjalan
+    dan pustaka BLAS hanya membaca variabel tersebut saat dimuat.
+    """
+    os.environ.update(worker_thread_env(threads_per_worker))
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def configure_worker(threads_per_worker, seed):
+    """
+    Membatasi thread TensorFlow/BLAS di proses worker dan menetapkan seed. Dipanggil sebelum training.
+    Pool thread BLAS yang sudah dimuat dibatasi lewat threadpoolctl; TensorFlow belum diimpor di sini.
+    """
+    from threadpoolctl import threadpool_limits
+
+    os.environ.update(worker_thread_env(threads_per_worker))
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    threadpool_limits(limits=threads_per_worker)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.keras.utils.set_random_seed(seed)
+    tf.config.experimental.enable_op_determinism()
+
+
+def build_lstm_model(time_step=TIME_STEP, n_lstm_layers=N_LSTM_LAYERS, n_neurons=N_NEURONS,
+                     dropout_rate=DROPOUT_RATE, output_steps=1):
+    """Arsitektur yang sama dengan notebook: LSTM x N (Dropout setelah tiap layer) lalu Dense."""
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential()
+    model.add(Input(shape=(time_step, 1)))
+    for i in range(n_lstm_layers):
+        model.add(LSTM(n_neurons, return_sequences=(i < n_lstm_layers - 1)))
+        model.add(Dropout(dropout_rate))
+    model.add(Dense(output_steps))
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def publish_artifacts(ticker, model, scaler, manifest, artifacts_dir, suffix=""):
+    """
+    Menulis model, scaler, lalu manifest ke folder artefak. Setiap file ditulis ke nama sementara
+    kemudian di-rename (atomik), tetapi ketiga rename tidak atomik sebagai satu set: manifest ditulis
+    terakhir dan memuat hash model dan scaler, sehingga pembaca (model_registry.load_prediction_assets)
+    menolak pasangan file yang belum cocok dengan manifest dan mencoba lagi.
+    """
+    os.makedirs(artifacts_dir, exist_ok=True)
+    model_path = os.path.join(artifacts_dir, f"{ticker}{suffix}_model.keras")
+    scaler_path = os.path.join(artifacts_dir, f"{ticker}{suffix}_scaler.joblib")
+    tmp_model_path = os.path.join(artifacts_dir, f".{ticker}{suffix}_model.tmp.keras")
+    model.save(tmp_model_path)
+    joblib.dump(scaler, f"{scaler_path}.tmp")
+    manifest = dict(manifest, model_sha256=file_sha256(tmp_model_path), scaler_sha256=file_sha256(f"{scaler_path}.tmp"))
+    os.replace(tmp_model_path, model_path)
+    os.replace(f"{scaler_path}.tmp", scaler_path)
+    write_json_atomic(os.path.join(artifacts_dir, f"{ticker}{suffix}_manifest.json"), manifest)
+    return manifest
+
+
+def data_sha256(data_close):
+    """Sidik jari data training (tanggal dan harga) untuk mendeteksi data yang berubah antar run."""
+    return hashlib.sha256(pd.util.hash_pandas_object(data_close).values.tobytes()).hexdigest()
+
+
+def _epoch_checkpoint_callback(checkpoint_dir, run_config):
+    import tensorflow as tf
+
+    class EpochCheckpoint(tf.keras.callbacks.Callback):
+        """Menyimpan model dan nomor epoch (beserta konfigurasi run) setiap akhir epoch (ditulis atomik)."""
+
+        def on_epoch_end(self, epoch, logs=None):
+            tmp_path = os.path.join(checkpoint_dir, "last.tmp.keras")
+            self.model.save(tmp_path)
+            os.replace(tmp_path, os.path.join(checkpoint_dir, "last.keras"))
+            write_json_atomic(os.path.join(checkpoint_dir, "state.json"),
+                              {"epoch": epoch + 1, "completed": False, "config": run_config})
+
+    return EpochCheckpoint()
+
+
+def train_ticker(ticker, epochs=EPOCHS, batch_size=BATCH_SIZE, time_step=TIME_STEP, seed=42,
+                 threads_per_worker=1, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, artifacts_dir=DEFAULT_ARTIFACTS_DIR,
+                 start=tanggal_mulai, end=tanggal_akhir, csv_dir=None, force=False, output_steps=1):
+    """
+    Melatih (atau melanjutkan training) satu ticker lalu mempublikasikan artefaknya. Dijalankan di proses worker.
+    output_steps > 1 melatih varian direct Dense(output_steps) dengan target output_steps hari berikutnya.
+    """
+    suffix = direct_variant_suffix(output_steps) if output_steps > 1 else ""
+    seed = ticker_seed(ticker, seed)
+    configure_worker(threads_per_worker, seed)
+    from sklearn.preprocessing import MinMaxScaler
+    from tensorflow.keras.models import load_model
+
+    # --- Pra-pemrosesan (sama dengan Fase 2-3 di notebook) ---
+    data_close = download_close(ticker, start, end, csv_dir)
+    train_df, test_df = split_train_test(data_close)
+    if len(train_df) <= time_step + output_steps or len(test_df) <= time_step + output_steps:
+        return {"ticker": ticker, "status": "failed", "reason": "data train/test tidak cukup setelah split"}
+
+    # Checkpoint hanya dilanjutkan (atau dilewati jika selesai) untuk konfigurasi dan data yang sama persis;
+    # run dengan --start/--end, --epochs, --seed, time_step, output_steps, atau data berbeda dimulai dari awal
+    run_config = {"start": str(start), "end": str(end), "epochs": epochs, "batch_size": batch_size, "seed": seed,
+                  "time_step": time_step, "output_steps": output_steps, "data_sha256": data_sha256(data_close)}
+    ticker_checkpoint_dir = os.path.join(checkpoint_dir, f"{ticker}{suffix}")
+    os.makedirs(ticker_checkpoint_dir, exist_ok=True)
+    state_path = os.path.join(ticker_checkpoint_dir, "state.json")
+    state = {"epoch": 0, "completed": False, "config": run_config}
+    if not force and os.path.exists(state_path):
+        with open(state_path) as f:
+            saved_state = json.load(f)
+        if saved_state.get("config") == run_config:
+            state = saved_state
+    if state["completed"]:
+        return {"ticker": ticker, "status": "skipped", "reason": "sudah selesai pada run sebelumnya dengan konfigurasi sama"}
+
+    # Scaler disimpan bersama checkpoint agar run yang dilanjutkan memakai fit yang sama dengan bobotnya
+    checkpoint_model_path = os.path.join(ticker_checkpoint_dir, "last.keras")
+    checkpoint_scaler_path = os.path.join(ticker_checkpoint_dir, "scaler.joblib")
+    resume = state["epoch"] > 0 and os.path.exists(checkpoint_model_path) and os.path.exists(checkpoint_scaler_path)
+    if resume:
+        scaler = joblib.load(checkpoint_scaler_path)
+    else:
+        scaler = MinMaxScaler(feature_range=(0, 1)).fit(train_df)
+        joblib.dump(scaler, f"{checkpoint_scaler_path}.tmp")
+        os.replace(f"{checkpoint_scaler_path}.tmp", checkpoint_scaler_path)
+    scaled_train_data = scaler.transform(train_df)
+    scaled_test_data = scaler.transform(test_df)
+    # Target (samples, output_steps); untuk output_steps=1 sama dengan create_dataset di notebook
+    train_windows, y_train = create_multistep_dataset(scaled_train_data, time_step, output_steps)
+    test_windows, y_test = create_multistep_dataset(scaled_test_data, time_step, output_steps)
+    # View (samples, time_step, 1) tanpa salinan untuk evaluasi
+    X_train = train_windows.reshape(train_windows.shape[0], train_windows.shape[1], 1)
+    X_test = test_windows.reshape(test_windows.shape[0], test_windows.shape[1], 1)
+
+    # --- Training dengan checkpoint per epoch ---
+    if resume:
+        model = load_model(checkpoint_model_path)
+    else:
+        state["epoch"] = 0
+        model = build_lstm_model(time_step, output_steps=output_steps)
+    if state["epoch"] < epochs:
+        train_dataset = make_window_dataset(train_windows, y_train, batch_size, shuffle=True, seed=seed,
+                                            initial_epoch=state["epoch"])
+        model.fit(train_dataset,
+                  validation_data=make_window_dataset(test_windows, y_test, batch_size),
+                  epochs=epochs,
+                  initial_epoch=state["epoch"],
+                  callbacks=[_epoch_checkpoint_callback(ticker_checkpoint_dir, run_config)],
+                  verbose=0)
+
+    # --- Evaluasi (Fase 6-7) dan publikasi artefak ---
+    # Scaler hanya satu fitur: denormalisasi dilakukan per elemen lalu dikembalikan ke (samples, output_steps)
+    def denormalize(scaled):
+        return scaler.inverse_transform(np.asarray(scaled).reshape(-1, 1)).reshape(-1, output_steps)
+
+    train_predict = denormalize(model.predict(X_train, verbose=0))
+    test_predict = denormalize(model.predict(X_test, verbose=0))
+    y_train_actual, y_test_actual = denormalize(y_train), denormalize(y_test)
+    manifest = {
+        "ticker": ticker,
+        "window_size": time_step,
+        "output_steps": output_steps,
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "seed": seed,
+        "mape_train": mape(y_train_actual, train_predict),
+        "mape_test": mape(y_test_actual, test_predict),
+        "mape_test_per_horizon": [mape(y_test_actual[:, k], test_predict[:, k]) for k in range(output_steps)],
+        "data_start": data_close.index[0].strftime('%Y-%m-%d'),
+        "data_end": data_close.index[-1].strftime('%Y-%m-%d'),
+        "train_rows": len(train_df),
+        "test_rows": len(test_df),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    manifest = publish_artifacts(ticker, model, scaler, manifest, artifacts_dir, suffix)
+    write_json_atomic(state_path, {"epoch": epochs, "completed": True, "config": run_config})
+    return dict(manifest, status="trained")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Training paralel dan resumable untuk model LSTM semua emiten.")
+    parser.add_argument("--tickers", nargs="+", default=list_ticker_saham)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah proses worker (default: jumlah core / threads-per-worker, maksimal jumlah ticker).")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--start", default=tanggal_mulai)
+    parser.add_argument("--end", default=tanggal_akhir)
+    parser.add_argument("--csv-dir", default=None, help="Baca data dari <csv-dir>/<ticker>.csv alih-alih Yahoo Finance.")
+    parser.add_argument("--force", action="store_true", help="Abaikan checkpoint dan latih ulang dari awal.")
+    parser.add_argument("--direct-horizon", type=int, default=1,
+                        help="K > 1 melatih varian direct Dense(K) yang memprediksi K hari sekaligus (artefak _direct<K>).")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads_per_worker)
+    workers = min(workers, len(args.tickers))
+    print(f"Melatih {len(args.tickers)} ticker dengan {workers} worker x {args.threads_per_worker} thread...")
+
+    all_succeeded = True
+    # "spawn" agar setiap worker mengimpor TensorFlow dengan konfigurasi thread-nya sendiri
+    with worker_pool(workers, args.threads_per_worker) as executor:
+        futures = {
+            executor.submit(train_ticker, ticker, args.epochs, args.batch_size, TIME_STEP, args.seed,
+                            args.threads_per_worker, args.checkpoint_dir, args.artifacts_dir,
+                            args.start, args.end, args.csv_dir, args.force, args.direct_horizon): ticker
+            for ticker in args.tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"{ticker}: GAGAL - {e}")
+                all_succeeded = False
+                continue
+            if result["status"] == "trained":
+                print(f"{ticker}: selesai - MAPE Training {result['mape_train']:.2f}%, MAPE Testing {result['mape_test']:.2f}%")
+            else:
+                print(f"{ticker}: {result['status']} - {result['reason']}")
+                all_succeeded = all_succeeded and result["status"] != "failed"
+    return 0 if all_succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
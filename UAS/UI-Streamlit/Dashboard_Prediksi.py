@@ -2,14 +2,25 @@ import streamlit as st
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import joblib
 import datetime
-from tensorflow.keras.models import load_model
 import os 
+import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image 
 import matplotlib.pyplot as plt 
 import seaborn as sns 
+from forecasting import (ForecastCache, ForecastTrajectory, artifact_hash, forecast_intervals_mc_dropout,
+                         forecast_paths_batched, predict_direct_path)
+from idx_calendar import IDXCalendar
+from lstm_engine import LSTMStack, LSTMStackGroup
+from charts import data_fingerprint, figure_to_png, plot_price_history, price_history_altair, price_history_frame
+from emiten_config import build_emiten_dict, direct_variant_suffix, select_direct_variant
+from forecast_table import ForecastTable, latest_table_path
+from price_store import PriceStore, extract_close_column
+from model_registry import ModelRegistry, load_prediction_assets
+from stage_timing import StageTimer
+from weight_store import load_shared_group
 
 # --- KONFIGURASI HALAMAN DAN LOGO ---
 LOGO_IMAGE_PATH = "assets/3.png" # Path ke logo Anda
@@ -35,62 +46,292 @@ ARTIFACTS_DIR_NAME = "streamlit_deployment_artifacts" # Sesuai dengan kode Anda
 
 # 2. Ukuran window (time_step) yang digunakan saat training model LSTM Anda.
 WINDOW_SIZE = 25 # Sesuai dengan konfigurasi model Anda
+
+# 3. Backend inferensi: "numpy" membaca bobot langsung dari file .keras tanpa TensorFlow,
+#    "keras" memuat model dengan tensorflow.keras (TensorFlow baru diimpor saat dibutuhkan),
+#    "tflite" memakai artefak <ticker>_model.tflite terkuantisasi hasil UAS/Modelling/export_tflite.py.
+#    Jika ada model_weights.lstmws (python weight_store.py build), backend "numpy" memetakan bobot dari file itu
+#    sehingga beberapa worker server berbagi satu salinan bobot; WEIGHT_STORE_DTYPE=float16 memilih salinan float16.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "numpy")
+
+# 4. Nama folder penyimpanan harga lokal (satu file Arrow per ticker, diperbarui inkremental).
+PRICE_STORE_DIR_NAME = "price_data"
+
+# 5. Batas memori (MB) untuk bobot model yang disimpan registry; model yang paling lama tidak dipakai dikeluarkan.
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("MODEL_MEMORY_BUDGET_MB", "64"))
+
+# 6. Pengukuran waktu per tahap: STAGE_TIMING=1 (atau mengisi salah satu path ekspor) mencatatnya untuk semua sesi
+#    tanpa menampilkan apa pun ke pengunjung. STAGE_TIMING_JSONL dan STAGE_TIMING_PROM adalah path ekspor
+#    JSON-lines dan teks Prometheus (opsional). Panel debug di sidebar hanya muncul jika checkbox-nya dicentang.
+STAGE_TIMING_JSONL_PATH = os.environ.get("STAGE_TIMING_JSONL")
+STAGE_TIMING_PROM_PATH = os.environ.get("STAGE_TIMING_PROM")
+STAGE_TIMING_RECORD = (os.environ.get("STAGE_TIMING", "0") == "1" or bool(STAGE_TIMING_JSONL_PATH)
+                       or bool(STAGE_TIMING_PROM_PATH))
+
+# 7. Nama folder tabel prediksi akhir hari (hasil eod_forecast_job.py). Jika data dan model cocok,
+#    prediksi diambil dari tabel ini; jika tidak, prediksi dihitung langsung.
+FORECAST_TABLE_DIR_NAME = "forecast_table"
+
+# 8. Backend grafik harga: "altair" digambar native di browser (hanya titik data yang dikirim),
+#    "matplotlib" mengirim gambar PNG. Riwayat panjang diperkecil ke CHART_MAX_POINTS titik (LTTB).
+CHART_BACKEND = os.environ.get("CHART_BACKEND", "altair")
+CHART_MAX_POINTS = int(os.environ.get("CHART_MAX_POINTS", "800"))
 # --- AKHIR KONFIGURASI ---
 
 # --- PENGATURAN PATH DAN DICTIONARY EMITEN ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ARTIFACTS_DIR_PATH = os.path.join(SCRIPT_DIR, ARTIFACTS_DIR_NAME)
+PRICE_STORE_DIR_PATH = os.path.join(SCRIPT_DIR, PRICE_STORE_DIR_NAME)
+FORECAST_TABLE_DIR_PATH = os.path.join(SCRIPT_DIR, FORECAST_TABLE_DIR_NAME)
 
-emiten_dict = {
-    "BBCA": {"ticker": "BBCA.JK", "model_file": os.path.join(ARTIFACTS_DIR_PATH, "BBCA.JK_model.keras"), "scaler_file": os.path.join(ARTIFACTS_DIR_PATH, "BBCA.JK_scaler.joblib")},
-    "BBRI": {"ticker": "BBRI.JK", "model_file": os.path.join(ARTIFACTS_DIR_PATH, "BBRI.JK_model.keras"), "scaler_file": os.path.join(ARTIFACTS_DIR_PATH, "BBRI.JK_scaler.joblib")},
-    "TLKM": {"ticker": "TLKM.JK", "model_file": os.path.join(ARTIFACTS_DIR_PATH, "TLKM.JK_model.keras"), "scaler_file": os.path.join(ARTIFACTS_DIR_PATH, "TLKM.JK_scaler.joblib")},
-    "BMRI": {"ticker": "BMRI.JK", "model_file": os.path.join(ARTIFACTS_DIR_PATH, "BMRI.JK_model.keras"), "scaler_file": os.path.join(ARTIFACTS_DIR_PATH, "BMRI.JK_scaler.joblib")},
-    "ASII": {"ticker": "ASII.JK", "model_file": os.path.join(ARTIFACTS_DIR_PATH, "ASII.JK_model.keras"), "scaler_file": os.path.join(ARTIFACTS_DIR_PATH, "ASII.JK_scaler.joblib")}
-}
+# Kalender perdagangan BEI: langkah prediksi dihitung per sesi bursa, bukan per hari kalender
+trading_calendar = IDXCalendar()
+
+emiten_dict = build_emiten_dict(ARTIFACTS_DIR_PATH)
 
 
 # --- FUNGSI-FUNGSI ---
 
 @st.cache_resource
-def load_prediction_assets(_model_path, _scaler_path):
-    """Memuat model Keras dan scaler dari file."""
+def get_model_registry(backend=INFERENCE_BACKEND):
+    """Registry model bersama; semua emiten di emiten_dict langsung dimuat dan dipanaskan di latar belakang."""
+    registry = ModelRegistry(
+        lambda model_path, scaler_path: load_prediction_assets(model_path, scaler_path, backend),
+        memory_budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+        window_size=WINDOW_SIZE,
+    )
+    registry.preload({key: (info["model_file"], info["scaler_file"]) for key, info in emiten_dict.items()})
+    # Varian direct multi-horizon (jika ada) dimuat dengan kunci <emiten>_direct<K>
+    registry.preload({f"{key}{direct_variant_suffix(steps)}": (variant["model_file"], variant["scaler_file"])
+                      for key, info in emiten_dict.items() for steps, variant in info["direct_variants"].items()})
+    return registry
+
+def build_incremental_engine(model_path, model):
+    """Menyiapkan mesin LSTM NumPy (stateful) dari bobot model yang sudah dimuat."""
+    if isinstance(model, LSTMStack):
+        return model
+    if hasattr(model, "layers"):
+        return LSTMStack.from_keras_model(model)
+    return LSTMStack.from_keras_archive(model_path)
+
+def load_incremental_engine(registry_key, model_path, model, backend=INFERENCE_BACKEND):
+    """Mesin inkremental disimpan di registry agar ikut dibuang saat model `registry_key` dikeluarkan."""
+    return get_model_registry(backend).derived(registry_key, "incremental_engine",
+                                               lambda: build_incremental_engine(model_path, model))
+
+def load_emiten_group(emiten_keys, backend=INFERENCE_BACKEND):
+    """Menumpuk bobot beberapa emiten menjadi satu LSTMStackGroup beserta scaler masing-masing."""
+    registry = get_model_registry(backend)
+
+    def build_group():
+        engines, scalers = [], []
+        for key in emiten_keys:
+            model_obj, scaler_obj = registry.get(key)
+            engines.append(load_incremental_engine(key, emiten_dict[key]["model_file"], model_obj, backend))
+            scalers.append(scaler_obj)
+        # Bobot yang sudah ditumpuk di store bersama dipakai langsung (view memmap) alih-alih disalin ulang
+        shared_group = load_shared_group([emiten_dict[key]["model_file"] for key in emiten_keys]) if backend == "numpy" else None
+        return shared_group or LSTMStackGroup(engines), scalers
+
+    # Grup dibuang dari registry begitu salah satu model anggotanya dikeluarkan
+    return registry.derived(emiten_keys, "group", build_group)
+
+
+@st.cache_resource
+def get_stage_timer():
+    """Pencatat waktu per tahap bersama; histogram latensi diagregasi lintas sesi."""
+    return StageTimer(jsonl_path=STAGE_TIMING_JSONL_PATH, prometheus_path=STAGE_TIMING_PROM_PATH)
+
+def render_stage_timing_panel():
+    """Menutup pengukuran rerun ini dan menampilkan panel debug di sidebar (hanya jika checkbox debug dicentang)."""
+    spans = stage_timer.end_rerun()
+    if not show_stage_timing or not spans:
+        return
+    with st.sidebar.expander("Debug: Waktu per Tahap", expanded=True):
+        st.dataframe(pd.DataFrame(spans).drop(columns=["ts"]).set_index("stage").style.format({"duration_ms": "{:,.1f}"}))
+        st.caption("Histogram lintas sesi (ms):")
+        st.dataframe(pd.DataFrame(stage_timer.summary()).set_index(["stage", "ticker"]).style.format("{:,.1f}", subset=["mean_ms", "p95_le_ms"]))
+        st.download_button("Unduh metrik (Prometheus)", stage_timer.render_prometheus(), file_name="dashboard_metrics.prom", mime="text/plain")
+
+@st.cache_resource(max_entries=2)
+def load_forecast_table(table_path):
+    """Tabel prediksi akhir hari yang sudah diindeks; setiap versi baru memiliki nama file berbeda."""
+    return ForecastTable.from_file(table_path)
+
+def get_forecast_table():
+    """Versi terbaru tabel prediksi, atau None jika belum ada/tidak bisa dibaca (dashboard memakai prediksi langsung)."""
+    table_path = latest_table_path(FORECAST_TABLE_DIR_PATH)
+    if table_path is None:
+        return None
     try:
-        model_obj = load_model(_model_path, compile=False)
-        scaler_obj = joblib.load(_scaler_path)
-        return model_obj, scaler_obj
-    except Exception as e:
-        raise 
-
-def predict_future_price(model, scaler, current_historical_close_values, num_steps_to_predict, window_size=WINDOW_SIZE):
-    """Memprediksi harga penutupan untuk N langkah ke depan secara iteratif."""
-    if len(current_historical_close_values) < window_size:
-        return None 
-    last_window_data = current_historical_close_values[-window_size:].copy() 
-    if last_window_data.ndim == 1: 
-        last_window_data = last_window_data.reshape(-1, 1) 
-    scaled_window = scaler.transform(last_window_data) 
-    predicted_price_for_target_date_unscaled = None
-    for i in range(num_steps_to_predict):
-        X_predict = np.expand_dims(scaled_window, axis=0) 
-        scaled_pred_single_step = model.predict(X_predict, verbose=0)[0][0]
-        if i == num_steps_to_predict - 1: 
-            predicted_price_for_target_date_unscaled = scaler.inverse_transform(np.array([[scaled_pred_single_step]]))[0][0]
-        new_scaled_value_for_window = np.array([[scaled_pred_single_step]]) 
-        scaled_window = np.vstack((scaled_window[1:], new_scaled_value_for_window))
-    return predicted_price_for_target_date_unscaled
+        return load_forecast_table(table_path)
+    except Exception:
+        return None
+
+def get_forecast_cache(emiten_key, backend=INFERENCE_BACKEND):
+    """
+    Cache jalur prediksi bersama untuk semua sesi (kunci: ticker, tanggal data terakhir, hash model, mode).
+    Satu cache per emiten di registry, karena setiap jalur menyimpan referensi ke modelnya.
+    """
+    return get_model_registry(backend).derived(emiten_key, "forecast_cache", ForecastCache)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_prediction_bands(ticker, last_date, model_hash, num_steps, num_samples, use_incremental, direct, _engine, _scaler, _close_values):
+    """
+    Persentil 5/50/95 Monte-Carlo dropout per langkah, di-cache per (ticker, data terakhir, model, horizon, N, mode).
+    direct=True: _engine adalah varian direct Dense(K) yang juga menghasilkan jalur prediksi, sehingga band sesuai jalurnya.
+    """
+    bands, _ = forecast_intervals_mc_dropout(_engine, _scaler, _close_values, num_steps, num_samples=num_samples,
+                                             window_size=WINDOW_SIZE, incremental=use_incremental, seed=0, direct=direct)
+    return bands
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_price_history_png(ticker, data_hash, forecast_hash, _close_series, _forecast_dates, _forecast_prices, _prediction_bands):
+    """PNG grafik matplotlib, di-cache per (ticker, hash data, hash prediksi) agar rerun lain tidak menggambar ulang."""
+    return figure_to_png(plot_price_history(_close_series, ticker, _forecast_dates, _forecast_prices, _prediction_bands,
+                                            max_points=CHART_MAX_POINTS))
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_price_history_frame(ticker, data_hash, forecast_hash, _close_series, _forecast_dates, _forecast_prices, _prediction_bands):
+    """Data grafik native (sudah diperkecil dengan LTTB), di-cache per (ticker, hash data, hash prediksi)."""
+    return price_history_frame(_close_series, _forecast_dates, _forecast_prices, _prediction_bands, max_points=CHART_MAX_POINTS)
+
+def render_price_history_chart(close_series, ticker, forecast_dates=None, forecast_prices=None, prediction_bands=None):
+    """Menampilkan grafik harga dengan backend CHART_BACKEND; kunci cache dihitung dari isi data, bukan objeknya."""
+    data_hash = data_fingerprint(close_series)
+    forecast_hash = data_fingerprint(forecast_dates, forecast_prices, prediction_bands)
+    if CHART_BACKEND == "matplotlib":
+        st.image(render_price_history_png(ticker, data_hash, forecast_hash, close_series, forecast_dates, forecast_prices, prediction_bands),
+                 use_column_width=True)
+    else:
+        chart_df = build_price_history_frame(ticker, data_hash, forecast_hash, close_series, forecast_dates, forecast_prices, prediction_bands)
+        st.altair_chart(price_history_altair(chart_df, ticker), use_container_width=True)
+
+@st.cache_resource
+def get_price_store(store_dir):
+    """Penyimpanan harga lokal yang dipakai bersama oleh semua sesi."""
+    return PriceStore(store_dir)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def refresh_price_store(ticker, start_date, end_date):
+    """Mengunduh bar baru dari Yahoo Finance paling banyak sekali per jam untuk ticker dan rentang yang sama."""
+    return get_price_store(PRICE_STORE_DIR_PATH).update(ticker, end=end_date, initial_start=start_date)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def refresh_all_price_stores(tickers, start_date, end_date):
+    """Memperbarui data beberapa ticker secara paralel. Mengembalikan pesan error per ticker yang gagal."""
+    price_store = get_price_store(PRICE_STORE_DIR_PATH)
+    with ThreadPoolExecutor(max_workers=len(tickers)) as executor:
+        futures = {ticker: executor.submit(price_store.update, ticker, end=end_date, initial_start=start_date) for ticker in tickers}
+    errors = {}
+    for ticker, future in futures.items():
+        if future.exception() is not None:
+            errors[ticker] = str(future.exception())
+    return errors
+
+def render_all_emiten_overview(use_incremental):
+    """Ringkasan prediksi semua emiten: data diperbarui paralel dan rollout kelima model dijalankan bersamaan."""
+    st.subheader("Ringkasan Prediksi Semua Emiten")
+    emiten_keys = tuple(emiten_dict.keys())
+    tickers = tuple(emiten_dict[key]["ticker"] for key in emiten_keys)
+
+    today_date = datetime.date.today()
+    start_date_download = today_date - datetime.timedelta(days=max(365, WINDOW_SIZE + 100))
+    with stage_timer.span("price_refresh", ticker="ALL"):
+        refresh_errors = refresh_all_price_stores(tickers, start_date_download, today_date)
+    for ticker, error_message in refresh_errors.items():
+        st.warning(f"Gagal memperbarui data {ticker} dari Yahoo Finance, menggunakan data lokal yang tersimpan: {error_message}")
+
+    price_store = get_price_store(PRICE_STORE_DIR_PATH)
+    with stage_timer.span("price_load", ticker="ALL"):
+        close_series = [price_store.get_close(ticker, start=start_date_download)['Close'] for ticker in tickers]
+    missing = [key for key, series in zip(emiten_keys, close_series) if len(series) < WINDOW_SIZE]
+    if missing:
+        st.error(f"❌ Data historis 'Close' untuk {', '.join(missing)} kurang dari `WINDOW_SIZE` ({WINDOW_SIZE}).")
+        return
+
+    last_dates = [series.index[-1].date() for series in close_series]
+    default_prediction_date = trading_calendar.next_session(max(last_dates))
+    target_prediction_date = st.date_input(
+        "Pilih Tanggal Prediksi",
+        value=default_prediction_date,
+        min_value=default_prediction_date,
+        key="overview_target_date",
+        help="Tanggal prediksi yang sama untuk semua emiten. Akhir pekan dan hari libur BEI tidak dihitung sebagai langkah prediksi."
+    )
+    steps_per_emiten = [trading_calendar.trading_steps_between(last_date, target_prediction_date) for last_date in last_dates]
+    max_steps = max(steps_per_emiten)
+    if max_steps < 1:
+        st.warning("Tidak ada sesi perdagangan BEI antara data terakhir dan tanggal prediksi.")
+        return
+
+    forecast_paths = None
+    forecast_table = get_forecast_table()
+    if forecast_table is not None:
+        table_paths = [forecast_table.lookup(ticker, last_date, artifact_hash(emiten_dict[key]["model_file"]), INFERENCE_BACKEND, use_incremental, max_steps)
+                       for key, ticker, last_date in zip(emiten_keys, tickers, last_dates)]
+        if all(path is not None for path in table_paths):
+            forecast_paths = table_paths
+    if forecast_paths is None:
+        with stage_timer.span("model_load", ticker="ALL"):
+            group, scalers = load_emiten_group(emiten_keys)
+        with stage_timer.span("forecast", ticker="ALL", horizon=max_steps, incremental=use_incremental):
+            forecast_paths = forecast_paths_batched(group, scalers, [series.values for series in close_series],
+                                                    max_steps, window_size=WINDOW_SIZE, incremental=use_incremental)
+
+    summary_rows = []
+    for key, series, last_date, num_steps, path in zip(emiten_keys, close_series, last_dates, steps_per_emiten, forecast_paths):
+        last_price = float(series.iloc[-1])
+        predicted_price = float(path[num_steps - 1]) if num_steps > 0 else last_price
+        summary_rows.append({
+            "Emiten": key,
+            "Data Terakhir": last_date.strftime('%Y-%m-%d'),
+            "Harga Terakhir (Rp)": last_price,
+            "Prediksi (Rp)": predicted_price,
+            "Perubahan (%)": (predicted_price - last_price) / last_price * 100,
+        })
+    st.dataframe(pd.DataFrame(summary_rows).set_index("Emiten").style.format("{:,.2f}", subset=["Harga Terakhir (Rp)", "Prediksi (Rp)", "Perubahan (%)"]))
+
+    try:
+        with stage_timer.span("chart_render", ticker="ALL"):
+            sns.set_style("whitegrid")
+            fig, ax = plt.subplots(figsize=(10, 6))
+            palette = sns.color_palette(n_colors=len(emiten_keys))
+            for color, key, series, last_date, num_steps, path in zip(palette, emiten_keys, close_series, last_dates, steps_per_emiten, forecast_paths):
+                recent = series.iloc[-60:]
+                last_price = float(series.iloc[-1])
+                ax.plot(recent.index, (recent.values / last_price - 1) * 100, color=color, linewidth=1.5, label=key)
+                if num_steps > 0:
+                    forecast_dates = trading_calendar.session_dates(last_date, num_steps)
+                    ax.plot(forecast_dates, (path[:num_steps] / last_price - 1) * 100, color=color, linewidth=1.5, linestyle='--')
+            ax.axhline(0, color='grey', linewidth=0.8)
+            ax.set_title("Perubahan Harga Relatif terhadap Harga Terakhir (garis putus-putus = prediksi)", fontsize=15)
+            ax.set_xlabel("Tanggal", fontsize=12)
+            ax.set_ylabel("Perubahan (%)", fontsize=12)
+            ax.legend()
+            fig.autofmt_xdate()
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close(fig)
+    except Exception as e_sns:
+        st.warning(f"Tidak dapat menampilkan grafik perbandingan: {e_sns}")
+        st.text(traceback.format_exc())
 
 
 # --- KONTEN HALAMAN UTAMA (DASHBOARD PREDIKSI) ---
 
+# Dipanggil sedini mungkin agar preload model di latar belakang berjalan sejak server dimulai
+model_registry = get_model_registry()
+
 st.header("📈 Aplikasi Prediksi Harga Penutupan Harian 5 Emiten Saham Blue Chip") 
 st.markdown(f"Prediksi model ini dianggap Akurat dengan nilai rata-rata Mean Absolute Percentage Error tiap-tiap emiten ialah 2.14%") 
 st.markdown(f"Prediksi harga penutupan saham untuk emiten yang terdaftar. Menggunakan data historis dengan window **{WINDOW_SIZE}** hari.")
 
 # Menampilkan informasi versi library di sidebar
 try:
-    import tensorflow as tf
-    st.sidebar.info(f"Versi TensorFlow: {tf.__version__}")
+    st.sidebar.info(f"Backend Inferensi: {INFERENCE_BACKEND}")
+    if "tensorflow" in sys.modules:
+        st.sidebar.info(f"Versi TensorFlow: {sys.modules['tensorflow'].__version__}")
     st.sidebar.info(f"Versi NumPy: {np.__version__}")
     st.sidebar.info(f"Versi Pandas: {pd.__version__}")
     st.sidebar.info(f"Versi yfinance: {yf.__version__}")
@@ -102,6 +343,18 @@ except ImportError as ie:
 except AttributeError: 
     st.sidebar.warning("Versi library tertentu belum bisa ditampilkan.")
 
+with st.sidebar.expander("Status Model"):
+    registry_stats = model_registry.stats()
+    if registry_stats:
+        st.dataframe(pd.DataFrame([
+            {"Emiten": key, "Muat (s)": values["load_s"], "Warm-up (s)": values["warmup_s"],
+             "Bobot (MB)": values["bytes"] / 1024 / 1024, "Residen": values["resident"]}
+            for key, values in registry_stats.items()
+        ]).set_index("Emiten"))
+        st.caption(f"Memori terpakai: {model_registry.resident_bytes() / 1024 / 1024:.1f} MB dari budget {MODEL_MEMORY_BUDGET_MB:.0f} MB")
+    else:
+        st.caption("Model sedang dimuat di latar belakang...")
+
 # Menampilkan pesan warning jika logo tidak ditemukan (setelah st.set_page_config)
 if isinstance(page_icon_to_use, str): 
     if page_icon_to_use == "📈":
@@ -110,6 +363,51 @@ if isinstance(page_icon_to_use, str):
         st.sidebar.error(f"Terjadi error saat mencoba memuat logo ('{LOGO_IMAGE_PATH}').")
 
 
+prediction_mode = st.sidebar.radio(
+    "Mode Prediksi",
+    options=["Rekursif (window penuh)", "Inkremental (stateful)"],
+    help="Mode inkremental memanaskan state LSTM sekali pada window terakhir lalu maju satu langkah per hari, sehingga jauh lebih cepat untuk horizon panjang."
+)
+
+show_prediction_bands = st.sidebar.checkbox(
+    "Interval Prediksi (MC Dropout)",
+    help="Menjalankan N forward pass dengan dropout aktif dalam satu batch per langkah untuk menampilkan rentang persentil 5-95%."
+)
+mc_num_samples = st.sidebar.slider("Jumlah Sampel MC", min_value=20, max_value=200, value=100, step=10, disabled=not show_prediction_bands)
+
+history_years = st.sidebar.selectbox(
+    "Rentang Data Historis",
+    options=[1, 3, 5, 10],
+    format_func=lambda years: f"{years} Tahun",
+    help="Rentang harga yang diunduh dan ditampilkan pada grafik per emiten. Riwayat panjang diperkecil sebelum digambar."
+)
+
+view_mode = st.sidebar.radio(
+    "Tampilan",
+    options=["Per Emiten", "Semua Emiten"],
+    help="'Semua Emiten' memprediksi kelima emiten sekaligus dalam satu rollout ber-batch dan menampilkan tabel serta grafik perbandingan."
+)
+
+show_stage_timing = st.sidebar.checkbox(
+    "Debug: Waktu per Tahap",
+    value=False,
+    help="Mengukur durasi tiap tahap (unduh data, muat model, prediksi, grafik) pada rerun ini dan menampilkan histogram lintas sesi."
+)
+stage_timer = get_stage_timer()
+stage_timer.begin_rerun(show_stage_timing or STAGE_TIMING_RECORD, view=view_mode)
+
+if view_mode == "Semua Emiten":
+    try:
+        render_all_emiten_overview(prediction_mode.startswith("Inkremental"))
+    except FileNotFoundError as fnf_error:
+        st.error(f"❌ FILE TIDAK DITEMUKAN. Pastikan folder `ARTIFACTS_DIR_NAME` ('{ARTIFACTS_DIR_NAME}') berisi model dan scaler semua emiten: {fnf_error}")
+    except Exception as e:
+        st.error(f"❌ Terjadi kesalahan yang tidak terduga pada aplikasi: {e}")
+        st.text("LOKASI ERROR (TRACEBACK LENGKAP):")
+        st.text(traceback.format_exc())
+    render_stage_timing_panel()
+    st.stop()
+
 selected_emiten_key = st.selectbox("Pilih Emiten", list(emiten_dict.keys()))
 
 if selected_emiten_key:
@@ -121,13 +419,20 @@ if selected_emiten_key:
     st.subheader(f"Analisis Untuk {selected_emiten_key}")
 
     try:
-        model, scaler = load_prediction_assets(model_file_path, scaler_file_path)
+        with stage_timer.span("model_load", ticker=stock_ticker_symbol):
+            model, scaler = model_registry.get(selected_emiten_key)
         st.success(f"Model dan Scaler untuk {selected_emiten_key} berhasil dimuat.")
 
         today_date = datetime.date.today()
-        start_date_download = today_date - datetime.timedelta(days=max(365, WINDOW_SIZE + 100)) 
+        start_date_download = today_date - datetime.timedelta(days=max(365 * history_years, WINDOW_SIZE + 100)) 
 
-        historical_data_df = yf.download(stock_ticker_symbol, start=start_date_download, end=today_date, progress=False)
+        try:
+            with stage_timer.span("price_refresh", ticker=stock_ticker_symbol):
+                refresh_price_store(stock_ticker_symbol, start_date_download, today_date)
+        except Exception as e_fetch:
+            st.warning(f"Gagal memperbarui data dari Yahoo Finance, menggunakan data lokal yang tersimpan: {e_fetch}")
+        with stage_timer.span("price_load", ticker=stock_ticker_symbol):
+            historical_data_df = get_price_store(PRICE_STORE_DIR_PATH).load(stock_ticker_symbol, start=start_date_download)
         
         if historical_data_df.empty:
             st.error(f"❌ Data tidak tersedia dari Yahoo Finance untuk {stock_ticker_symbol} pada rentang tanggal yang diminta.")
@@ -155,71 +460,102 @@ if selected_emiten_key:
             st.subheader("Data Historis Mentah 5 Baris Terakhir")
             st.dataframe(historical_data_df.tail())
 
-            df_close_column = None 
-            if 'Close' in historical_data_df.columns:
-                df_close_column = historical_data_df[['Close']].astype(float).dropna()
-            elif isinstance(historical_data_df.columns, pd.MultiIndex) and ('Close', stock_ticker_symbol) in historical_data_df.columns:
-                series_close_price = historical_data_df[('Close', stock_ticker_symbol)]
-                df_close_column = series_close_price.to_frame(name='Close').astype(float).dropna()
-            else:
+            with stage_timer.span("close_extraction", ticker=stock_ticker_symbol):
+                df_close_column = extract_close_column(historical_data_df, stock_ticker_symbol)
+            if df_close_column is None:
                 st.error(f"❌ Kolom 'Close' tidak ditemukan dalam data yang diunduh untuk {stock_ticker_symbol}.")
                 st.write("Kolom yang tersedia:", historical_data_df.columns)
+                render_stage_timing_panel()
                 st.stop()
             
             if df_close_column is not None and not df_close_column.empty:
                 last_available_data_date = df_close_column.index[-1].date()
                 
-                default_prediction_date = last_available_data_date + datetime.timedelta(days=1)
+                default_prediction_date = trading_calendar.next_session(last_available_data_date)
                 target_prediction_date = st.date_input(
                     "Pilih Tanggal Prediksi",
                     value=default_prediction_date,
                     min_value=default_prediction_date, 
-                    help=f"Pilih tanggal di masa depan (setelah {last_available_data_date.strftime('%Y-%m-%d')}) untuk prediksi harga penutupan."
+                    help=f"Pilih tanggal di masa depan (setelah {last_available_data_date.strftime('%Y-%m-%d')}) untuk prediksi harga penutupan. Akhir pekan dan hari libur BEI tidak dihitung sebagai langkah prediksi."
                 )
 
                 if len(df_close_column) >= WINDOW_SIZE:
+                    num_steps_to_predict = trading_calendar.trading_steps_between(last_available_data_date, target_prediction_date)
+
+                    forecast_prices = None
+                    forecast_dates = None
+                    prediction_bands = None
+                    if num_steps_to_predict > 0:
+                        close_values_for_prediction_base = df_close_column.values
+                        use_incremental = prediction_mode.startswith("Inkremental")
+                        forecast_model = load_incremental_engine(selected_emiten_key, model_file_path, model) if use_incremental else model
+                        forecast_key = (stock_ticker_symbol, last_available_data_date, artifact_hash(model_file_path), INFERENCE_BACKEND, use_incremental)
+                        forecast_table = get_forecast_table()
+                        # Untuk horizon <= K, varian direct Dense(K) memprediksi seluruh jalur dalam satu inferensi
+                        direct_steps, direct_variant = select_direct_variant(emiten_info, num_steps_to_predict)
+                        # Band MC dropout dihitung dari model yang sama dengan jalur prediksi yang ditampilkan
+                        band_key, band_model_file, band_model, band_scaler = selected_emiten_key, model_file_path, model, scaler
+                        if direct_variant is not None:
+                            direct_key = f"{selected_emiten_key}{direct_variant_suffix(direct_steps)}"
+                            direct_model, direct_scaler = model_registry.get(
+                                direct_key, direct_variant["model_file"], direct_variant["scaler_file"])
+                            with stage_timer.span("forecast", ticker=stock_ticker_symbol, horizon=num_steps_to_predict, variant=f"direct{direct_steps}"):
+                                forecast_prices = predict_direct_path(direct_model, direct_scaler, close_values_for_prediction_base,
+                                                                      num_steps_to_predict, window_size=WINDOW_SIZE)
+                            st.caption(f"Prediksi {num_steps_to_predict} sesi dihitung sekaligus dengan model direct {direct_steps} hari (satu inferensi).")
+                            band_key, band_model_file, band_model, band_scaler = direct_key, direct_variant["model_file"], direct_model, direct_scaler
+                        elif forecast_table is not None:
+                            with stage_timer.span("forecast_table_lookup", ticker=stock_ticker_symbol, horizon=num_steps_to_predict):
+                                forecast_prices = forecast_table.lookup(*forecast_key, num_steps_to_predict)
+                            if forecast_prices is not None:
+                                st.caption(f"Prediksi diambil dari tabel prediksi akhir hari (dibuat {forecast_table.metadata.get('generated_at', '-')}).")
+                        if forecast_prices is None:
+                            trajectory = get_forecast_cache(selected_emiten_key).get(
+                                forecast_key,
+                                lambda: ForecastTrajectory(forecast_model, scaler, close_values_for_prediction_base,
+                                                           window_size=WINDOW_SIZE, incremental=use_incremental)
+                            )
+                            # Horizon yang lebih pendek hanya memotong jalur tersimpan, yang lebih panjang melanjutkannya
+                            with stage_timer.span("forecast", ticker=stock_ticker_symbol, horizon=num_steps_to_predict, incremental=use_incremental):
+                                forecast_prices = trajectory.prices(num_steps_to_predict)
+                        forecast_dates = trading_calendar.session_dates(last_available_data_date, num_steps_to_predict)
+
+                        if show_prediction_bands:
+                            with stage_timer.span("prediction_bands", ticker=stock_ticker_symbol, horizon=num_steps_to_predict, samples=mc_num_samples):
+                                prediction_bands = compute_prediction_bands(
+                                    stock_ticker_symbol, last_available_data_date, artifact_hash(band_model_file),
+                                    num_steps_to_predict, mc_num_samples, use_incremental, direct_variant is not None,
+                                    load_incremental_engine(band_key, band_model_file, band_model), band_scaler, close_values_for_prediction_base
+                                )
+
                     st.subheader(f"Grafik Harga Penutupan Historis {selected_emiten_key}")
+                    show_forecast_path = st.checkbox("Tampilkan jalur prediksi pada grafik", value=True)
                     
                     if not df_close_column.empty and 'Close' in df_close_column.columns:
                         try:
-                            sns.set_style("whitegrid") 
-                            fig, ax = plt.subplots(figsize=(10, 6)) 
-                            sns.lineplot(
-                                data=df_close_column['Close'], 
-                                ax=ax, 
-                                linewidth=1.5, 
-                                color='mediumseagreen'
-                            )
-                            ax.set_title(f"Harga Penutupan Historis {stock_ticker_symbol}", fontsize=15)
-                            ax.set_xlabel("Tanggal", fontsize=12)
-                            ax.set_ylabel("Harga Close (Rp)", fontsize=12)
-                            handles, labels = ax.get_legend_handles_labels()
-                            if handles: 
-                                ax.legend() 
-                            fig.autofmt_xdate() 
-                            plt.tight_layout() 
-                            st.pyplot(fig)
-                            plt.close(fig) 
+                            with stage_timer.span("chart_render", ticker=stock_ticker_symbol, points=len(df_close_column), backend=CHART_BACKEND):
+                                render_price_history_chart(
+                                    df_close_column['Close'], stock_ticker_symbol,
+                                    forecast_dates=forecast_dates if show_forecast_path else None,
+                                    forecast_prices=forecast_prices if show_forecast_path else None,
+                                    prediction_bands=prediction_bands if show_forecast_path else None,
+                                )
                         except Exception as e_sns:
-                            st.warning(f"Tidak dapat menampilkan grafik Seaborn: {e_sns}")
+                            st.warning(f"Tidak dapat menampilkan grafik harga: {e_sns}")
                             st.text(traceback.format_exc())
                     else:
                         st.warning("Tidak dapat menampilkan grafik karena data 'Close' tidak valid atau kosong setelah diproses.")
 
-                    num_steps_to_predict = (target_prediction_date - last_available_data_date).days
-
                     if num_steps_to_predict > 0:
-                        close_values_for_prediction_base = df_close_column.values
-                        predicted_price = predict_future_price(model, scaler, 
-                                                              close_values_for_prediction_base, 
-                                                              num_steps_to_predict, 
-                                                              window_size=WINDOW_SIZE)
-
-                        if predicted_price is not None:
-                            st.success(f"📊 Prediksi harga penutupan untuk {selected_emiten_key} pada tanggal **{target_prediction_date.strftime('%Y-%m-%d')}**: **Rp {predicted_price:,.2f}**")
-                        else:
-                            st.warning(f"⚠️ Prediksi tidak dapat dibuat.")
-                    elif num_steps_to_predict == 0: 
+                        predicted_price = forecast_prices[-1]
+                        if not trading_calendar.is_trading_day(target_prediction_date):
+                            st.info(f"Tanggal {target_prediction_date.strftime('%Y-%m-%d')} bukan hari perdagangan BEI. Prediksi menggunakan sesi terakhir sebelumnya ({forecast_dates[-1].strftime('%Y-%m-%d')}), {num_steps_to_predict} sesi setelah data terakhir.")
+                        st.success(f"📊 Prediksi harga penutupan untuk {selected_emiten_key} pada tanggal **{target_prediction_date.strftime('%Y-%m-%d')}**: **Rp {predicted_price:,.2f}**")
+                        if prediction_bands is not None:
+                            st.info(f"Interval prediksi 5-95% (MC Dropout{f' model direct {direct_steps} hari' if direct_variant is not None else ''}, {mc_num_samples} sampel): **Rp {prediction_bands[5][-1]:,.2f}** - **Rp {prediction_bands[95][-1]:,.2f}** (median Rp {prediction_bands[50][-1]:,.2f})")
+                    elif target_prediction_date > last_available_data_date:
+                        st.warning("Tidak ada sesi perdagangan BEI (akhir pekan/hari libur bursa) antara data terakhir dan tanggal prediksi. Pilih tanggal sesi berikutnya.")
+                    elif target_prediction_date == last_available_data_date: 
                         st.warning("Tanggal prediksi adalah tanggal data terakhir. Tidak ada prediksi ke depan.")
                     else: 
                         st.error("Tanggal prediksi yang dipilih adalah sebelum data historis terakhir.")
@@ -242,3 +578,4 @@ if selected_emiten_key:
 else:
     st.info("Silakan pilih emiten untuk memulai prediksi.")
 
+render_stage_timing_panel()
@@ -5,6 +5,7 @@ import datetime
 import gspread
 from google.oauth2.service_account import Credentials
 import traceback
+from feedback_sink import FeedbackSink, FeedbackSpool, GSheetBackend
 
 # --- KONFIGURASI HALAMAN ---
 try:
@@ -20,46 +21,46 @@ st.set_page_config(
     layout="centered" # Menggunakan layout 'centered' agar form terlihat lebih fokus
 )
 
+# --- KONFIGURASI PENYIMPANAN MASUKAN ---
+# --- GANTI DENGAN NAMA GOOGLE SHEET DAN WORKSHEET ANDA ---
+nama_google_sheet = "Data Masukan Aplikasi Saham"
+nama_worksheet = "Sheet1" # Biasanya nama tab default
+# Spool lokal tempat masukan disimpan sebelum dikirim ke Google Sheets
+FEEDBACK_SPOOL_PATH = os.environ.get(
+    "FEEDBACK_SPOOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feedback_spool.sqlite3"))
+
 # --- FUNGSI UNTUK KONEKSI GOOGLE SHEETS ---
 
-# Menggunakan cache_resource agar koneksi tidak dibuat ulang setiap kali ada interaksi
+def create_gspread_client(service_account_info):
+    """Membuat klien gspread dari kredensial service account (melempar exception jika gagal)."""
+    creds = Credentials.from_service_account_info(
+        service_account_info,
+        scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"],
+    )
+    return gspread.authorize(creds)
+
+# Menggunakan cache_resource agar spool, koneksi, dan thread pengirim tidak dibuat ulang setiap kali ada interaksi
 @st.cache_resource
-def get_gspread_client():
-    """Membuat koneksi ke Google Sheets menggunakan kredensial dari Streamlit Secrets."""
+def get_feedback_sink():
+    """
+    Menyiapkan spool lokal dan thread latar belakang yang mengirim masukan ke Google Sheets.
+    Kredensial diambil dari Streamlit Secrets; jika belum tersedia, masukan tetap tersimpan di spool
+    dan dikirim setelah koneksi berhasil.
+    """
     try:
-        # Mengambil kredensial dari st.secrets
         # Pastikan Anda sudah membuat file .streamlit/secrets.toml
-        creds = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"],
-        )
-        client = gspread.authorize(creds)
-        return client
-    except Exception as e:
-        # Menampilkan pesan error yang lebih informatif jika koneksi gagal
-        st.error(f"Gagal terhubung ke Google Sheets.")
-        st.warning("Pastikan Anda sudah mengikuti panduan untuk mengatur file '.streamlit/secrets.toml' dengan benar.")
-        st.code(f"Detail Error: {e}\n{traceback.format_exc()}")
-        return None
-
-def save_feedback_to_gsheet(client, sheet_name, worksheet_name, data_row):
-    """Menyimpan satu baris data ke worksheet di Google Sheet."""
-    if client is None:
-        return False, "Koneksi Google Sheets tidak tersedia."
-    try:
-        # Buka spreadsheet berdasarkan nama
-        spreadsheet = client.open(sheet_name)
-        # Buka worksheet (tab) berdasarkan nama
-        worksheet = spreadsheet.worksheet(worksheet_name)
-        # Tambahkan baris baru di paling bawah
-        worksheet.append_row(data_row, value_input_option='USER_ENTERED')
-        return True, "Data berhasil disimpan."
-    except gspread.exceptions.SpreadsheetNotFound:
-        return False, f"Spreadsheet dengan nama '{sheet_name}' tidak ditemukan di akun Google Anda."
-    except gspread.exceptions.WorksheetNotFound:
-        return False, f"Worksheet dengan nama '{worksheet_name}' tidak ditemukan di dalam spreadsheet '{sheet_name}'."
+        service_account_info = dict(st.secrets["gcp_service_account"])
     except Exception as e:
-        return False, f"Terjadi error saat menyimpan ke Google Sheet: {e}"
+        service_account_info = None
+        secrets_error = e
+
+    def client_factory():
+        if service_account_info is None:
+            raise RuntimeError(f"Kredensial Google Sheets tidak tersedia: {secrets_error}")
+        return create_gspread_client(service_account_info)
+
+    backend = GSheetBackend(client_factory, nama_google_sheet, nama_worksheet)
+    return FeedbackSink(FeedbackSpool(FEEDBACK_SPOOL_PATH), backend).start()
 
 # --- KONTEN HALAMAN ---
 
@@ -105,21 +106,14 @@ if submitted:
         rating_value = len(rating) # Mengambil jumlah bintang sebagai nilai rating
         data_to_save = [timestamp, nama_pengguna if nama_pengguna else 'Anonim', rating_value, masukan_pengguna]
 
-        # Inisialisasi koneksi dan simpan data
-        gspread_client = get_gspread_client()
-        
-        # --- GANTI DENGAN NAMA GOOGLE SHEET DAN WORKSHEET ANDA ---
-        nama_google_sheet = "Data Masukan Aplikasi Saham" 
-        nama_worksheet = "Sheet1" # Biasanya nama tab default
-
-        # Kirim data ke Google Sheets
-        success, message = save_feedback_to_gsheet(gspread_client, nama_google_sheet, nama_worksheet, data_to_save)
-
-        if success:
+        # Simpan ke spool lokal; pengiriman ke Google Sheets berjalan di latar belakang
+        try:
+            get_feedback_sink().submit(data_to_save)
             st.success("✅ Terima kasih! Masukan Anda telah berhasil disimpan.")
             st.balloons()
-        else:
-            st.error(f"❌ Gagal menyimpan masukan. {message}")
+        except Exception as e:
+            st.error(f"❌ Gagal menyimpan masukan. Terjadi error saat menyimpan masukan: {e}")
+            st.code(traceback.format_exc())
 
     else:
         # Menampilkan pesan error jika kotak masukan kosong
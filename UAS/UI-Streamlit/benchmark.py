@@ -0,0 +1,209 @@
+"""
+Benchmark jalur-jalur yang menentukan lama pengguna menunggu di dashboard.
+
+Berjalan offline: harga sintetis (random walk dengan seed tetap) dan artefak model bawaan di UAS/Model.
+Hasil (median, p90, min dalam milidetik) ditulis sebagai JSON dan dibandingkan dengan baseline tersimpan;
+benchmark yang median-nya naik melebihi --threshold dianggap regresi (exit code 1).
+
+Contoh:
+    python benchmark.py                       # bandingkan dengan benchmark_baseline.json
+    python benchmark.py --update-baseline     # simpan hasil sebagai baseline baru
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from charts import data_fingerprint, figure_to_png, plot_price_history, price_history_altair, price_history_frame  # noqa: E402
+from forecasting import WINDOW_SIZE, predict_future_price, predict_future_price_incremental  # noqa: E402
+from model_registry import ModelRegistry, load_prediction_assets  # noqa: E402
+from price_store import OHLCV_COLUMNS, extract_close_column  # noqa: E402
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_DIR = os.path.join(SCRIPT_DIR, "..", "Model")
+DEFAULT_BASELINE_PATH = os.path.join(SCRIPT_DIR, "benchmark_baseline.json")
+TICKERS = ["BBCA.JK", "BBRI.JK", "TLKM.JK", "BMRI.JK", "ASII.JK"]
+HORIZONS = (1, 5, 20, 60)
+
+
+def synthetic_ohlcv(num_days, ticker="BBCA.JK", seed=0, multiindex=False, nan_fraction=0.01):
+    """Data OHLCV hari kerja berbentuk seperti hasil yf.download, termasuk sebagian kecil NaN."""
+    rng = np.random.default_rng(seed)
+    close = 9000 * np.exp(np.cumsum(rng.normal(0, 0.015, num_days)))
+    index = pd.bdate_range(end="2024-05-31", periods=num_days, name="Date")
+    df = pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, num_days)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1e6, 1e8, num_days).astype(float),
+    }, index=index)[OHLCV_COLUMNS]
+    df.loc[rng.random(num_days) < nan_fraction, "Close"] = np.nan
+    if multiindex:
+        df.columns = pd.MultiIndex.from_product([df.columns, [ticker]], names=["Price", "Ticker"])
+    return df
+
+
+def measure(fn, repeat, warmup=1):
+    """Waktu eksekusi fn (ms): median, p90, dan min dari `repeat` pengulangan setelah `warmup`."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p90_ms": samples[min(len(samples) - 1, int(0.9 * len(samples)))],
+        "min_ms": samples[0],
+        "repeat": repeat,
+    }
+
+
+def bench_load(model_dir, backend, repeat):
+    model_paths = {t: (os.path.join(model_dir, f"{t}_model.keras"), os.path.join(model_dir, f"{t}_scaler.joblib"))
+                   for t in TICKERS}
+    results = {}
+    # Cold: membaca ulang model dan scaler dari file setiap kali (tanpa cache)
+    results[f"load_cold[{backend}]"] = measure(
+        lambda: load_prediction_assets(*model_paths["BBCA.JK"], backend=backend), repeat, warmup=0)
+    # Warm: model sudah dimuat dan dipanaskan oleh registry (seperti cache_resource di dashboard)
+    registry = ModelRegistry(lambda m, s: load_prediction_assets(m, s, backend), window_size=WINDOW_SIZE)
+    registry.preload(model_paths)
+    for ticker in TICKERS:
+        registry.get(ticker)
+    results[f"load_warm[{backend}]"] = measure(lambda: registry.get("BBCA.JK"), repeat * 100)
+    return results, registry.get("BBCA.JK")
+
+
+def bench_predict(model, scaler, close_values, repeat):
+    results = {}
+    for horizon in HORIZONS:
+        results[f"predict_future_price[h={horizon}]"] = measure(
+            lambda: predict_future_price(model, scaler, close_values, horizon, WINDOW_SIZE), repeat)
+        if hasattr(model, "step"):
+            results[f"predict_future_price_incremental[h={horizon}]"] = measure(
+                lambda: predict_future_price_incremental(model, scaler, close_values, horizon, WINDOW_SIZE), repeat)
+    return results
+
+
+def bench_close_extraction(repeat):
+    results = {}
+    for num_days in (260, 1300):
+        for multiindex in (False, True):
+            df = synthetic_ohlcv(num_days, multiindex=multiindex)
+            label = "multiindex" if multiindex else "flat"
+            results[f"close_extraction[{label},n={num_days}]"] = measure(
+                lambda: extract_close_column(df, "BBCA.JK"), repeat * 10)
+    return results
+
+
+def bench_chart(repeat):
+    results = {}
+    # 1, 5, dan 10 tahun hari bursa; riwayat diperkecil ke DEFAULT_MAX_POINTS titik sebelum digambar
+    for num_days in (260, 1300, 2600):
+        close_series = extract_close_column(synthetic_ohlcv(num_days), "BBCA.JK")['Close']
+        forecast_dates = pd.bdate_range(close_series.index[-1], periods=21)[1:]
+        forecast_prices = np.full(20, close_series.iloc[-1])
+
+        def render_matplotlib():
+            # Sama dengan st.pyplot: figure disimpan sebagai PNG sebelum dikirim ke browser
+            return len(figure_to_png(plot_price_history(close_series, "BBCA.JK", forecast_dates, forecast_prices)))
+
+        def render_altair():
+            # Spesifikasi Vega-Lite beserta datanya adalah yang dikirim ke browser
+            chart_df = price_history_frame(close_series, forecast_dates, forecast_prices)
+            return len(price_history_altair(chart_df, "BBCA.JK").to_json(indent=None))
+
+        results[f"chart_render[matplotlib,n={num_days}]"] = dict(measure(render_matplotlib, repeat), payload_bytes=render_matplotlib())
+        results[f"chart_render[altair,n={num_days}]"] = dict(measure(render_altair, repeat), payload_bytes=render_altair())
+        # Rerun dengan data yang sama hanya menghitung kunci cache
+        results[f"chart_cache_key[n={num_days}]"] = measure(
+            lambda: data_fingerprint(close_series) + data_fingerprint(forecast_dates, forecast_prices, None), repeat * 10)
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold, min_delta_ms=1.0):
+    """
+    [(nama, median baseline, median sekarang, rasio)] untuk benchmark yang melambat melebihi threshold.
+    Kenaikan absolut di bawah min_delta_ms diabaikan agar benchmark sub-milidetik tidak memicu alarm palsu.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or current["median_ms"] - previous["median_ms"] < min_delta_ms:
+            continue
+        ratio = current["median_ms"] / max(previous["median_ms"], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["median_ms"], current["median_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark jalur utama dashboard dengan baseline tersimpan.")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--backends", nargs="+", default=["numpy"], choices=["numpy", "keras", "tflite"])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Kenaikan median relatif yang dianggap regresi (0.25 = 25%%).")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Kenaikan median absolut minimum (ms) agar dihitung sebagai regresi.")
+    parser.add_argument("--output", default=None, help="Path JSON hasil benchmark (default: hanya dicetak).")
+    parser.add_argument("--update-baseline", action="store_true", help="Simpan hasil sebagai baseline baru.")
+    args = parser.parse_args(argv)
+
+    close_values = extract_close_column(synthetic_ohlcv(260), "BBCA.JK").values
+    results = {}
+    for backend in args.backends:
+        load_results, (model, scaler) = bench_load(args.model_dir, backend, args.repeat)
+        results.update(load_results)
+        results.update({f"{name}[{backend}]": value
+                        for name, value in bench_predict(model, scaler, close_values, args.repeat).items()})
+    results.update(bench_close_extraction(args.repeat))
+    results.update(bench_chart(args.repeat))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    for name, value in results.items():
+        print(f"{name:55s} median {value['median_ms']:10.3f} ms   p90 {value['p90_ms']:10.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline disimpan di {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nBaseline {args.baseline} belum ada; jalankan dengan --update-baseline.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.threshold, args.min_delta_ms)
+    if not regressions:
+        print(f"\nTidak ada regresi (threshold {args.threshold:.0%}).")
+        return 0
+    print(f"\nREGRESI (threshold {args.threshold:.0%}):")
+    for name, previous, current, ratio in regressions:
+        print(f"  {name}: {previous:.3f} ms -> {current:.3f} ms (x{ratio:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import hashlib
+import io
+
+import altair as alt
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+# --- GRAFIK HARGA ---
+# Fungsi menggambar grafik dipisahkan dari halaman Streamlit agar bisa dipakai ulang dan diukur (benchmark.py).
+# Riwayat panjang diperkecil dengan LTTB sebelum digambar: lebar grafik hanya ~1000 piksel, sehingga
+# ribuan titik tambahan tidak mengubah bentuk garis tetapi memperlambat render dan memperbesar data ke browser.
+
+# Jumlah titik historis maksimum yang digambar
+DEFAULT_MAX_POINTS = 800
+HISTORY_COLOR = 'mediumseagreen'
+FORECAST_COLOR = 'darkorange'
+
+
+def lttb_indices(x, y, num_out):
+    """
+    Indeks titik terpilih menurut Largest-Triangle-Three-Buckets: titik pertama dan terakhir dipertahankan,
+    sisanya dibagi ke num_out - 2 bucket dan dari tiap bucket dipilih titik yang membentuk segitiga terluas
+    dengan titik terpilih sebelumnya dan rata-rata bucket berikutnya (puncak dan lembah tetap terlihat).
+    """
+    n = len(y)
+    if num_out >= n or num_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, num_out - 1).astype(int)
+    indices = np.empty(num_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i in range(num_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample_series(series, max_points=DEFAULT_MAX_POINTS):
+    """Series harga dengan paling banyak max_points titik (LTTB); series pendek dikembalikan apa adanya."""
+    series = series.dropna()
+    if max_points is None or len(series) <= max_points:
+        return series
+    return series.iloc[lttb_indices(series.index.asi8, series.values, max_points)]
+
+
+def data_fingerprint(*items):
+    """Hash pendek isi series/array (termasuk indeks tanggal) untuk kunci cache grafik."""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        if item is None:
+            digest.update(b"none")
+        elif isinstance(item, dict):
+            digest.update(data_fingerprint(*(item[key] for key in sorted(item))).encode())
+        elif isinstance(item, pd.Series):
+            digest.update(data_fingerprint(item.index, item.values).encode())
+        elif isinstance(item, pd.DatetimeIndex):
+            digest.update(np.ascontiguousarray(item.asi8).tobytes())
+        else:
+            digest.update(np.ascontiguousarray(np.asarray(item, dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def plot_price_history(close_series, ticker, forecast_dates=None, forecast_prices=None, prediction_bands=None,
+                       max_points=DEFAULT_MAX_POINTS):
+    """
+    Grafik harga penutupan historis, jalur prediksi (garis putus-putus), dan interval 5-95% jika ada.
+    Mengembalikan figure matplotlib; pemanggil bertanggung jawab menampilkan dan menutupnya.
+    """
+    close_series = downsample_series(close_series, max_points)
+    with sns.axes_style("whitegrid"):
+        fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(close_series.index, close_series.values, linewidth=1.5, color=HISTORY_COLOR, label='Historis')
+    if forecast_prices is not None and prediction_bands is not None:
+        ax.fill_between(forecast_dates, prediction_bands[5], prediction_bands[95], color=FORECAST_COLOR, alpha=0.2, label='Interval 5-95%')
+    if forecast_prices is not None:
+        ax.plot(forecast_dates, forecast_prices, linewidth=1.5, linestyle='--', color=FORECAST_COLOR, label='Prediksi')
+    ax.set_title(f"Harga Penutupan Historis {ticker}", fontsize=15)
+    ax.set_xlabel("Tanggal", fontsize=12)
+    ax.set_ylabel("Harga Close (Rp)", fontsize=12)
+    handles, labels = ax.get_legend_handles_labels()
+    if handles:
+        ax.legend()
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return fig
+
+
+def figure_to_png(fig, dpi=200):
+    """PNG dari figure (opsi sama dengan st.pyplot) lalu figure ditutup; hasilnya bisa di-cache sebagai bytes."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def price_history_frame(close_series, forecast_dates=None, forecast_prices=None, prediction_bands=None,
+                        max_points=DEFAULT_MAX_POINTS):
+    """Data grafik dalam bentuk panjang (Tanggal, Harga, Seri, Bawah, Atas) untuk backend grafik native."""
+    history = downsample_series(close_series, max_points)
+    frames = [pd.DataFrame({"Tanggal": history.index, "Harga": history.values.astype(float).round(2), "Seri": "Historis"})]
+    if forecast_prices is not None:
+        forecast = pd.DataFrame({"Tanggal": pd.DatetimeIndex(forecast_dates), "Harga": np.asarray(forecast_prices, dtype=float).round(2),
+                                 "Seri": "Prediksi"})
+        if prediction_bands is not None:
+            forecast["Bawah"] = np.asarray(prediction_bands[5], dtype=float).round(2)
+            forecast["Atas"] = np.asarray(prediction_bands[95], dtype=float).round(2)
+        frames.append(forecast)
+    return pd.concat(frames, ignore_index=True)
+
+
+def price_history_altair(chart_df, ticker):
+    """Grafik Vega-Lite (digambar di browser) dari price_history_frame; hanya data titik yang dikirim."""
+    base = alt.Chart(chart_df).encode(x=alt.X("Tanggal:T", title="Tanggal"))
+    color = alt.Color("Seri:N", scale=alt.Scale(domain=["Historis", "Prediksi"], range=[HISTORY_COLOR, FORECAST_COLOR]),
+                      legend=alt.Legend(title=None, orient="top-left"))
+    lines = base.mark_line(strokeWidth=1.5).encode(
+        y=alt.Y("Harga:Q", title="Harga Close (Rp)", scale=alt.Scale(zero=False)),
+        color=color,
+        strokeDash=alt.StrokeDash("Seri:N", scale=alt.Scale(domain=["Historis", "Prediksi"], range=[[1, 0], [6, 4]]), legend=None),
+        tooltip=[alt.Tooltip("Tanggal:T"), alt.Tooltip("Harga:Q", format=",.2f"), "Seri:N"],
+    )
+    layers = [lines]
+    if "Atas" in chart_df.columns:
+        layers.insert(0, base.transform_filter(alt.datum.Seri == "Prediksi").mark_area(opacity=0.2, color=FORECAST_COLOR)
+                      .encode(y="Bawah:Q", y2="Atas:Q"))
+    return alt.layer(*layers).properties(title=f"Harga Penutupan Historis {ticker}", height=450)
@@ -0,0 +1,54 @@
+import glob
+import os
+import re
+
+# --- DAFTAR EMITEN ---
+# Dipakai bersama oleh dashboard Streamlit dan layanan prediksi headless (forecast_service.py).
+
+EMITEN_TICKERS = {
+    "BBCA": "BBCA.JK",
+    "BBRI": "BBRI.JK",
+    "TLKM": "TLKM.JK",
+    "BMRI": "BMRI.JK",
+    "ASII": "ASII.JK",
+}
+
+
+def direct_variant_suffix(output_steps):
+    """Akhiran nama artefak model direct multi-horizon, mis. BBCA.JK_direct20_model.keras."""
+    return f"_direct{output_steps}"
+
+
+def find_direct_variants(artifacts_dir, ticker):
+    """{K: {"model_file", "scaler_file"}} untuk setiap model direct Dense(K) milik ticker yang tersedia."""
+    variants = {}
+    for model_file in glob.glob(os.path.join(glob.escape(artifacts_dir), f"{glob.escape(ticker)}_direct*_model.keras")):
+        match = re.fullmatch(rf"{re.escape(ticker)}_direct(\d+)_model\.keras", os.path.basename(model_file))
+        scaler_file = model_file[:-len("_model.keras")] + "_scaler.joblib"
+        if match and os.path.exists(scaler_file):
+            variants[int(match.group(1))] = {"model_file": model_file, "scaler_file": scaler_file}
+    return dict(sorted(variants.items()))
+
+
+def select_direct_variant(emiten_info, num_steps):
+    """(K, varian) dengan K terkecil yang mencakup num_steps, atau (None, None) jika harus memakai model rekursif."""
+    for output_steps, variant in emiten_info.get("direct_variants", {}).items():
+        if output_steps >= num_steps:
+            return output_steps, variant
+    return None, None
+
+
+def build_emiten_dict(artifacts_dir):
+    """
+    {kunci emiten: {"ticker", "model_file", "scaler_file", "direct_variants"}} untuk folder artefak yang diberikan.
+    "direct_variants" berisi model direct multi-horizon (train_pipeline.py --direct-horizon K) jika ada.
+    """
+    return {
+        key: {
+            "ticker": ticker,
+            "model_file": os.path.join(artifacts_dir, f"{ticker}_model.keras"),
+            "scaler_file": os.path.join(artifacts_dir, f"{ticker}_scaler.joblib"),
+            "direct_variants": find_direct_variants(artifacts_dir, ticker),
+        }
+        for key, ticker in EMITEN_TICKERS.items()
+    }
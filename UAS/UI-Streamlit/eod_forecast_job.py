@@ -0,0 +1,108 @@
+"""
+Job akhir hari: memperbarui harga lalu menghitung prediksi semua emiten untuk horizon 1..N sesi bursa
+(mode rekursif dan inkremental) dan menuliskannya ke tabel prediksi berversi yang dibaca dashboard.
+
+Dijadwalkan setelah bursa tutup (bar harian BEI final setelah 16:15 WIB), misalnya dengan cron:
+    30 16 * * 1-5  cd /path/ke/UI-Streamlit && python eod_forecast_job.py
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import pandas as pd
+
+from emiten_config import build_emiten_dict
+from forecasting import WINDOW_SIZE, artifact_hash, forecast_paths_batched
+from forecast_table import write_forecast_table
+from idx_calendar import WIB, IDXCalendar
+from lstm_engine import LSTMStack, LSTMStackGroup
+from price_store import CsvFetcher, PriceStore
+from weight_store import load_shared_group
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACTS_DIR = os.path.join(SCRIPT_DIR, "streamlit_deployment_artifacts")
+DEFAULT_PRICE_STORE_DIR = os.path.join(SCRIPT_DIR, "price_data")
+DEFAULT_FORECAST_TABLE_DIR = os.path.join(SCRIPT_DIR, "forecast_table")
+
+
+def build_forecast_rows(emiten_dict, price_store, horizon, calendar, backend="numpy", history_days=365, today=None):
+    """DataFrame prediksi (satu baris per emiten x mode x horizon) dari data yang tersimpan di price_store."""
+    keys = list(emiten_dict)
+    start = (today or datetime.date.today()) - datetime.timedelta(days=history_days)
+    close_series = [price_store.get_close(emiten_dict[key]["ticker"], start=start)['Close'] for key in keys]
+    short = [key for key, series in zip(keys, close_series) if len(series) < WINDOW_SIZE]
+    if short:
+        raise ValueError(f"Data historis 'Close' untuk {', '.join(short)} kurang dari WINDOW_SIZE ({WINDOW_SIZE}).")
+
+    # Mesin NumPy ditumpuk menjadi satu grup sehingga setiap langkah hanya satu pemanggilan untuk kelima model
+    model_files = [emiten_dict[key]["model_file"] for key in keys]
+    group = load_shared_group(model_files) or LSTMStackGroup([LSTMStack.from_keras_archive(path) for path in model_files])
+    scalers = [joblib.load(emiten_dict[key]["scaler_file"]) for key in keys]
+    histories = [series.values for series in close_series]
+
+    frames = []
+    for incremental in (False, True):
+        paths = forecast_paths_batched(group, scalers, histories, horizon, window_size=WINDOW_SIZE, incremental=incremental)
+        for key, series, path in zip(keys, close_series, paths):
+            last_date = series.index[-1].date()
+            frames.append(pd.DataFrame({
+                "ticker": emiten_dict[key]["ticker"],
+                "last_date": pd.Timestamp(last_date),
+                "model_hash": artifact_hash(emiten_dict[key]["model_file"]),
+                "backend": backend,
+                "incremental": incremental,
+                "horizon": range(1, horizon + 1),
+                "target_date": calendar.session_dates(last_date, horizon),
+                "close": path.astype("float32"),
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Menghitung tabel prediksi akhir hari untuk semua emiten.")
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--price-store-dir", default=DEFAULT_PRICE_STORE_DIR)
+    parser.add_argument("--table-dir", default=DEFAULT_FORECAST_TABLE_DIR)
+    parser.add_argument("--horizon", type=int, default=60, help="Horizon maksimum (sesi bursa) yang disimpan.")
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--keep", type=int, default=7, help="Jumlah versi tabel yang disimpan.")
+    parser.add_argument("--skip-update", action="store_true", help="Lewati pembaruan harga dari Yahoo Finance.")
+    parser.add_argument("--csv-dir", default=None, help="Baca data dari <csv-dir>/<ticker>.csv alih-alih Yahoo Finance.")
+    parser.add_argument("--as-of", type=datetime.datetime.fromisoformat, default=None,
+                        help="Waktu acuan (ISO, WIB jika tanpa zona waktu); default sekarang.")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    as_of = args.as_of.replace(tzinfo=args.as_of.tzinfo or WIB) if args.as_of else datetime.datetime.now(WIB)
+    calendar = IDXCalendar()
+    # Bar sesi yang sudah ditutup ikut diunduh (`end` eksklusif), tetapi bar intraday hari ini tidak,
+    # sehingga tanggal bar terakhir di tabel sama dengan yang akan dimuat dashboard pada sesi berikutnya.
+    last_session = calendar.last_completed_session(as_of)
+    emiten_dict = build_emiten_dict(args.artifacts_dir)
+    price_store = PriceStore(args.price_store_dir, CsvFetcher(args.csv_dir) if args.csv_dir else None)
+    if not args.skip_update:
+        initial_start = last_session - datetime.timedelta(days=args.history_days)
+        end = last_session + datetime.timedelta(days=1)
+        with ThreadPoolExecutor(max_workers=len(emiten_dict)) as executor:
+            futures = {info["ticker"]: executor.submit(price_store.update, info["ticker"], end=end, initial_start=initial_start)
+                       for info in emiten_dict.values()}
+        for ticker, future in futures.items():
+            if future.exception() is not None:
+                print(f"Gagal memperbarui data {ticker}, menggunakan data lokal yang tersimpan: {future.exception()}")
+
+    # Tabel dihitung dengan mesin NumPy; cocok dengan dashboard yang memakai INFERENCE_BACKEND="numpy"
+    rows = build_forecast_rows(emiten_dict, price_store, args.horizon, calendar, "numpy", args.history_days, as_of.date())
+    path = write_forecast_table(args.table_dir, rows, metadata={"horizon": args.horizon, "window_size": WINDOW_SIZE},
+                                keep=args.keep)
+    last_dates = rows.groupby("ticker")["last_date"].max().dt.strftime('%Y-%m-%d').to_dict()
+    print(f"Tabel prediksi ({len(rows)} baris) ditulis ke {path} dalam {time.perf_counter() - start_time:.1f} detik.")
+    print(f"Tanggal bar terakhir: {last_dates}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+# --- PENYIMPANAN MASUKAN DENGAN SPOOL LOKAL ---
+# Setiap masukan langsung ditulis ke spool SQLite (mode WAL) sehingga form tidak menunggu Google Sheets
+# dan data tidak hilang jika koneksi gagal. Thread latar belakang mengirim baris yang tertunda secara
+# bertahap dengan satu pemanggilan append_rows, dan mengulang dengan backoff eksponensial jika gagal.
+# Pengiriman bersifat at-least-once: baris bisa terkirim dua kali jika proses berhenti tepat setelah
+# append_rows berhasil. Satu file spool diasumsikan hanya dibaca oleh satu flusher.
+
+
+class FeedbackSpool:
+    """Antrian append-only di SQLite; baris ditandai terkirim (sent_at) hanya setelah backend menerimanya."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " row_json TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " sent_at REAL)"
+        )
+        self._lock = threading.Lock()
+
+    def append(self, row):
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO feedback (row_json, created_at) VALUES (?, ?)",
+                                        (json.dumps(row), time.time()))
+        return cursor.lastrowid
+
+    def pending(self, limit=100):
+        """[(id, row)] yang belum terkirim, urut sesuai waktu masuk."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, row_json FROM feedback WHERE sent_at IS NULL ORDER BY id LIMIT ?",
+                                      (limit,)).fetchall()
+        return [(row_id, json.loads(row_json)) for row_id, row_json in rows]
+
+    def mark_sent(self, ids):
+        with self._lock:
+            self._conn.executemany("UPDATE feedback SET sent_at = ? WHERE id = ?", [(time.time(), i) for i in ids])
+
+    def mark_failed(self, ids, error):
+        with self._lock:
+            self._conn.executemany("UPDATE feedback SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                                   [(str(error), i) for i in ids])
+
+    def counts(self):
+        with self._lock:
+            pending, sent = self._conn.execute(
+                "SELECT COUNT(*) - COUNT(sent_at), COUNT(sent_at) FROM feedback").fetchone()
+        return {"pending": pending, "sent": sent}
+
+
+class GSheetBackend:
+    """
+    Backend Google Sheets. Handle worksheet dibuka sekali lalu dipakai ulang; handle dibuang
+    jika terjadi error agar percobaan berikutnya membuka ulang koneksi.
+    client_factory() -> klien gspread (boleh melempar exception jika kredensial tidak tersedia).
+    """
+
+    def __init__(self, client_factory, sheet_name, worksheet_name):
+        self.client_factory = client_factory
+        self.sheet_name = sheet_name
+        self.worksheet_name = worksheet_name
+        self._worksheet = None
+
+    def _get_worksheet(self):
+        if self._worksheet is None:
+            import gspread
+            try:
+                self._worksheet = self.client_factory().open(self.sheet_name).worksheet(self.worksheet_name)
+            except gspread.exceptions.SpreadsheetNotFound:
+                raise RuntimeError(f"Spreadsheet dengan nama '{self.sheet_name}' tidak ditemukan di akun Google Anda.")
+            except gspread.exceptions.WorksheetNotFound:
+                raise RuntimeError(f"Worksheet dengan nama '{self.worksheet_name}' tidak ditemukan di dalam spreadsheet '{self.sheet_name}'.")
+        return self._worksheet
+
+    def append_rows(self, rows):
+        try:
+            self._get_worksheet().append_rows(rows, value_input_option='USER_ENTERED')
+        except Exception:
+            self._worksheet = None
+            raise
+
+
+class FeedbackSink:
+    """Menerima masukan ke spool lalu mengirimkannya ke `backend` (objek dengan append_rows(rows)) di latar belakang."""
+
+    def __init__(self, spool, backend, batch_size=50, flush_interval=5.0, base_backoff=1.0, max_backoff=300.0):
+        self.spool = spool
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.consecutive_failures = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, row):
+        """Menyimpan satu baris secara lokal (durable) dan membangunkan flusher. Tidak menunggu jaringan."""
+        row_id = self.spool.append(row)
+        self._wake.set()
+        return row_id
+
+    def flush_once(self):
+        """Mengirim satu batch baris tertunda. Mengembalikan jumlah baris terkirim; exception diteruskan."""
+        batch = self.spool.pending(self.batch_size)
+        if not batch:
+            return 0
+        ids = [row_id for row_id, _ in batch]
+        try:
+            self.backend.append_rows([row for _, row in batch])
+        except Exception as e:
+            self.spool.mark_failed(ids, e)
+            raise
+        self.spool.mark_sent(ids)
+        return len(ids)
+
+    def _backoff_seconds(self):
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (self.consecutive_failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.flush_once() == self.batch_size:
+                    pass
+            except Exception as e:
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                # Selama backoff, masukan baru tidak memicu percobaan ulang lebih awal
+                self._stop.wait(self._backoff_seconds())
+                continue
+            self.consecutive_failures = 0
+            self.last_error = None
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="feedback-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        return dict(self.spool.counts(), consecutive_failures=self.consecutive_failures, last_error=self.last_error)
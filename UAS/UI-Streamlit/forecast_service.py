@@ -0,0 +1,313 @@
+"""
+Layanan prediksi headless (HTTP atau CLI) yang memakai emiten, model, scaler, dan logika prediksi
+yang sama dengan dashboard.
+
+Permintaan bersamaan untuk ticker yang sama dikumpulkan selama jendela singkat (--batch-window-ms)
+lalu dijalankan sebagai satu rollout ber-batch. Hasil disimpan per (ticker, tanggal bar terakhir,
+hash model, mode), sehingga permintaan yang identik (atau dengan horizon lebih pendek) dijawab dari cache,
+dan permintaan identik yang sedang dihitung cukup menunggu hasil yang sama.
+
+Contoh:
+    python forecast_service.py serve --port 8502
+    curl "http://localhost:8502/forecast?emiten=BBCA&horizon=5"
+    python forecast_service.py forecast --emiten BBCA BBRI --horizon 5
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from emiten_config import build_emiten_dict
+from forecasting import WINDOW_SIZE, artifact_hash, rollout_scaled_windows
+from idx_calendar import IDXCalendar
+from lstm_engine import LSTMStack
+from model_registry import ModelRegistry, load_prediction_assets
+from price_store import PriceStore
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACTS_DIR = os.path.join(SCRIPT_DIR, "streamlit_deployment_artifacts")
+DEFAULT_PRICE_STORE_DIR = os.path.join(SCRIPT_DIR, "price_data")
+MAX_HORIZON = 250
+
+
+class MicroBatcher:
+    """
+    Mengumpulkan item yang masuk dalam `max_wait_s` (atau hingga `max_batch` item) lalu memanggil
+    run_batch(items) -> hasil per item satu kali untuk seluruh kumpulan. submit() mengembalikan Future.
+    """
+
+    def __init__(self, run_batch, max_wait_s=0.005, max_batch=64, name="micro-batcher"):
+        self.run_batch = run_batch
+        self.max_wait_s = max_wait_s
+        self.max_batch = max_batch
+        self.batches_run = 0
+        self.items_run = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.items_run += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class ForecastService:
+    """Prediksi harga per emiten dengan micro-batching per ticker dan cache jalur prediksi bersama."""
+
+    def __init__(self, emiten_dict, price_store, registry, calendar=None, window_size=WINDOW_SIZE, incremental=False,
+                 batch_window_s=0.005, max_batch=64, cache_entries=256, refresh_ttl_s=3600, history_days=365):
+        self.emiten_dict = emiten_dict
+        self.price_store = price_store
+        self.registry = registry
+        self.calendar = calendar or IDXCalendar()
+        self.window_size = window_size
+        self.incremental = incremental
+        self.cache_entries = cache_entries
+        self.refresh_ttl_s = refresh_ttl_s
+        self.history_days = history_days
+        self.cache_hits = 0
+        self.rollouts_run = 0
+        self._cache = collections.OrderedDict()
+        self._in_flight = {}
+        self._last_refresh = {}
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        self._batchers = {
+            key: MicroBatcher(lambda items, key=key: self._run_batch(key, items), batch_window_s, max_batch,
+                              name=f"batcher-{key}")
+            for key in emiten_dict
+        }
+
+    def _run_batch(self, emiten_key, items):
+        """
+        items: [(kunci cache, nilai Close historis, horizon)] -> jalur harga per item sepanjang horizonnya.
+        Item dengan kunci sama (ticker, bar terakhir, hash model, mode) memiliki window input yang sama,
+        sehingga cukup satu rollout per kunci pada horizon terbesar; tiap item mendapat potongannya sendiri.
+        """
+        model, scaler = self.registry.get(emiten_key)
+        if self.incremental and not hasattr(model, "step"):
+            # Mode inkremental membutuhkan mesin NumPy; dibuat sekali per emiten dan dibuang bersama modelnya
+            model = self.registry.derived(emiten_key, "incremental_engine",
+                                          lambda: LSTMStack.from_keras_archive(self.emiten_dict[emiten_key]["model_file"]))
+        windows = {}
+        for key, values, _ in items:
+            windows.setdefault(key, values)
+        num_steps = max(horizon for _, _, horizon in items)
+        scaled_windows = np.stack([scaler.transform(np.asarray(values[-self.window_size:], dtype=float).reshape(-1, 1))
+                                   for values in windows.values()])
+        scaled_paths = rollout_scaled_windows(model, scaled_windows, num_steps, self.incremental)
+        prices = scaler.inverse_transform(scaled_paths.reshape(-1, 1)).reshape(len(windows), num_steps)
+        self.rollouts_run += len(windows)
+        paths = dict(zip(windows, prices))
+        return [paths[key][:horizon] for key, _, horizon in items]
+
+    def _maybe_refresh(self, ticker):
+        """
+        Memperbarui data ticker paling sering sekali per refresh_ttl_s. Permintaan yang datang saat pembaruan
+        sedang berjalan menunggu pembaruan yang sama (bukan membaca store yang mungkin masih kosong);
+        waktu pembaruan baru dicatat setelah berhasil.
+        """
+        with self._lock:
+            if time.monotonic() - self._last_refresh.get(ticker, -np.inf) < self.refresh_ttl_s:
+                return
+            running = self._refreshing.get(ticker)
+            if running is None:
+                running = self._refreshing[ticker] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            running.result()
+            return
+        today = datetime.date.today()
+        try:
+            self.price_store.update(ticker, end=today, initial_start=today - datetime.timedelta(days=self.history_days))
+        except Exception as e:
+            # Tetap melayani dari data lokal yang tersimpan, sama seperti dashboard
+            print(f"Gagal memperbarui data {ticker}: {e}", file=sys.stderr)
+        else:
+            with self._lock:
+                self._last_refresh[ticker] = time.monotonic()
+        finally:
+            with self._lock:
+                del self._refreshing[ticker]
+            running.set_result(None)
+
+    def forecast(self, emiten_key, horizon):
+        """Prediksi `horizon` sesi bursa setelah bar terakhir. Mengembalikan dict siap-JSON."""
+        if emiten_key not in self.emiten_dict:
+            raise KeyError(f"Emiten '{emiten_key}' tidak dikenal. Pilihan: {', '.join(self.emiten_dict)}")
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ValueError(f"horizon harus di antara 1 dan {MAX_HORIZON}.")
+        info = self.emiten_dict[emiten_key]
+        ticker = info["ticker"]
+        self._maybe_refresh(ticker)
+        close = self.price_store.get_close(ticker, start=datetime.date.today() - datetime.timedelta(days=self.history_days))['Close']
+        if len(close) < self.window_size:
+            raise ValueError(f"Data historis 'Close' untuk {ticker} ({len(close)}) kurang dari window_size ({self.window_size}).")
+        last_date = close.index[-1].date()
+        key = (ticker, last_date, artifact_hash(info["model_file"]), self.incremental)
+
+        with self._lock:
+            path = self._cache.get(key)
+            if path is not None and len(path) >= horizon:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                future = None
+            else:
+                pending = self._in_flight.get(key)
+                if pending is not None and pending[1] >= horizon:
+                    future = pending[0]
+                else:
+                    future = self._batchers[emiten_key].submit((key, close.values, horizon))
+                    self._in_flight[key] = (future, horizon)
+        if future is not None:
+            try:
+                path = future.result()
+            finally:
+                # Hapus entri in-flight juga saat batch gagal, agar permintaan
+                # berikutnya mencoba ulang alih-alih memakai future yang gagal.
+                with self._lock:
+                    if self._in_flight.get(key, (None,))[0] is future:
+                        del self._in_flight[key]
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is None or len(cached) < len(path):
+                    self._cache[key] = path
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_entries:
+                        self._cache.popitem(last=False)
+
+        dates = self.calendar.session_dates(last_date, horizon)
+        return {
+            "emiten": emiten_key,
+            "ticker": ticker,
+            "last_date": last_date.isoformat(),
+            "last_close": float(close.iloc[-1]),
+            "horizon": horizon,
+            "incremental": self.incremental,
+            "forecast": [{"date": d.strftime("%Y-%m-%d"), "close": float(p)} for d, p in zip(dates, path[:horizon])],
+        }
+
+    def stats(self):
+        return {
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "rollouts": self.rollouts_run,
+            "batches": {key: {"batches": b.batches_run, "requests": b.items_run} for key, b in self._batchers.items()},
+        }
+
+
+def make_handler(service):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if url.path == "/health":
+                self._send_json(200, {"status": "ok", **service.stats()})
+            elif url.path == "/forecast":
+                try:
+                    self._send_json(200, service.forecast(params.get("emiten", "").upper(), int(params.get("horizon", 1))))
+                except KeyError as e:
+                    self._send_json(404, {"error": str(e.args[0])})
+                except ValueError as e:
+                    self._send_json(400, {"error": str(e)})
+                except Exception as e:
+                    self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self._send_json(404, {"error": "Gunakan /forecast?emiten=BBCA&horizon=5 atau /health."})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ForecastHandler
+
+
+def build_service(args):
+    emiten_dict = build_emiten_dict(args.artifacts_dir)
+    registry = ModelRegistry(lambda model_path, scaler_path: load_prediction_assets(model_path, scaler_path, args.backend),
+                             window_size=WINDOW_SIZE)
+    registry.preload({key: (info["model_file"], info["scaler_file"]) for key, info in emiten_dict.items()})
+    return ForecastService(emiten_dict, PriceStore(args.price_store_dir), registry, incremental=args.incremental,
+                           batch_window_s=args.batch_window_ms / 1000, refresh_ttl_s=args.refresh_ttl_s)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan prediksi harga penutupan tanpa Streamlit.")
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    parser.add_argument("--price-store-dir", default=DEFAULT_PRICE_STORE_DIR)
+    parser.add_argument("--backend", choices=["numpy", "keras", "tflite"], default=os.environ.get("INFERENCE_BACKEND", "numpy"))
+    parser.add_argument("--incremental", action="store_true", help="Gunakan mode inkremental (stateful).")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="Lama pengumpulan permintaan per batch.")
+    parser.add_argument("--refresh-ttl-s", type=float, default=3600, help="Interval minimum pembaruan data per ticker.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Menjalankan server HTTP.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8502)
+    forecast_parser = subparsers.add_parser("forecast", help="Mencetak prediksi sebagai JSON lalu keluar.")
+    forecast_parser.add_argument("--emiten", nargs="+", default=None)
+    forecast_parser.add_argument("--horizon", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    service = build_service(args)
+    if args.command == "forecast":
+        results = [service.forecast(key, args.horizon) for key in (args.emiten or service.emiten_dict)]
+        print(json.dumps(results, indent=2))
+        return 0
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Layanan prediksi berjalan di http://{args.host}:{args.port}/forecast?emiten=BBCA&horizon=5")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
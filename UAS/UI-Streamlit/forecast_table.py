@@ -0,0 +1,91 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# --- TABEL PREDIKSI AKHIR HARI (PRECOMPUTED) ---
+# Setelah bursa tutup, eod_forecast_job.py menghitung prediksi semua emiten untuk horizon 1..N dan
+# menulisnya ke file Arrow berversi. Dashboard cukup mencari baris yang cocok dengan
+# (ticker, tanggal bar terakhir, hash model, backend, mode); jika tidak ada, prediksi dihitung langsung.
+
+FORECAST_TABLE_VERSION = 1
+LATEST_POINTER_NAME = "LATEST"
+TABLE_COLUMNS = ["ticker", "last_date", "model_hash", "backend", "incremental", "horizon", "target_date", "close"]
+
+
+def write_forecast_table(table_dir, df, metadata=None, keep=7):
+    """
+    Menulis tabel prediksi sebagai versi baru (forecasts_<waktu>.arrow) lalu memperbarui penunjuk LATEST.
+    Kedua file ditulis atomik; hanya `keep` versi terbaru yang disimpan.
+    """
+    os.makedirs(table_dir, exist_ok=True)
+    generated_at = datetime.datetime.now()
+    file_name = f"forecasts_{generated_at.strftime('%Y%m%dT%H%M%S')}.arrow"
+    # Kolom teks berulang disimpan sebagai dictionary (kategori) agar file tetap kecil
+    df = df[TABLE_COLUMNS].astype({"ticker": "category", "model_hash": "category", "backend": "category"})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_metadata = {"forecast_table_version": str(FORECAST_TABLE_VERSION),
+                       "generated_at": generated_at.isoformat(timespec="seconds"),
+                       **{key: json.dumps(value) for key, value in (metadata or {}).items()}}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **schema_metadata})
+    path = os.path.join(table_dir, file_name)
+    feather.write_feather(table, f"{path}.tmp", compression="uncompressed")
+    os.replace(f"{path}.tmp", path)
+    pointer_path = os.path.join(table_dir, LATEST_POINTER_NAME)
+    with open(f"{pointer_path}.tmp", "w") as f:
+        f.write(file_name)
+    os.replace(f"{pointer_path}.tmp", pointer_path)
+
+    versions = sorted(name for name in os.listdir(table_dir) if name.startswith("forecasts_") and name.endswith(".arrow"))
+    for name in versions[:-keep]:
+        os.remove(os.path.join(table_dir, name))
+    return path
+
+
+def latest_table_path(table_dir):
+    """Path versi tabel terbaru, atau None jika job belum pernah dijalankan."""
+    try:
+        with open(os.path.join(table_dir, LATEST_POINTER_NAME)) as f:
+            path = os.path.join(table_dir, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+class ForecastTable:
+    """Indeks dict di atas tabel prediksi: satu lookup per (ticker, tanggal bar terakhir, hash model, backend, mode)."""
+
+    def __init__(self, df, metadata=None):
+        self.metadata = metadata or {}
+        self._paths = {}
+        for key, group in df.sort_values("horizon").groupby(["ticker", "last_date", "model_hash", "backend", "incremental"],
+                                                          observed=True):
+            ticker, last_date, model_hash, backend, incremental = key
+            self._paths[(ticker, pd.Timestamp(last_date).date(), model_hash, backend, bool(incremental))] = (
+                group["close"].to_numpy(dtype=float))
+
+    @classmethod
+    def from_file(cls, path):
+        table = feather.read_table(path, memory_map=True)
+        metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()
+                    if not key.startswith(b"pandas")}
+        if int(metadata.get("forecast_table_version", 0)) != FORECAST_TABLE_VERSION:
+            raise ValueError(f"Versi tabel prediksi {metadata.get('forecast_table_version')} tidak didukung "
+                             f"(diharapkan {FORECAST_TABLE_VERSION}).")
+        return cls(table.to_pandas(), metadata)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def max_horizon(self):
+        return max((len(path) for path in self._paths.values()), default=0)
+
+    def lookup(self, ticker, last_date, model_hash, backend, incremental, num_steps):
+        """Harga prediksi untuk langkah 1..num_steps, atau None jika tidak ada di tabel (cache miss)."""
+        path = self._paths.get((ticker, last_date, model_hash, backend, bool(incremental)))
+        if path is None or len(path) < num_steps:
+            return None
+        return path[:num_steps]
@@ -0,0 +1,236 @@
+import collections
+import hashlib
+import functools
+import os
+import threading
+
+import numpy as np
+
+# --- KONFIGURASI PREDIKSI ---
+# Ukuran window (time_step) yang digunakan saat training model LSTM.
+WINDOW_SIZE = 25
+
+# Batas selisih relatif antara mode inkremental dan mode rekursif (jendela penuh).
+# Langkah pertama identik; selisih pada langkah berikutnya berasal dari state LSTM yang
+# membawa konteks lebih panjang dari WINDOW_SIZE. Diukur pada kelima model untuk horizon 60 langkah.
+INCREMENTAL_TOLERANCE = 0.05
+
+
+class ForecastTrajectory:
+    """
+    Jalur prediksi langkah demi langkah yang bisa diperpanjang tanpa mengulang dari awal.
+    Mode rekursif menyimpan window ter-skala terakhir; mode inkremental menyimpan state LSTM.
+    """
+
+    def __init__(self, model, scaler, current_historical_close_values, window_size=WINDOW_SIZE, incremental=False):
+        if len(current_historical_close_values) < window_size:
+            raise ValueError(f"Data historis ({len(current_historical_close_values)}) kurang dari window_size ({window_size}).")
+        last_window_data = np.asarray(current_historical_close_values[-window_size:], dtype=float).reshape(-1, 1)
+        self.model = model
+        self.scaler = scaler
+        self.incremental = incremental
+        self.scaled_path = []
+        self._scaled_window = scaler.transform(last_window_data)
+        self._state = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.scaled_path)
+
+    def _next_scaled_value(self):
+        if not self.incremental:
+            X_predict = np.expand_dims(self._scaled_window, axis=0)
+            scaled_pred_single_step = self.model.predict(X_predict, verbose=0)[0][0]
+            self._scaled_window = np.vstack((self._scaled_window[1:], [[scaled_pred_single_step]]))
+            return scaled_pred_single_step
+        if self._state is None:
+            scaled_pred, self._state = self.model.warm_up(self._scaled_window[np.newaxis, :, :])
+        else:
+            scaled_pred, self._state = self.model.step(np.array([self.scaled_path[-1]]), self._state)
+        return scaled_pred[0]
+
+    def extend_to(self, num_steps):
+        """Menjalankan langkah yang belum dihitung hingga panjang jalur mencapai num_steps."""
+        with self._lock:
+            while len(self.scaled_path) < num_steps:
+                self.scaled_path.append(self._next_scaled_value())
+        return self
+
+    def prices(self, num_steps):
+        """Harga (sudah didenormalisasi) untuk langkah 1..num_steps."""
+        if num_steps < 1:
+            return np.empty(0)
+        self.extend_to(num_steps)
+        return self.scaler.inverse_transform(np.array(self.scaled_path[:num_steps]).reshape(-1, 1))[:, 0]
+
+
+def rollout_scaled_windows(model, scaled_windows, num_steps_to_predict, incremental=False):
+    """
+    Rollout rekursif untuk banyak window sekaligus (mis. banyak titik asal backtest).
+    scaled_windows: (batch, window_size, 1) yang sudah ter-skala. Setiap langkah hanya satu pemanggilan
+    `model` untuk seluruh batch; mode inkremental membutuhkan LSTMStack.
+    Mengembalikan jalur ter-skala berbentuk (batch, num_steps_to_predict).
+    """
+    scaled_windows = np.asarray(scaled_windows, dtype=np.float32)
+    scaled_path = np.empty((len(scaled_windows), num_steps_to_predict), dtype=np.float32)
+    state = None
+    for i in range(num_steps_to_predict):
+        if not incremental:
+            scaled_pred = model.predict(scaled_windows, verbose=0)[:, 0]
+            scaled_windows = np.concatenate((scaled_windows[:, 1:], scaled_pred[:, np.newaxis, np.newaxis]), axis=1)
+        elif state is None:
+            scaled_pred, state = model.warm_up(scaled_windows)
+        else:
+            scaled_pred, state = model.step(scaled_pred, state)
+        scaled_path[:, i] = scaled_pred
+    return scaled_path
+
+
+def direct_forecast_scaled_windows(model, scaled_windows, num_steps_to_predict):
+    """
+    Prediksi multi-horizon dengan model direct Dense(K): satu forward pass untuk seluruh batch
+    menghasilkan K langkah sekaligus, tanpa memasukkan kembali prediksi sebagai input.
+    Mengembalikan jalur ter-skala berbentuk (batch, num_steps_to_predict); num_steps_to_predict <= K.
+    """
+    scaled_path = np.asarray(model.predict(np.asarray(scaled_windows, dtype=np.float32), verbose=0))
+    if scaled_path.shape[1] < num_steps_to_predict:
+        raise ValueError(f"Model direct hanya memprediksi {scaled_path.shape[1]} langkah, diminta {num_steps_to_predict}.")
+    return scaled_path[:, :num_steps_to_predict]
+
+
+def predict_direct_path(model, scaler, current_historical_close_values, num_steps_to_predict, window_size=WINDOW_SIZE):
+    """Harga (sudah didenormalisasi) untuk langkah 1..num_steps_to_predict dari satu inferensi model direct."""
+    if len(current_historical_close_values) < window_size:
+        raise ValueError(f"Data historis ({len(current_historical_close_values)}) kurang dari window_size ({window_size}).")
+    if num_steps_to_predict < 1:
+        return np.empty(0)
+    last_window_data = np.asarray(current_historical_close_values[-window_size:], dtype=float).reshape(-1, 1)
+    scaled_path = direct_forecast_scaled_windows(model, scaler.transform(last_window_data)[np.newaxis], num_steps_to_predict)
+    return scaler.inverse_transform(scaled_path.reshape(-1, 1))[:, 0]
+
+
+def forecast_paths_batched(group, scalers, histories, num_steps_to_predict, window_size=WINDOW_SIZE, incremental=False):
+    """
+    Menjalankan rollout beberapa model sekaligus dengan LSTMStackGroup.
+    `scalers` dan `histories` berurutan sama dengan model di dalam `group`.
+    Mengembalikan harga (sudah didenormalisasi) berbentuk (jumlah model, num_steps_to_predict).
+    """
+    scaled_windows = []
+    for scaler, values in zip(scalers, histories):
+        if len(values) < window_size:
+            raise ValueError(f"Data historis ({len(values)}) kurang dari window_size ({window_size}).")
+        last_window_data = np.asarray(values[-window_size:], dtype=float).reshape(-1, 1)
+        scaled_windows.append(scaler.transform(last_window_data))
+    scaled_windows = np.stack(scaled_windows)[:, np.newaxis, :, :]  # (model, batch=1, time_step, 1)
+
+    scaled_path = np.empty((len(scalers), num_steps_to_predict), dtype=np.float32)
+    state = None
+    for i in range(num_steps_to_predict):
+        if not incremental:
+            scaled_pred = group.predict(scaled_windows)
+            scaled_windows = np.concatenate((scaled_windows[:, :, 1:], scaled_pred[:, :, np.newaxis, np.newaxis]), axis=2)
+        elif state is None:
+            scaled_pred, state = group.warm_up(scaled_windows)
+        else:
+            scaled_pred, state = group.step(scaled_pred, state)
+        scaled_path[:, i] = scaled_pred[:, 0]
+    return np.stack([scaler.inverse_transform(path.reshape(-1, 1))[:, 0] for scaler, path in zip(scalers, scaled_path)])
+
+
+def forecast_intervals_mc_dropout(engine, scaler, current_historical_close_values, num_steps_to_predict,
+                                  num_samples=100, percentiles=(5, 50, 95), window_size=WINDOW_SIZE,
+                                  incremental=False, seed=None, direct=False):
+    """
+    Interval prediksi dengan Monte-Carlo dropout: `num_samples` forward pass stokastik (dropout aktif)
+    ditumpuk pada sumbu batch sehingga setiap langkah rollout hanya satu pemanggilan `engine` (LSTMStack).
+    Setiap sampel membawa jalur rekursifnya sendiri. Dengan direct=True `engine` adalah varian direct Dense(K):
+    setiap sampel cukup satu forward pass stokastik yang menghasilkan seluruh jalur.
+    Mengembalikan (dict persentil -> array harga per langkah, array sampel (num_samples, num_steps_to_predict)).
+    """
+    if len(current_historical_close_values) < window_size:
+        raise ValueError(f"Data historis ({len(current_historical_close_values)}) kurang dari window_size ({window_size}).")
+    rng = np.random.default_rng(seed)
+    last_window_data = np.asarray(current_historical_close_values[-window_size:], dtype=float).reshape(-1, 1)
+    scaled_windows = np.repeat(scaler.transform(last_window_data)[np.newaxis], num_samples, axis=0)
+
+    if direct:
+        scaled_path = engine.predict(scaled_windows, rng=rng)
+        if scaled_path.shape[1] < num_steps_to_predict:
+            raise ValueError(f"Model direct hanya memprediksi {scaled_path.shape[1]} langkah, diminta {num_steps_to_predict}.")
+        scaled_samples = scaled_path[:, :num_steps_to_predict]
+    else:
+        scaled_samples = np.empty((num_samples, num_steps_to_predict), dtype=np.float32)
+        state = None
+        for i in range(num_steps_to_predict):
+            if not incremental:
+                scaled_pred, _ = engine.warm_up(scaled_windows, rng=rng)
+                scaled_windows = np.concatenate((scaled_windows[:, 1:], scaled_pred[:, np.newaxis, np.newaxis]), axis=1)
+            elif state is None:
+                scaled_pred, state = engine.warm_up(scaled_windows, rng=rng)
+            else:
+                scaled_pred, state = engine.step(scaled_pred, state, rng=rng)
+            scaled_samples[:, i] = scaled_pred
+    samples = scaler.inverse_transform(scaled_samples.reshape(-1, 1)).reshape(num_samples, num_steps_to_predict)
+    bands = dict(zip(percentiles, np.percentile(samples, percentiles, axis=0)))
+    return bands, samples
+
+
+class ForecastCache:
+    """
+    Cache LRU berisi ForecastTrajectory per kunci (ticker, tanggal data terakhir, hash artefak model, mode).
+    Horizon yang lebih pendek cukup memotong jalur, horizon yang lebih panjang melanjutkan jalur tersimpan.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self._lock:
+            trajectory = self._entries.get(key)
+            if trajectory is None:
+                trajectory = factory()
+                self._entries[key] = trajectory
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            return trajectory
+
+
+@functools.lru_cache(maxsize=32)
+def _hash_file(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_hash(path):
+    """Hash SHA-256 file artefak model; dihitung ulang hanya jika file berubah."""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def predict_future_price(model, scaler, current_historical_close_values, num_steps_to_predict, window_size=WINDOW_SIZE):
+    """Memprediksi harga penutupan untuk N langkah ke depan secara iteratif."""
+    if len(current_historical_close_values) < window_size or num_steps_to_predict < 1:
+        return None
+    trajectory = ForecastTrajectory(model, scaler, current_historical_close_values, window_size)
+    return trajectory.prices(num_steps_to_predict)[-1]
+
+
+def predict_future_price_incremental(engine, scaler, current_historical_close_values, num_steps_to_predict, window_size=WINDOW_SIZE):
+    """
+    Memprediksi harga penutupan N langkah ke depan dengan state LSTM yang dibawa maju.
+    State dipanaskan sekali pada window terakhir, lalu setiap langkah hanya menjalankan satu
+    pembaruan sel per layer (O(1) per hari) menggunakan `engine` (LSTMStack).
+    Hasil langkah pertama sama dengan predict_future_price; langkah berikutnya berada
+    dalam INCREMENTAL_TOLERANCE terhadap mode rekursif.
+    """
+    if len(current_historical_close_values) < window_size or num_steps_to_predict < 1:
+        return None
+    trajectory = ForecastTrajectory(engine, scaler, current_historical_close_values, window_size, incremental=True)
+    return trajectory.prices(num_steps_to_predict)[-1]
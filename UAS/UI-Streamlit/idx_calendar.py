@@ -0,0 +1,111 @@
+import datetime
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# --- KALENDER PERDAGANGAN BURSA EFEK INDONESIA (BEI / IDX) ---
+# Bursa tutup pada hari Sabtu-Minggu dan pada hari libur bursa di bawah ini
+# (libur nasional + cuti bersama sesuai pengumuman BEI). Perbarui tabel ini setiap tahun.
+IDX_HOLIDAYS = {
+    2024: [
+        "2024-01-01", "2024-02-08", "2024-02-09", "2024-02-14", "2024-03-11", "2024-03-12",
+        "2024-03-29", "2024-04-08", "2024-04-09", "2024-04-10", "2024-04-11", "2024-04-12",
+        "2024-04-15", "2024-05-01", "2024-05-09", "2024-05-10", "2024-05-23", "2024-05-24",
+        "2024-06-17", "2024-06-18", "2024-09-16", "2024-12-25", "2024-12-26", "2024-12-31",
+    ],
+    2025: [
+        "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-03-28", "2025-03-31",
+        "2025-04-01", "2025-04-02", "2025-04-03", "2025-04-04", "2025-04-07", "2025-04-18",
+        "2025-05-01", "2025-05-12", "2025-05-13", "2025-05-29", "2025-05-30", "2025-06-06",
+        "2025-06-09", "2025-06-27", "2025-08-18", "2025-09-05", "2025-12-25", "2025-12-26",
+        "2025-12-31",
+    ],
+    2026: [
+        "2026-01-01", "2026-01-16", "2026-02-16", "2026-02-17", "2026-03-18", "2026-03-19",
+        "2026-03-20", "2026-03-23", "2026-03-24", "2026-04-03", "2026-05-01", "2026-05-14",
+        "2026-05-15", "2026-05-27", "2026-05-28", "2026-06-01", "2026-06-16", "2026-08-17",
+        "2026-08-25", "2026-12-24", "2026-12-25", "2026-12-31",
+    ],
+    # 2027: perkiraan dari kalender hijriah/imlek/saka (SKB libur dan cuti bersama 2027 belum tersedia saat
+    # ditulis); cocokkan dengan pengumuman BEI begitu terbit lalu hapus dari ESTIMATED_HOLIDAY_YEARS.
+    2027: [
+        "2027-01-01", "2027-01-05", "2027-03-09", "2027-03-10", "2027-03-11", "2027-03-12",
+        "2027-03-15", "2027-03-26", "2027-05-06", "2027-05-07", "2027-05-17", "2027-05-20",
+        "2027-05-21", "2027-06-01", "2027-08-17", "2027-12-24", "2027-12-31",
+    ],
+}
+# Tahun yang daftar liburnya masih perkiraan: dipakai untuk menghitung sesi, tetapi tetap diperingatkan
+ESTIMATED_HOLIDAY_YEARS = {2027}
+
+# Waktu Indonesia Barat (UTC+7, tanpa DST). Bar harian dianggap final setelah sesi II, pre-closing,
+# dan post-trading selesai; sebelum itu bar hari ini masih intraday.
+WIB = datetime.timezone(datetime.timedelta(hours=7), "WIB")
+IDX_SESSION_CLOSE = datetime.time(16, 15)
+
+
+def _to_date(value):
+    return pd.Timestamp(value).date()
+
+
+class IDXCalendar:
+    """Mengubah tanggal kalender menjadi jumlah sesi perdagangan dan sebaliknya."""
+
+    def __init__(self, holidays=None, estimated_years=None):
+        holidays = IDX_HOLIDAYS if holidays is None else holidays
+        estimated_years = ESTIMATED_HOLIDAY_YEARS if estimated_years is None else estimated_years
+        holiday_dates = sorted(day for days in holidays.values() for day in days)
+        self.holidays = np.array(holiday_dates, dtype="datetime64[D]")
+        # Setelah tahun terakhir di tabel, hanya Sabtu-Minggu yang diketahui sebagai hari libur
+        self.last_covered_date = datetime.date(max(holidays), 12, 31)
+        # Setelah tahun terakhir yang bukan perkiraan, tanggal libur belum pasti
+        confirmed_years = [year for year in holidays if year not in estimated_years]
+        self.last_confirmed_date = datetime.date(max(confirmed_years), 12, 31) if confirmed_years else datetime.date.min
+        self._busdaycal = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def _check_coverage(self, date):
+        if date > self.last_covered_date:
+            warnings.warn(f"Kalender libur BEI hanya mencakup hingga {self.last_covered_date.year}; tanggal sesi setelahnya "
+                          f"(hingga {date}) hanya mengecualikan Sabtu-Minggu. Perbarui IDX_HOLIDAYS.", stacklevel=3)
+        elif date > self.last_confirmed_date:
+            warnings.warn(f"Hari libur BEI setelah {self.last_confirmed_date.year} masih perkiraan; tanggal sesi hingga {date} "
+                          "bisa bergeser. Perbarui IDX_HOLIDAYS sesuai pengumuman BEI.", stacklevel=3)
+
+    def is_trading_day(self, date):
+        return bool(np.is_busday(np.datetime64(_to_date(date), "D"), busdaycal=self._busdaycal))
+
+    def trading_steps_between(self, last_date, target_date):
+        """Jumlah sesi perdagangan setelah `last_date` hingga dan termasuk `target_date`."""
+        last_date, target_date = _to_date(last_date), _to_date(target_date)
+        if target_date <= last_date:
+            return 0
+        self._check_coverage(target_date)
+        start = np.datetime64(last_date + datetime.timedelta(days=1), "D")
+        end = np.datetime64(target_date + datetime.timedelta(days=1), "D")
+        return int(np.busday_count(start, end, busdaycal=self._busdaycal))
+
+    def session_dates(self, last_date, num_steps):
+        """Tanggal sesi untuk langkah prediksi 1..num_steps setelah `last_date`."""
+        if num_steps < 1:
+            return pd.DatetimeIndex([])
+        anchor = np.datetime64(_to_date(last_date), "D")
+        offsets = np.arange(1, num_steps + 1)
+        dates = pd.DatetimeIndex(np.busday_offset(anchor, offsets, roll="backward", busdaycal=self._busdaycal))
+        self._check_coverage(dates[-1].date())
+        return dates
+
+    def next_session(self, last_date):
+        return self.session_dates(last_date, 1)[0].date()
+
+    def last_session_on_or_before(self, date):
+        day = np.datetime64(_to_date(date), "D")
+        return pd.Timestamp(np.busday_offset(day, 0, roll="backward", busdaycal=self._busdaycal)).date()
+
+    def last_completed_session(self, now=None):
+        """Tanggal sesi terakhir yang sudah selesai pada waktu `now` (default: sekarang, WIB)."""
+        now = datetime.datetime.now(WIB) if now is None else now
+        if now.tzinfo is not None:
+            now = now.astimezone(WIB)
+        if self.is_trading_day(now.date()) and now.time() >= IDX_SESSION_CLOSE:
+            return now.date()
+        return self.last_session_on_or_before(now.date() - datetime.timedelta(days=1))
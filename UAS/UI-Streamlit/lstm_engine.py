@@ -0,0 +1,243 @@
+import io
+import json
+import zipfile
+
+import h5py
+import numpy as np
+
+# --- MESIN INFERENSI LSTM BERBASIS NUMPY ---
+# Model yang dipakai dashboard adalah Sequential: LSTM(96) x 4 (+ Dropout) lalu Dense(1), atau Dense(K) untuk
+# varian direct multi-horizon (K harga berikutnya sekaligus; output pertama tetap prediksi satu langkah).
+# Dropout tidak aktif saat inferensi biasa, sehingga forward pass cukup berisi sel-sel LSTM dan satu Dense.
+# Untuk Monte-Carlo dropout, berikan `rng` (np.random.Generator) agar mask dropout diterapkan pada output tiap layer.
+# Urutan gate mengikuti Keras: input (i), forget (f), kandidat sel (g), output (o).
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _as_weight(w):
+    """Bobot sebagai float32 tanpa salinan jika sudah float32 (mis. view memmap); float16 dibiarkan apa adanya."""
+    w = np.asarray(w)
+    return w if w.dtype == np.float16 else w.astype(np.float32, copy=False)
+
+
+class LSTMStack:
+    """Tumpukan layer LSTM + Dense(1) atau Dense(K) yang dijalankan dengan NumPy (float32)."""
+
+    def __init__(self, lstm_weights, dense_weights, dropout_rates=None):
+        # lstm_weights: list berisi (kernel, recurrent_kernel, bias) untuk tiap layer LSTM
+        # dense_weights: (kernel, bias) dari layer Dense output
+        # dropout_rates: rate Dropout setelah tiap layer LSTM (0 jika tidak ada)
+        self.lstm_weights = [tuple(_as_weight(w) for w in layer) for layer in lstm_weights]
+        self.dense_kernel, self.dense_bias = (_as_weight(w) for w in dense_weights)
+        self.units = [recurrent.shape[0] for _, recurrent, _ in self.lstm_weights]
+        self.output_steps = self.dense_kernel.shape[1]
+        self.dropout_rates = list(dropout_rates) if dropout_rates is not None else [0.0] * len(self.lstm_weights)
+
+    @classmethod
+    def from_keras_model(cls, model):
+        """Mengambil bobot dari model Keras yang sudah dimuat."""
+        lstm_weights, dense_weights, dropout_rates = [], None, []
+        for layer in model.layers:
+            layer_type = layer.__class__.__name__
+            if layer_type == "LSTM":
+                lstm_weights.append(layer.get_weights())
+                dropout_rates.append(0.0)
+            elif layer_type == "Dense":
+                dense_weights = layer.get_weights()
+            elif layer_type == "Dropout" and dropout_rates:
+                dropout_rates[-1] = float(layer.rate)
+            elif layer_type not in ("Dropout", "InputLayer"):
+                raise ValueError(f"Layer '{layer_type}' tidak didukung oleh LSTMStack.")
+        if not lstm_weights or dense_weights is None:
+            raise ValueError("Model harus berisi minimal satu layer LSTM dan satu layer Dense.")
+        return cls(lstm_weights, dense_weights, dropout_rates)
+
+    @classmethod
+    def from_keras_archive(cls, model_path):
+        """
+        Membaca arsitektur (config.json) dan bobot (model.weights.h5) langsung dari file .keras,
+        tanpa perlu mengimpor TensorFlow.
+        """
+        with zipfile.ZipFile(model_path) as archive:
+            config = json.loads(archive.read("config.json"))
+            weights_bytes = archive.read("model.weights.h5")
+        if config.get("class_name") != "Sequential":
+            raise ValueError(f"Hanya model Sequential yang didukung, ditemukan '{config.get('class_name')}'.")
+
+        lstm_weights, dense_weights, dropout_rates = [], None, []
+        with h5py.File(io.BytesIO(weights_bytes), "r") as weights_file:
+            for layer in config["config"]["layers"]:
+                layer_type, layer_config = layer["class_name"], layer["config"]
+                if layer_type == "LSTM":
+                    if layer_config["activation"] != "tanh" or layer_config["recurrent_activation"] != "sigmoid":
+                        raise ValueError(f"Aktivasi LSTM pada layer '{layer_config['name']}' tidak didukung.")
+                    cell_vars = weights_file[f"layers/{layer_config['name']}/cell/vars"]
+                    lstm_weights.append([cell_vars[str(i)][()] for i in range(3)])
+                    dropout_rates.append(0.0)
+                elif layer_type == "Dense":
+                    if layer_config["activation"] != "linear":
+                        raise ValueError(f"Aktivasi Dense pada layer '{layer_config['name']}' tidak didukung.")
+                    dense_vars = weights_file[f"layers/{layer_config['name']}/vars"]
+                    dense_weights = [dense_vars[str(i)][()] for i in range(2)]
+                elif layer_type == "Dropout" and dropout_rates:
+                    dropout_rates[-1] = float(layer_config["rate"])
+                elif layer_type not in ("Dropout", "InputLayer"):
+                    raise ValueError(f"Layer '{layer_type}' tidak didukung oleh LSTMStack.")
+        if not lstm_weights or dense_weights is None:
+            raise ValueError("Model harus berisi minimal satu layer LSTM dan satu layer Dense.")
+        return cls(lstm_weights, dense_weights, dropout_rates)
+
+    def initial_state(self, batch_size=1):
+        """State awal (h, c) bernilai nol untuk setiap layer, sama seperti Keras non-stateful."""
+        return [(np.zeros((batch_size, units), dtype=np.float32), np.zeros((batch_size, units), dtype=np.float32))
+                for units in self.units]
+
+    @staticmethod
+    def _cell(x_proj, h, c, recurrent_kernel):
+        z = x_proj + h @ recurrent_kernel
+        i, f, g, o = np.split(z, 4, axis=-1)
+        c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+        h = _sigmoid(o) * np.tanh(c)
+        return h, c
+
+    def _dense(self, h):
+        return (h @ self.dense_kernel + self.dense_bias)[:, 0]
+
+    def _dense_all(self, h):
+        return h @ self.dense_kernel + self.dense_bias
+
+    @staticmethod
+    def _dropout(x, rate, rng):
+        """Dropout (inverted) seperti Keras saat training; tidak melakukan apa pun jika rng None."""
+        if rng is None or rate <= 0:
+            return x
+        keep = rng.random(x.shape, dtype=np.float32) >= rate
+        return x * keep / np.float32(1.0 - rate)
+
+    def _run_layers(self, sequences, state=None, rng=None):
+        """Output layer LSTM terakhir pada langkah terakhir (batch, units) dan state akhir tiap layer."""
+        layer_input = np.asarray(sequences, dtype=np.float32)
+        if layer_input.ndim == 2:
+            layer_input = layer_input[..., np.newaxis]
+        batch_size, time_steps, _ = layer_input.shape
+        if state is None:
+            state = self.initial_state(batch_size)
+        new_state = []
+        for (kernel, recurrent_kernel, bias), (h, c), rate in zip(self.lstm_weights, state, self.dropout_rates):
+            x_proj = layer_input @ kernel + bias
+            outputs = np.empty((batch_size, time_steps, h.shape[-1]), dtype=np.float32)
+            for t in range(time_steps):
+                h, c = self._cell(x_proj[:, t], h, c, recurrent_kernel)
+                outputs[:, t] = h
+            new_state.append((h, c))
+            layer_input = self._dropout(outputs, rate, rng)
+        return layer_input[:, -1], new_state
+
+    def warm_up(self, sequences, state=None, rng=None):
+        """
+        Menjalankan seluruh sekuens (batch, time_step, fitur) lapis demi lapis.
+        Proyeksi input tiap layer dihitung sekaligus untuk semua time step dalam satu perkalian matriks.
+        Mengembalikan output Dense (pertama) pada langkah terakhir (batch,) dan state akhir tiap layer.
+        Jika `rng` diberikan, dropout aktif (Monte-Carlo dropout); state rekuren tidak terkena dropout.
+        """
+        last_output, new_state = self._run_layers(sequences, state, rng)
+        return self._dense(last_output), new_state
+
+    def step(self, x_t, state, rng=None):
+        """Memajukan semua layer satu time step. x_t berbentuk (batch,) atau (batch, fitur)."""
+        layer_input = np.asarray(x_t, dtype=np.float32).reshape(len(state[0][0]), -1)
+        new_state = []
+        for (kernel, recurrent_kernel, bias), (h, c), rate in zip(self.lstm_weights, state, self.dropout_rates):
+            h, c = self._cell(layer_input @ kernel + bias, h, c, recurrent_kernel)
+            new_state.append((h, c))
+            layer_input = self._dropout(h, rate, rng)
+        return self._dense(layer_input), new_state
+
+    def predict(self, X, verbose=0, rng=None):
+        """
+        Antarmuka yang kompatibel dengan model.predict Keras: (batch, time_step, 1) -> (batch, output_steps).
+        Jika `rng` diberikan, dropout aktif (Monte-Carlo dropout).
+        """
+        last_output, _ = self._run_layers(X, rng=rng)
+        return self._dense_all(last_output)
+
+
+class LSTMStackGroup:
+    """
+    Beberapa LSTMStack dengan arsitektur sama (mis. kelima emiten) yang dijalankan bersamaan.
+    Bobot ditumpuk pada sumbu model pertama sehingga setiap time step untuk semua model
+    cukup satu perkalian matriks ber-batch (np.matmul) per layer.
+    """
+
+    def __init__(self, stacks):
+        if len({(tuple(stack.units), stack.output_steps) for stack in stacks}) != 1:
+            raise ValueError("Semua model dalam LSTMStackGroup harus memiliki arsitektur yang sama.")
+        self.num_models = len(stacks)
+        self.units = stacks[0].units
+        self.lstm_weights = [
+            (np.stack([stack.lstm_weights[i][0] for stack in stacks]),
+             np.stack([stack.lstm_weights[i][1] for stack in stacks]),
+             np.stack([stack.lstm_weights[i][2] for stack in stacks])[:, np.newaxis, :])
+            for i in range(len(self.units))
+        ]
+        self.dense_kernel = np.stack([stack.dense_kernel for stack in stacks])
+        self.dense_bias = np.stack([stack.dense_bias for stack in stacks])[:, np.newaxis, :]
+
+    @classmethod
+    def from_stacked_weights(cls, lstm_weights, dense_kernel, dense_bias):
+        """
+        Grup dari bobot yang sudah ditumpuk pada sumbu model (mis. view dari weight_store) tanpa menyalinnya.
+        lstm_weights: list (kernel (M, in, 4u), recurrent_kernel (M, u, 4u), bias (M, 4u)) per layer.
+        """
+        group = cls.__new__(cls)
+        group.num_models = dense_kernel.shape[0]
+        group.units = [recurrent.shape[1] for _, recurrent, _ in lstm_weights]
+        group.lstm_weights = [(_as_weight(kernel), _as_weight(recurrent), _as_weight(bias)[:, np.newaxis, :])
+                              for kernel, recurrent, bias in lstm_weights]
+        group.dense_kernel = _as_weight(dense_kernel)
+        group.dense_bias = _as_weight(dense_bias)[:, np.newaxis, :]
+        return group
+
+    def initial_state(self, batch_size=1):
+        return [(np.zeros((self.num_models, batch_size, units), dtype=np.float32),
+                 np.zeros((self.num_models, batch_size, units), dtype=np.float32))
+                for units in self.units]
+
+    def _dense(self, h):
+        return (h @ self.dense_kernel + self.dense_bias)[..., 0]
+
+    def warm_up(self, sequences, state=None):
+        """sequences: (model, batch, time_step, fitur). Mengembalikan output (model, batch) dan state akhir."""
+        layer_input = np.asarray(sequences, dtype=np.float32)
+        num_models, batch_size, time_steps, _ = layer_input.shape
+        if state is None:
+            state = self.initial_state(batch_size)
+        new_state = []
+        for (kernel, recurrent_kernel, bias), (h, c) in zip(self.lstm_weights, state):
+            x_proj = (layer_input.reshape(num_models, batch_size * time_steps, -1) @ kernel + bias)
+            x_proj = x_proj.reshape(num_models, batch_size, time_steps, -1)
+            outputs = np.empty((num_models, batch_size, time_steps, h.shape[-1]), dtype=np.float32)
+            for t in range(time_steps):
+                h, c = LSTMStack._cell(x_proj[:, :, t], h, c, recurrent_kernel)
+                outputs[:, :, t] = h
+            new_state.append((h, c))
+            layer_input = outputs
+        return self._dense(layer_input[:, :, -1]), new_state
+
+    def step(self, x_t, state):
+        """Memajukan semua model satu time step. x_t berbentuk (model, batch)."""
+        layer_input = np.asarray(x_t, dtype=np.float32).reshape(self.num_models, -1, 1)
+        new_state = []
+        for (kernel, recurrent_kernel, bias), (h, c) in zip(self.lstm_weights, state):
+            h, c = LSTMStack._cell(layer_input @ kernel + bias, h, c, recurrent_kernel)
+            new_state.append((h, c))
+            layer_input = h
+        return self._dense(layer_input), new_state
+
+    def predict(self, X):
+        """(model, batch, time_step, 1) -> (model, batch)."""
+        output, _ = self.warm_up(X)
+        return output
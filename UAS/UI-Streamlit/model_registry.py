@@ -0,0 +1,195 @@
+import collections
+import json
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from forecasting import artifact_hash
+from lstm_engine import LSTMStack
+from tflite_engine import TFLiteModel, tflite_path_for, tflite_source_sha256
+from weight_store import load_shared_stack
+
+# --- REGISTRY MODEL DENGAN PRELOAD DI LATAR BELAKANG ---
+# Model dimuat dan dipanaskan (satu kali predict) oleh thread pool sejak server dimulai,
+# sehingga interaksi pertama pada emiten mana pun sudah mendapat model yang siap.
+# Total ukuran bobot dibatasi oleh memory budget; model yang paling lama tidak dipakai dikeluarkan (LRU).
+# Objek turunan model (mesin inkremental, grup bobot, cache jalur prediksi) disimpan di registry juga,
+# agar ikut dibuang saat modelnya dikeluarkan dan tidak ada referensi lain yang menahan bobotnya.
+
+
+# Jeda dan jumlah percobaan ulang saat artefak sedang dipublikasikan (model/scaler tidak cocok dengan manifest)
+PUBLISH_RETRY_DELAY_S = 0.5
+PUBLISH_RETRIES = 3
+
+
+def published_artifact_hashes(model_path, scaler_path):
+    """
+    (hash model, hash scaler) jika keduanya cocok dengan manifest yang ditulis terakhir oleh
+    publish_artifacts (train_pipeline.py), atau None jika publikasi sedang berjalan/tidak lengkap.
+    Artefak tanpa manifest (dari notebook) dianggap cocok.
+    """
+    hashes = (artifact_hash(model_path), artifact_hash(scaler_path))
+    manifest_path = f"{model_path[:-len('_model.keras')]}_manifest.json"
+    if not model_path.endswith("_model.keras") or not os.path.exists(manifest_path):
+        return hashes
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    expected = (manifest.get("model_sha256"), manifest.get("scaler_sha256"))
+    if any(value is not None and value != actual for value, actual in zip(expected, hashes)):
+        return None
+    return hashes
+
+
+def load_prediction_assets(model_path, scaler_path, backend="numpy"):
+    """
+    Memuat model (mesin NumPy, TFLite, atau Keras sesuai backend) dan scaler dari file.
+    Mesin NumPy memakai bobot dari store bersama (weight_store.py) jika tersedia, tanpa salinan per proses.
+    Model dan scaler hanya dipakai jika cocok dengan manifest sebelum dan sesudah dimuat, sehingga pasangan
+    dari dua versi berbeda (saat publish_artifacts sedang mengganti file) tidak pernah dikembalikan.
+    """
+    for _ in range(PUBLISH_RETRIES):
+        hashes = published_artifact_hashes(model_path, scaler_path)
+        if hashes is not None:
+            model_obj, scaler_obj = _load_model_and_scaler(model_path, scaler_path, backend)
+            if published_artifact_hashes(model_path, scaler_path) == hashes:
+                return model_obj, scaler_obj
+        time.sleep(PUBLISH_RETRY_DELAY_S)
+    raise OSError(f"{os.path.basename(model_path)} dan {os.path.basename(scaler_path)} tidak cocok dengan manifest "
+                  "(publikasi artefak sedang berjalan atau tidak lengkap).")
+
+
+def _load_model_and_scaler(model_path, scaler_path, backend):
+    if backend == "numpy":
+        model_obj = load_shared_stack(model_path) or LSTMStack.from_keras_archive(model_path)
+    elif backend == "tflite":
+        if tflite_source_sha256(model_path) == artifact_hash(model_path):
+            model_obj = TFLiteModel(tflite_path_for(model_path))
+        else:
+            # .tflite diekspor dari versi .keras lain (atau tanpa hash): pakai bobot .keras terbaru
+            warnings.warn(f"{tflite_path_for(model_path)} tidak berasal dari {model_path} saat ini; "
+                          "jalankan ulang UAS/Modelling/export_tflite.py. Memakai mesin NumPy.")
+            model_obj = load_shared_stack(model_path) or LSTMStack.from_keras_archive(model_path)
+    else:
+        from tensorflow.keras.models import load_model
+        model_obj = load_model(model_path, compile=False)
+    scaler_obj = joblib.load(scaler_path)
+    return model_obj, scaler_obj
+
+
+def estimate_model_bytes(model):
+    """Perkiraan ukuran bobot model di memori (LSTMStack, LSTMStackGroup, TFLiteModel, atau model Keras)."""
+    if hasattr(model, "nbytes"):
+        return int(model.nbytes)
+    if hasattr(model, "lstm_weights"):
+        arrays = [w for layer in model.lstm_weights for w in layer] + [model.dense_kernel, model.dense_bias]
+        return int(sum(np.asarray(w).nbytes for w in arrays))
+    if hasattr(model, "weights"):
+        return int(sum(np.prod(w.shape) * np.dtype(getattr(w.dtype, "name", w.dtype)).itemsize for w in model.weights))
+    return 0
+
+
+class ModelRegistry:
+    """Menyimpan pasangan (model, scaler) per emiten dengan batas memori dan statistik waktu muat."""
+
+    def __init__(self, loader, memory_budget_bytes=None, window_size=25, max_workers=4):
+        # loader(model_path, scaler_path) -> (model, scaler)
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.window_size = window_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-warmup")
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._paths = {}
+        self._derived = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def preload(self, artifacts):
+        """Menjadwalkan pemuatan di latar belakang. artifacts: {key: (model_path, scaler_path)}."""
+        for key, paths in artifacts.items():
+            with self._lock:
+                self._paths[key] = paths
+                if key in self._entries or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._load, key, *paths)
+
+    def _load(self, key, model_path, scaler_path):
+        start = time.perf_counter()
+        try:
+            model, scaler = self.loader(model_path, scaler_path)
+            loaded = time.perf_counter()
+            model.predict(np.zeros((1, self.window_size, 1), dtype=np.float32), verbose=0)
+            warmed = time.perf_counter()
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        size_bytes = estimate_model_bytes(model)
+        with self._lock:
+            self._entries[key] = (model, scaler)
+            self._entries.move_to_end(key)
+            self._pending.pop(key, None)
+            self._stats[key] = {
+                "load_s": loaded - start,
+                "warmup_s": warmed - loaded,
+                "bytes": size_bytes,
+                "loads": self._stats.get(key, {}).get("loads", 0) + 1,
+                "evictions": self._stats.get(key, {}).get("evictions", 0),
+            }
+            self._evict_over_budget(keep=key)
+        return model, scaler
+
+    def _evict_over_budget(self, keep):
+        if self.memory_budget_bytes is None:
+            return
+        while self.resident_bytes() > self.memory_budget_bytes and len(self._entries) > 1:
+            victim = next(key for key in self._entries if key != keep)
+            del self._entries[victim]
+            for derived_key in [derived_key for derived_key in self._derived if victim in derived_key[0]]:
+                del self._derived[derived_key]
+            self._stats[victim]["evictions"] += 1
+
+    def resident_bytes(self):
+        return sum(self._stats[key]["bytes"] for key in self._entries)
+
+    def get(self, key, model_path=None, scaler_path=None):
+        """Mengambil (model, scaler); menunggu preload yang sedang berjalan atau memuat ulang jika sudah dikeluarkan."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if model_path is not None:
+                self._paths[key] = (model_path, scaler_path)
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._load, key, *self._paths[key])
+                self._pending[key] = future
+        return future.result()
+
+    def derived(self, keys, name, factory):
+        """
+        Objek turunan dari model di `keys` (satu kunci atau tuple kunci), dibuat sekali dengan factory()
+        lalu disimpan hingga salah satu model tersebut dikeluarkan. Jika ada model yang sudah tidak residen,
+        objek tetap dikembalikan tetapi tidak disimpan.
+        """
+        keys = (keys,) if isinstance(keys, str) else tuple(keys)
+        with self._lock:
+            value = self._derived.get((keys, name))
+        if value is not None:
+            return value
+        # factory() boleh memanggil get(), jadi dijalankan di luar lock
+        value = factory()
+        with self._lock:
+            if all(key in self._entries for key in keys):
+                value = self._derived.setdefault((keys, name), value)
+        return value
+
+    def stats(self):
+        """Statistik per emiten: waktu muat, waktu warm-up, ukuran bobot, dan status residen."""
+        with self._lock:
+            return {key: dict(values, resident=key in self._entries) for key, values in self._stats.items()}
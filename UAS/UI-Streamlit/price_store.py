@@ -0,0 +1,164 @@
+import collections
+import datetime
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# --- PENYIMPANAN HARGA OHLCV LOKAL ---
+# Satu file Arrow IPC (Feather v2, tanpa kompresi) per ticker sehingga bisa dibaca dengan memory-map.
+# Hanya bar setelah tanggal terakhir yang tersimpan (ditambah satu bar pembanding) yang diunduh ulang.
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# Versi 3: harga disesuaikan dividen/split (default yfinance, sama dengan notebook dan data latih model).
+# File dengan versi lain (termasuk versi 2 yang sempat menyimpan harga mentah) diunduh ulang seluruhnya.
+PRICE_STORE_VERSION = 3
+
+
+def normalize_ohlcv(raw_df, ticker):
+    """
+    Menyeragamkan DataFrame hasil unduhan: kolom MultiIndex ('Close', ticker) dari yfinance
+    diratakan menjadi 'Close', index menjadi DatetimeIndex tanpa zona waktu, dan baris duplikat dibuang.
+    """
+    if raw_df is None or raw_df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+    df = raw_df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        if ticker in df.columns.get_level_values(-1):
+            df = df.xs(ticker, axis=1, level=-1)
+        else:
+            df.columns = df.columns.get_level_values(0)
+    df = df[[col for col in OHLCV_COLUMNS if col in df.columns]].astype(float)
+    df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+    df.index.name = "Date"
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df
+
+
+def extract_close_column(df, ticker):
+    """
+    DataFrame satu kolom 'Close' (float, tanpa NaN) dari data harga, baik kolom datar maupun
+    MultiIndex ('Close', ticker) dari yfinance. None jika kolom Close tidak ada.
+    """
+    if 'Close' in df.columns:
+        return df[['Close']].astype(float).dropna()
+    if isinstance(df.columns, pd.MultiIndex) and ('Close', ticker) in df.columns:
+        return df[('Close', ticker)].to_frame(name='Close').astype(float).dropna()
+    return None
+
+
+class YahooFinanceFetcher:
+    """Sumber data default: Yahoo Finance melalui yfinance."""
+
+    def fetch(self, ticker, start, end):
+        import yfinance as yf
+        return yf.download(ticker, start=start, end=end, progress=False)
+
+
+class CsvFetcher:
+    """Sumber data lokal (fixture) dari file CSV `<ticker>.csv` yang memiliki kolom Date dan OHLCV."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start, end):
+        df = pd.read_csv(os.path.join(self.directory, f"{ticker}.csv"), index_col="Date", parse_dates=True)
+        return df.loc[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+
+class PriceStore:
+    """Penyimpanan harga per ticker yang diperbarui secara inkremental."""
+
+    def __init__(self, store_dir, fetcher=None):
+        self.store_dir = store_dir
+        self.fetcher = fetcher if fetcher is not None else YahooFinanceFetcher()
+        # Satu lock per ticker agar pembaruan beberapa ticker bisa berjalan paralel
+        self._locks = collections.defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    def path_for(self, ticker):
+        return os.path.join(self.store_dir, f"{ticker}.arrow")
+
+    def load(self, ticker, start=None, columns=None):
+        """Membaca data tersimpan (memory-map) tanpa akses jaringan."""
+        path = self.path_for(ticker)
+        if not os.path.exists(path):
+            return normalize_ohlcv(None, ticker)
+        read_columns = None if columns is None else ["Date"] + list(columns)
+        df = feather.read_table(path, columns=read_columns, memory_map=True).to_pandas().set_index("Date")
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start)]
+        return df
+
+    def stored_version(self, ticker):
+        """Versi format file tersimpan (0 untuk file lama tanpa penanda versi)."""
+        metadata = feather.read_table(self.path_for(ticker), columns=["Date"], memory_map=True).schema.metadata or {}
+        return int(metadata.get(b"price_store_version", 0))
+
+    def last_date(self, ticker):
+        index = self.load(ticker, columns=[]).index
+        return None if len(index) == 0 else index[-1].date()
+
+    def update(self, ticker, end=None, initial_start=None):
+        """
+        Mengunduh hanya bar setelah tanggal terakhir yang tersimpan hingga `end` (eksklusif).
+        Jika belum ada data, atau `initial_start` lebih awal dari data tersimpan, bagian awal
+        tersebut ikut diunduh. Mengembalikan jumlah bar baru.
+
+        Harga yang disesuaikan ditulis ulang Yahoo untuk seluruh riwayat setiap ada dividen/split, jadi
+        bar terakhir yang tersimpan ikut diunduh sebagai pembanding. Jika Close-nya berubah, seluruh
+        riwayat diunduh ulang (dan dihitung sebagai bar baru) agar seri tidak bercampur dua tingkat penyesuaian.
+        """
+        end = end or datetime.date.today()
+        with self._locks_guard:
+            ticker_lock = self._locks[ticker]
+        with ticker_lock:
+            existing = self.load(ticker)
+            recent = None
+            # File dari versi format lain: seluruh rentang diunduh ulang
+            refetch = not existing.empty and self.stored_version(ticker) != PRICE_STORE_VERSION
+            if not existing.empty and not refetch and existing.index[-1].date() + datetime.timedelta(days=1) < end:
+                recent = self._fetch(ticker, existing.index[-1].date(), end)
+                overlap_close = recent["Close"].get(existing.index[-1])
+                refetch = overlap_close is not None and not np.isclose(overlap_close, existing["Close"].iloc[-1], rtol=1e-6)
+            if refetch:
+                initial_start = min(initial_start or existing.index[0].date(), existing.index[0].date())
+                existing = normalize_ohlcv(None, ticker)
+            frames = [existing]
+            if existing.empty:
+                frames.append(self._fetch(ticker, initial_start or end - datetime.timedelta(days=365), end))
+            else:
+                if initial_start is not None and initial_start < existing.index[0].date():
+                    frames.append(self._fetch(ticker, initial_start, existing.index[0].date()))
+                if recent is not None:
+                    frames.append(recent.loc[recent.index > existing.index[-1]])
+            num_new_bars = sum(len(frame) for frame in frames[1:])
+            if num_new_bars == 0:
+                return 0
+            combined = pd.concat([frame for frame in frames if not frame.empty]).sort_index()
+            self._write(ticker, combined)
+            return num_new_bars
+
+    def _fetch(self, ticker, start, stop):
+        """Bar dalam rentang [start, stop) dari fetcher, sudah dinormalisasi."""
+        if start >= stop:
+            return normalize_ohlcv(None, ticker)
+        bars = normalize_ohlcv(self.fetcher.fetch(ticker, start, stop), ticker)
+        return bars.loc[(bars.index >= pd.Timestamp(start)) & (bars.index < pd.Timestamp(stop))]
+
+    def _write(self, ticker, df):
+        path = self.path_for(ticker)
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"price_store_version": str(PRICE_STORE_VERSION).encode()})
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+    def get_close(self, ticker, start=None):
+        """Deret harga penutupan (kolom 'Close') yang valid untuk dipakai dashboard."""
+        return self.load(ticker, start=start, columns=["Close"]).astype(float).dropna()
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+
+# --- PENGUKURAN WAKTU PER TAHAP ---
+# Setiap tahap alur dashboard (unduh data, muat model, prediksi, grafik, ...) dibungkus span bertag
+# ticker/horizon. Span disimpan per rerun untuk panel debug dan diagregasi menjadi histogram latensi
+# lintas sesi, yang bisa diekspor sebagai JSON-lines dan teks Prometheus. Jika rerun tidak diaktifkan,
+# span() mengembalikan objek no-op bersama sehingga biayanya hanya satu pengecekan atribut.
+
+# Batas atas bucket histogram (detik)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_NAME = "dashboard_stage_duration_seconds"
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, timer, stage, tags):
+        self.timer = timer
+        self.stage = stage
+        self.tags = tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.record(self.stage, time.perf_counter() - self.start, self.tags, error=exc_type is not None)
+        return False
+
+
+class StageTimer:
+    """
+    Pencatat span per tahap. Rerun Streamlit berjalan di thread sesi masing-masing, sehingga
+    span rerun yang sedang berjalan disimpan per thread; histogram dibagi bersama oleh semua sesi.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, jsonl_path=None, prometheus_path=None):
+        self.buckets = tuple(buckets)
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def begin_rerun(self, enabled, **tags):
+        """Memulai rerun baru; span hanya dicatat jika enabled. Durasi total dicatat sebagai stage 'rerun'."""
+        self._local.spans = [] if enabled else None
+        self._local.rerun_start = time.perf_counter()
+        self._local.rerun_tags = tags
+
+    def span(self, stage, **tags):
+        if getattr(self._local, "spans", None) is None:
+            return _NULL_SPAN
+        return _Span(self, stage, tags)
+
+    def record(self, stage, duration_s, tags, error=False):
+        entry = {"ts": time.time(), "stage": stage, "duration_ms": duration_s * 1000, "error": error, **tags}
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append(entry)
+        # Label histogram hanya stage dan ticker; horizon tetap tersedia di JSON-lines
+        key = (stage, str(tags.get("ticker", "")))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0})
+            histogram["counts"][next((i for i, bound in enumerate(self.buckets) if duration_s <= bound), len(self.buckets))] += 1
+            histogram["sum"] += duration_s
+            histogram["count"] += 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+
+    def end_rerun(self):
+        """Menutup rerun: menulis file Prometheus (jika dikonfigurasi) dan mengembalikan span rerun ini."""
+        if getattr(self._local, "spans", None) is None:
+            return []
+        self.record("rerun", time.perf_counter() - self._local.rerun_start, self._local.rerun_tags)
+        spans = self._local.spans
+        self._local.spans = None
+        if self.prometheus_path:
+            tmp_path = f"{self.prometheus_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, self.prometheus_path)
+        return spans
+
+    def render_prometheus(self):
+        """Histogram latensi dalam format teks eksposisi Prometheus."""
+        lines = [f"# HELP {METRIC_NAME} Durasi tiap tahap alur Dashboard Prediksi.", f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            items = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in self._histograms.items())
+        for (stage, ticker), histogram in items:
+            labels = f'stage="{stage}",ticker="{ticker}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), histogram["counts"]):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Ringkasan per (stage, ticker): jumlah, rata-rata, dan perkiraan p95 (batas bucket) dalam ms."""
+        with self._lock:
+            items = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in self._histograms.items())
+        rows = []
+        for (stage, ticker), histogram in items:
+            target, cumulative, p95 = 0.95 * histogram["count"], 0, float("inf")
+            for bound, count in zip(self.buckets + (float("inf"),), histogram["counts"]):
+                cumulative += count
+                if cumulative >= target:
+                    p95 = bound
+                    break
+            rows.append({"stage": stage, "ticker": ticker, "count": histogram["count"],
+                         "mean_ms": histogram["sum"] / histogram["count"] * 1000, "p95_le_ms": p95 * 1000})
+        return rows
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modul dashboard diimpor dengan nama datar (seperti saat `streamlit run`), jadi folder UI-Streamlit masuk sys.path
+UI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, UI_DIR)
@@ -0,0 +1,47 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import eod_forecast_job
+from emiten_config import build_emiten_dict
+from forecast_table import ForecastTable, latest_table_path
+
+MODEL_DIR = os.path.join(os.path.dirname(eod_forecast_job.SCRIPT_DIR), "Model")
+LAST_BAR = datetime.date(2024, 5, 31)
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """Fixture harga sintetis per ticker yang berakhir dengan bar sesi LAST_BAR ('hari ini')."""
+    directory = tmp_path / "csv"
+    directory.mkdir()
+    dates = pd.bdate_range(end=LAST_BAR, periods=300, name="Date")
+    rng = np.random.default_rng(0)
+    for info in build_emiten_dict(MODEL_DIR).values():
+        close = 5000 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6},
+                     index=dates).to_csv(directory / f"{info['ticker']}.csv")
+    return directory
+
+
+def run_job(tmp_path, csv_dir, as_of):
+    table_dir = tmp_path / "table"
+    exit_code = eod_forecast_job.main(["--artifacts-dir", MODEL_DIR, "--csv-dir", str(csv_dir),
+                                       "--price-store-dir", str(tmp_path / "prices"), "--table-dir", str(table_dir),
+                                       "--horizon", "5", "--as-of", as_of])
+    assert exit_code == 0
+    return ForecastTable.from_file(latest_table_path(table_dir))
+
+
+def test_job_after_close_includes_todays_bar(tmp_path, csv_dir):
+    table = run_job(tmp_path, csv_dir, f"{LAST_BAR.isoformat()}T16:30")
+    assert len(table) == 2 * len(build_emiten_dict(MODEL_DIR))
+    assert {key[1] for key in table._paths} == {LAST_BAR}
+
+
+def test_job_during_session_skips_intraday_bar(tmp_path, csv_dir):
+    table = run_job(tmp_path, csv_dir, f"{LAST_BAR.isoformat()}T10:00")
+    assert {key[1] for key in table._paths} == {datetime.date(2024, 5, 30)}
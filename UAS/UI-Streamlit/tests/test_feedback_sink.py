@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+import feedback_sink
+from feedback_sink import FeedbackSink, FeedbackSpool
+
+
+class FakeBackend:
+    """Pengganti GSheetBackend: mencatat setiap pemanggilan append_rows; `failures` pemanggilan pertama gagal."""
+
+    def __init__(self, failures=0, fail_on_calls=()):
+        self.failures = failures
+        self.fail_on_calls = set(fail_on_calls)
+        self.calls = []
+        self.rows = []
+
+    def append_rows(self, rows):
+        self.calls.append(list(rows))
+        if self.failures or len(self.calls) in self.fail_on_calls:
+            self.failures = max(0, self.failures - 1)
+            raise ConnectionError("Google Sheets tidak dapat dihubungi")
+        self.rows.extend(rows)
+
+
+def make_row(i):
+    return ["2024-05-31 10:00:00", f"Pengguna {i}", f"user{i}@example.com", "Masukan", 5]
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "kondisi tidak terpenuhi sebelum timeout"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return str(tmp_path / "feedback_spool.db")
+
+
+def test_pending_rows_survive_restart(spool_path):
+    spool = FeedbackSpool(spool_path)
+    ids = [spool.append(make_row(i)) for i in range(5)]
+    spool.mark_sent(ids[:2])
+    # Proses baru membuka file spool yang sama tanpa close() (mis. setelah crash)
+    reopened = FeedbackSpool(spool_path)
+    assert reopened.pending() == [(row_id, make_row(i)) for i, row_id in enumerate(ids) if i >= 2]
+    assert reopened.counts() == {"pending": 3, "sent": 2}
+
+
+def test_flush_sends_pending_rows_in_batched_calls(spool_path):
+    backend = FakeBackend()
+    sink = FeedbackSink(FeedbackSpool(spool_path), backend, batch_size=50)
+    for i in range(120):
+        sink.submit(make_row(i))
+    assert [sink.flush_once() for _ in range(4)] == [50, 50, 20, 0]
+    assert [len(call) for call in backend.calls] == [50, 50, 20]
+    assert backend.rows == [make_row(i) for i in range(120)]
+
+
+def test_failed_batch_stays_pending_with_error(spool_path):
+    sink = FeedbackSink(FeedbackSpool(spool_path), FakeBackend(failures=1))
+    sink.submit(make_row(0))
+    with pytest.raises(ConnectionError):
+        sink.flush_once()
+    assert sink.spool.counts() == {"pending": 1, "sent": 0}
+    attempts, last_error = sink.spool._conn.execute("SELECT attempts, last_error FROM feedback").fetchone()
+    assert attempts == 1 and "Google Sheets" in last_error
+    assert sink.flush_once() == 1
+    assert sink.spool.counts() == {"pending": 0, "sent": 1}
+
+
+def test_partial_flush_has_no_loss_or_duplicates(spool_path):
+    # Batch pertama diterima, batch kedua gagal: hanya batch kedua dan seterusnya yang dikirim ulang
+    backend = FakeBackend(fail_on_calls={2})
+    sink = FeedbackSink(FeedbackSpool(spool_path), backend, batch_size=50, base_backoff=0.01, flush_interval=0.05)
+    for i in range(120):
+        sink.submit(make_row(i))
+    sink.start()
+    try:
+        wait_until(lambda: sink.spool.counts()["pending"] == 0)
+    finally:
+        sink.stop(timeout=5)
+    assert backend.rows == [make_row(i) for i in range(120)]
+    assert [len(call) for call in backend.calls] == [50, 50, 50, 20]
+    assert sink.status() == {"pending": 0, "sent": 120, "consecutive_failures": 0, "last_error": None}
+
+
+def test_background_flusher_retries_with_backoff(spool_path):
+    backend = FakeBackend(failures=3)
+    sink = FeedbackSink(FeedbackSpool(spool_path), backend, base_backoff=0.01, flush_interval=0.05)
+    sink.start()
+    try:
+        sink.submit(make_row(0))
+        wait_until(lambda: backend.rows)
+    finally:
+        sink.stop(timeout=5)
+    assert len(backend.calls) == 4
+    assert backend.rows == [make_row(0)]
+    assert sink.consecutive_failures == 0
+
+
+def test_backoff_grows_exponentially_up_to_max(spool_path, monkeypatch):
+    monkeypatch.setattr(feedback_sink.random, "uniform", lambda low, high: high)
+    sink = FeedbackSink(FeedbackSpool(spool_path), FakeBackend(), base_backoff=1.0, max_backoff=10.0)
+    delays = []
+    for failures in range(1, 7):
+        sink.consecutive_failures = failures
+        delays.append(sink._backoff_seconds())
+    assert delays == [1.0, 2.0, 4.0, 8.0, 10.0, 10.0]
@@ -0,0 +1,135 @@
+import datetime
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from emiten_config import build_emiten_dict
+from forecast_service import SCRIPT_DIR, ForecastService, MicroBatcher
+from price_store import CsvFetcher, PriceStore
+
+MODEL_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "Model")
+
+
+class PersistenceModel:
+    """Model palsu: prediksi = nilai terakhir window. Bisa ditahan lewat `gate` untuk menguji permintaan in-flight."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.started = threading.Event()
+        self.calls = 0
+
+    def predict(self, x, verbose=0):
+        self.calls += 1
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(timeout=10)
+        return np.asarray(x)[:, -1, :]
+
+
+class FakeRegistry:
+    """Pengganti ModelRegistry; `failures` kali pertama get() gagal seperti file model yang sedang ditulis."""
+
+    def __init__(self, model, failures=0):
+        self.model = model
+        self.failures = failures
+        self.scaler = MinMaxScaler().fit(np.array([[1000.0], [10000.0]]))
+
+    def get(self, key):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("model sedang dipublikasikan")
+        return self.model, self.scaler
+
+
+@pytest.fixture
+def emiten_dict():
+    return {"BBCA": build_emiten_dict(MODEL_DIR)["BBCA"]}
+
+
+@pytest.fixture
+def price_store(tmp_path):
+    directory = tmp_path / "csv"
+    directory.mkdir()
+    dates = pd.bdate_range(end=datetime.date.today() - datetime.timedelta(days=1), periods=200, name="Date")
+    close = np.linspace(5000, 6000, len(dates))
+    pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6},
+                 index=dates).to_csv(directory / "BBCA.JK.csv")
+    return PriceStore(str(tmp_path / "prices"), CsvFetcher(str(directory)))
+
+
+def run_concurrently(service, horizons):
+    results = [None] * len(horizons)
+
+    def worker(i, horizon):
+        results[i] = service.forecast("BBCA", horizon)
+
+    threads = [threading.Thread(target=worker, args=(i, h)) for i, h in enumerate(horizons)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_micro_batcher_collects_items_within_window():
+    calls = []
+    batcher = MicroBatcher(lambda items: calls.append(list(items)) or [item * 2 for item in items], max_wait_s=0.5)
+    futures = [batcher.submit(i) for i in range(5)]
+    assert [f.result(timeout=10) for f in futures] == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert (batcher.batches_run, batcher.items_run) == (1, 5)
+
+
+def test_concurrent_requests_share_one_batch_and_rollout(emiten_dict, price_store):
+    service = ForecastService(emiten_dict, price_store, FakeRegistry(PersistenceModel()), batch_window_s=0.5)
+    price_store.update("BBCA.JK", end=datetime.date.today())
+    results = run_concurrently(service, [5, 3, 10, 5, 1, 10])
+    stats = service.stats()
+    # Permintaan yang horizonnya tercakup permintaan in-flight menunggu future itu; sisanya masuk satu batch
+    assert stats["batches"]["BBCA"]["batches"] == 1
+    # Semua permintaan memiliki window input yang sama -> satu rollout pada horizon terbesar
+    assert stats["rollouts"] == 1
+    longest = [row["close"] for row in results[2]["forecast"]]
+    for result in results:
+        assert [row["close"] for row in result["forecast"]] == longest[:result["horizon"]]
+
+
+def test_cached_path_answers_shorter_horizon(emiten_dict, price_store):
+    service = ForecastService(emiten_dict, price_store, FakeRegistry(PersistenceModel()))
+    service.forecast("BBCA", 10)
+    service.forecast("BBCA", 4)
+    assert service.stats()["rollouts"] == 1
+    assert service.cache_hits == 1
+
+
+def test_request_waits_for_in_flight_rollout(emiten_dict, price_store):
+    gate = threading.Event()
+    model = PersistenceModel(gate)
+    service = ForecastService(emiten_dict, price_store, FakeRegistry(model), batch_window_s=0.0)
+    first = threading.Thread(target=service.forecast, args=("BBCA", 5))
+    first.start()
+    assert model.started.wait(timeout=10)
+    # Batch pertama sudah berjalan; permintaan identik harus menunggu future yang sama, bukan batch baru
+    second = threading.Thread(target=service.forecast, args=("BBCA", 5))
+    second.start()
+    second.join(timeout=0.2)
+    assert second.is_alive()
+    gate.set()
+    first.join()
+    second.join()
+    assert service.stats()["batches"]["BBCA"]["batches"] == 1
+    assert service.rollouts_run == 1
+
+
+def test_failed_batch_is_retried_by_next_request(emiten_dict, price_store):
+    service = ForecastService(emiten_dict, price_store, FakeRegistry(PersistenceModel(), failures=1))
+    with pytest.raises(OSError):
+        service.forecast("BBCA", 5)
+    assert not service._in_flight
+    result = service.forecast("BBCA", 5)
+    assert len(result["forecast"]) == 5
+    assert service.rollouts_run == 1
@@ -0,0 +1,33 @@
+import glob
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from forecasting import INCREMENTAL_TOLERANCE, WINDOW_SIZE, rollout_scaled_windows
+from lstm_engine import LSTMStack
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Model")
+MODEL_FILES = sorted(glob.glob(os.path.join(MODEL_DIR, "*_model.keras")))
+HORIZON = 60
+
+
+@pytest.mark.parametrize("model_path", MODEL_FILES, ids=os.path.basename)
+def test_incremental_rollout_stays_within_tolerance(model_path):
+    engine = LSTMStack.from_keras_archive(model_path)
+    scaler = joblib.load(model_path.replace("_model.keras", "_scaler.joblib"))
+    # Random walk harga di dalam rentang data latih scaler, 16 window sekaligus
+    rng = np.random.default_rng(0)
+    low, high = scaler.data_min_[0], scaler.data_max_[0]
+    starts = rng.uniform(low + 0.2 * (high - low), high - 0.2 * (high - low), 16)
+    prices = starts[:, np.newaxis] * np.exp(np.cumsum(rng.normal(0, 0.015, (16, WINDOW_SIZE)), axis=1))
+    windows = scaler.transform(prices.reshape(-1, 1)).reshape(16, WINDOW_SIZE, 1)
+
+    def rollout(incremental):
+        scaled_path = rollout_scaled_windows(engine, windows, HORIZON, incremental)
+        return scaler.inverse_transform(scaled_path.reshape(-1, 1)).reshape(16, HORIZON)
+
+    recursive, incremental = rollout(False), rollout(True)
+    np.testing.assert_allclose(incremental[:, 0], recursive[:, 0], rtol=1e-5)
+    assert np.max(np.abs(incremental - recursive) / np.abs(recursive)) <= INCREMENTAL_TOLERANCE
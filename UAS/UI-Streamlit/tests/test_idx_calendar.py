@@ -0,0 +1,33 @@
+import datetime
+import warnings
+
+import pytest
+
+from idx_calendar import IDXCalendar
+
+
+def test_new_year_2027_is_not_a_trading_day():
+    calendar = IDXCalendar()
+    assert not calendar.is_trading_day(datetime.date(2027, 1, 1))
+    with pytest.warns(UserWarning, match="perkiraan"):
+        assert calendar.session_dates(datetime.date(2026, 12, 30), 1)[0].date() == datetime.date(2027, 1, 4)
+
+
+def test_warns_for_estimated_holiday_year():
+    calendar = IDXCalendar()
+    with pytest.warns(UserWarning, match="IDX_HOLIDAYS"):
+        calendar.session_dates(datetime.date(2026, 10, 16), 60)
+    with pytest.warns(UserWarning, match="perkiraan"):
+        calendar.trading_steps_between(datetime.date(2026, 12, 1), datetime.date(2027, 3, 1))
+
+
+def test_warns_past_last_covered_year():
+    calendar = IDXCalendar()
+    with pytest.warns(UserWarning, match="IDX_HOLIDAYS"):
+        calendar.session_dates(datetime.date(2027, 12, 1), 60)
+    with pytest.warns(UserWarning, match="IDX_HOLIDAYS"):
+        calendar.trading_steps_between(datetime.date(2027, 12, 1), datetime.date(2028, 1, 10))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        calendar.session_dates(datetime.date(2026, 6, 1), 60)
+        calendar.trading_steps_between(datetime.date(2026, 6, 1), datetime.date(2026, 12, 31))
@@ -0,0 +1,22 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from lstm_engine import LSTMStack
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Model")
+MODEL_FILES = sorted(glob.glob(os.path.join(MODEL_DIR, "*_model.keras")))
+
+
+@pytest.mark.parametrize("model_path", MODEL_FILES, ids=os.path.basename)
+def test_numpy_engine_matches_keras(model_path):
+    keras = pytest.importorskip("tensorflow.keras")
+    windows = np.random.default_rng(0).random((8, 25, 1), dtype=np.float32)
+    expected = keras.models.load_model(model_path, compile=False).predict(windows, verbose=0)
+    np.testing.assert_allclose(LSTMStack.from_keras_archive(model_path).predict(windows), expected, atol=1e-5)
+
+
+def test_all_emiten_models_present():
+    assert len(MODEL_FILES) == 5
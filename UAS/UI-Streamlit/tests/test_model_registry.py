@@ -0,0 +1,91 @@
+import gc
+import json
+import os
+import shutil
+import weakref
+
+import numpy as np
+import pytest
+
+import model_registry
+from forecasting import artifact_hash
+from model_registry import ModelRegistry, load_prediction_assets
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Model")
+
+
+class FakeModel:
+    nbytes = 100
+
+    def predict(self, x, verbose=0):
+        return np.zeros((len(x), 1))
+
+
+def make_registry(budget_models):
+    return ModelRegistry(lambda model_path, scaler_path: (FakeModel(), None),
+                         memory_budget_bytes=budget_models * FakeModel.nbytes)
+
+
+def get(registry, key):
+    """Memuat model secara berurutan (tanpa preload) agar urutan LRU pasti."""
+    return registry.get(key, f"{key}.keras", f"{key}.pkl")
+
+
+def test_derived_object_is_built_once_while_model_is_resident():
+    registry = make_registry(budget_models=2)
+    model, _ = get(registry, "BBCA")
+    calls = []
+    first = registry.derived("BBCA", "engine", lambda: calls.append(1) or [model])
+    assert registry.derived("BBCA", "engine", lambda: calls.append(1) or [model]) is first
+    assert len(calls) == 1
+
+
+def test_eviction_releases_model_and_its_derived_objects():
+    registry = make_registry(budget_models=2)
+    model, _ = get(registry, "BBCA")
+    model_ref = weakref.ref(model)
+    registry.derived("BBCA", "engine", lambda: [model])
+    group = registry.derived(("BBCA", "BBRI"), "group", lambda: [model, get(registry, "BBRI")[0]])
+    del model, group
+    get(registry, "BBRI")
+    get(registry, "TLKM")  # melebihi budget -> BBCA (paling lama tidak dipakai) dikeluarkan
+    gc.collect()
+    assert registry.stats()["BBCA"]["evictions"] == 1
+    assert model_ref() is None
+    assert not registry._derived
+
+
+def test_derived_object_is_not_stored_for_evicted_model():
+    registry = make_registry(budget_models=1)
+    get(registry, "BBCA")
+    get(registry, "BBRI")
+    value = registry.derived("BBCA", "engine", lambda: ["engine"])
+    assert value == ["engine"]
+    assert not registry._derived
+
+
+@pytest.fixture
+def published(tmp_path):
+    """Artefak BBCA.JK beserta manifest seperti hasil publish_artifacts."""
+    paths = {}
+    for name in ("model.keras", "scaler.joblib"):
+        paths[name] = str(tmp_path / f"BBCA.JK_{name}")
+        shutil.copy(os.path.join(MODEL_DIR, f"BBCA.JK_{name}"), paths[name])
+    manifest = {"model_sha256": artifact_hash(paths["model.keras"]), "scaler_sha256": artifact_hash(paths["scaler.joblib"])}
+    (tmp_path / "BBCA.JK_manifest.json").write_text(json.dumps(manifest))
+    return paths["model.keras"], paths["scaler.joblib"]
+
+
+def test_artifacts_matching_manifest_are_loaded(published):
+    model, scaler = load_prediction_assets(*published)
+    assert model.predict(np.zeros((1, 25, 1), dtype=np.float32)).shape == (1, 1)
+    assert scaler is not None
+
+
+def test_half_published_artifacts_are_rejected(published, monkeypatch):
+    monkeypatch.setattr(model_registry, "PUBLISH_RETRY_DELAY_S", 0)
+    model_path, scaler_path = published
+    # Scaler versi baru sudah di-rename, manifest yang memuat hash-nya belum
+    shutil.copy(os.path.join(MODEL_DIR, "BBRI.JK_scaler.joblib"), scaler_path)
+    with pytest.raises(OSError, match="manifest"):
+        load_prediction_assets(model_path, scaler_path)
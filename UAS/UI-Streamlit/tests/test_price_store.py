@@ -0,0 +1,102 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import pytest
+
+from price_store import PRICE_STORE_VERSION, CsvFetcher, PriceStore
+
+TICKER = "BBCA.JK"
+
+
+class RecordingFetcher(CsvFetcher):
+    """CsvFetcher yang mencatat setiap rentang [start, end) yang diminta."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.requests = []
+
+    def fetch(self, ticker, start, end):
+        self.requests.append((start, end))
+        return super().fetch(ticker, start, end)
+
+
+def write_csv(directory, close):
+    dates = pd.bdate_range("2024-01-01", periods=len(close), name="Date")
+    pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1e6},
+                 index=dates).to_csv(directory / f"{TICKER}.csv")
+    return dates
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    directory = tmp_path / "csv"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def store(tmp_path, csv_dir):
+    return PriceStore(str(tmp_path / "prices"), RecordingFetcher(str(csv_dir)))
+
+
+def test_update_appends_only_bars_after_last_stored_date(store, csv_dir):
+    dates = write_csv(csv_dir, np.linspace(5000, 6000, 40))
+    assert store.update(TICKER, end=dates[20].date(), initial_start=dates[0].date()) == 20
+    store.fetcher.requests.clear()
+    assert store.update(TICKER, end=dates[30].date()) == 10
+    # Satu permintaan, dimulai dari bar terakhir yang tersimpan sebagai pembanding
+    assert store.fetcher.requests == [(dates[19].date(), dates[30].date())]
+    loaded = store.load(TICKER)
+    assert list(loaded.index) == list(dates[:30])
+    assert not loaded.index.duplicated().any()
+
+
+def test_update_is_a_no_op_when_store_is_current(store, csv_dir):
+    dates = write_csv(csv_dir, np.linspace(5000, 6000, 10))
+    store.update(TICKER, end=dates[5].date(), initial_start=dates[0].date())
+    store.fetcher.requests.clear()
+    assert store.update(TICKER, end=dates[4].date() + datetime.timedelta(days=1)) == 0
+    assert store.fetcher.requests == []
+
+
+def test_end_is_exclusive(store, csv_dir):
+    dates = write_csv(csv_dir, np.linspace(5000, 6000, 10))
+    store.update(TICKER, end=dates[6].date(), initial_start=dates[0].date())
+    assert store.last_date(TICKER) == dates[5].date()
+
+
+def test_initial_start_backfills_before_first_stored_date(store, csv_dir):
+    dates = write_csv(csv_dir, np.linspace(5000, 6000, 30))
+    store.update(TICKER, end=dates[20].date(), initial_start=dates[10].date())
+    store.fetcher.requests.clear()
+    assert store.update(TICKER, end=dates[20].date(), initial_start=dates[0].date()) == 10
+    assert (dates[0].date(), dates[10].date()) in store.fetcher.requests
+    assert list(store.load(TICKER).index) == list(dates[:20])
+
+
+def test_changed_overlap_bar_refetches_full_history(store, csv_dir):
+    close = np.linspace(5000, 6000, 30)
+    dates = write_csv(csv_dir, close)
+    store.update(TICKER, end=dates[20].date(), initial_start=dates[0].date())
+    # Dividen: Yahoo menulis ulang seluruh riwayat harga yang disesuaikan
+    write_csv(csv_dir, close * 0.97)
+    assert store.update(TICKER, end=dates[25].date()) == 25
+    np.testing.assert_allclose(store.get_close(TICKER)["Close"].values, close[:25] * 0.97)
+
+
+def test_other_store_version_is_refetched(store, csv_dir):
+    close = np.linspace(5000, 6000, 30)
+    dates = write_csv(csv_dir, close)
+    store.update(TICKER, end=dates[20].date(), initial_start=dates[0].date())
+    assert store.stored_version(TICKER) == PRICE_STORE_VERSION
+    # File versi lama: isi berbeda dan tanpa penanda versi
+    table = feather.read_table(store.path_for(TICKER))
+    stale = table.to_pandas()
+    stale["Close"] *= 1.5
+    feather.write_feather(stale, store.path_for(TICKER))
+    assert store.stored_version(TICKER) == 0
+    assert store.update(TICKER, end=dates[20].date()) == 20
+    np.testing.assert_allclose(store.get_close(TICKER)["Close"].values, close[:20])
+    assert store.stored_version(TICKER) == PRICE_STORE_VERSION
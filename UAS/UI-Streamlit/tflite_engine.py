@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# --- RUNTIME TFLITE UNTUK MODEL TERKUANTISASI ---
+# Interpreter diambil dari paket paling ringan yang tersedia: ai_edge_litert (LiteRT),
+# tflite_runtime, lalu tensorflow.lite sebagai cadangan terakhir.
+
+
+def _load_interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def tflite_path_for(model_path):
+    """Path artefak .tflite yang berpasangan dengan file .keras."""
+    return os.path.splitext(model_path)[0] + ".tflite"
+
+
+def tflite_report_path_for(model_path):
+    """Path laporan ekspor (<ticker>_tflite_report.json) untuk file <ticker>_model.keras."""
+    base = os.path.splitext(model_path)[0]
+    return (base[:-len("_model")] if base.endswith("_model") else base) + "_tflite_report.json"
+
+
+def tflite_source_sha256(model_path):
+    """SHA-256 file .keras yang diekspor menjadi .tflite saat ini (dari laporan ekspor), atau None."""
+    try:
+        with open(tflite_report_path_for(model_path)) as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        return None
+    return report.get("source_sha256") if report.get("published") else None
+
+
+class TFLiteModel:
+    """Pembungkus interpreter TFLite dengan antarmuka predict yang kompatibel dengan Keras."""
+
+    def __init__(self, model_path=None, model_content=None, num_threads=1):
+        if model_content is None:
+            with open(model_path, "rb") as f:
+                model_content = f.read()
+        self.nbytes = len(model_content)
+        self.interpreter = _load_interpreter_class()(model_content=model_content, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input_index = self.interpreter.get_input_details()[0]["index"]
+        output_details = self.interpreter.get_output_details()[0]
+        self._output_index = output_details["index"]
+        # 1 untuk model rekursif, K untuk varian direct multi-horizon
+        self.output_steps = int(output_details["shape"][-1])
+        # Interpreter TFLite tidak thread-safe dan model diekspor dengan batch tetap = 1
+        self._lock = threading.Lock()
+
+    def predict(self, X, verbose=0):
+        """(batch, time_step, 1) -> (batch, output_steps); setiap sampel dijalankan satu per satu (batch tetap 1)."""
+        X = np.asarray(X, dtype=np.float32)
+        outputs = np.empty((len(X), self.output_steps), dtype=np.float32)
+        with self._lock:
+            for i, sample in enumerate(X):
+                self.interpreter.set_tensor(self._input_index, sample[np.newaxis])
+                self.interpreter.invoke()
+                outputs[i] = self.interpreter.get_tensor(self._output_index)[0]
+        return outputs
@@ -0,0 +1,303 @@
+"""
+Penyimpanan bobot bersama berbasis memory-map untuk mesin LSTM NumPy.
+
+Semua model di folder artefak ditulis ke satu file datar (model_weights.lstmws). Bobot model dengan
+arsitektur sama disimpan bertumpuk per layer (model, ...), sehingga LSTMStack per emiten maupun
+LSTMStackGroup untuk semua emiten dibangun sebagai view di atas halaman file yang sama tanpa salinan.
+Setiap proses worker memetakan file yang sama (read-only), jadi halaman bobot dibagi oleh page cache
+dan tidak lagi dihitung per worker. Opsional, salinan float16 ikut ditulis (--float16) dan dipilih dengan
+WEIGHT_STORE_DTYPE=float16: ukuran halaman bersama menjadi setengah, tetapi setiap perkalian matriks
+perlu konversi ke float32 sehingga inferensi sekitar 3x lebih lambat.
+
+Contoh:
+    python weight_store.py build --float16
+    python weight_store.py measure --workers 4
+"""
+import argparse
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import warnings
+
+import numpy as np
+
+from emiten_config import build_emiten_dict
+from forecasting import artifact_hash
+from lstm_engine import LSTMStack, LSTMStackGroup
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACTS_DIR = os.path.join(SCRIPT_DIR, "streamlit_deployment_artifacts")
+WEIGHT_STORE_FILE_NAME = "model_weights.lstmws"
+WEIGHT_STORE_VERSION = 1
+MAGIC = b"LSTMWS01"
+ALIGNMENT = 64
+
+
+def weight_store_path_for(model_path):
+    """Path file bobot bersama di folder yang sama dengan file .keras."""
+    return os.path.join(os.path.dirname(model_path), WEIGHT_STORE_FILE_NAME)
+
+
+def _architecture(stack):
+    return (stack.lstm_weights[0][0].shape[0], tuple(stack.units), stack.output_steps)
+
+
+def write_weight_store(path, model_paths, float16=False):
+    """
+    Menulis bobot model-model .keras ke satu file datar (atomik). Model dikelompokkan per arsitektur;
+    dalam satu kelompok setiap bobot ditumpuk pada sumbu model pertama dan ditulis rata ke 64 byte.
+    """
+    paths = {os.path.basename(model_path): model_path for model_path in model_paths}
+    stacks = {name: LSTMStack.from_keras_archive(model_path) for name, model_path in paths.items()}
+    groups = {}
+    for name, stack in stacks.items():
+        groups.setdefault(_architecture(stack), []).append(name)
+
+    dtypes = ["float32", "float16"] if float16 else ["float32"]
+    header = {"version": WEIGHT_STORE_VERSION, "dtypes": dtypes, "groups": [], "models": {}}
+    blobs, offset = [], 0
+    for group_index, names in enumerate(groups.values()):
+        members = [stacks[name] for name in names]
+        arrays = {}
+        for layer in range(len(members[0].units)):
+            for part, label in enumerate(("kernel", "recurrent_kernel", "bias")):
+                arrays[f"lstm{layer}_{label}"] = np.stack([stack.lstm_weights[layer][part] for stack in members])
+        arrays["dense_kernel"] = np.stack([stack.dense_kernel for stack in members])
+        arrays["dense_bias"] = np.stack([stack.dense_bias for stack in members])
+        index = {dtype: {} for dtype in dtypes}
+        for dtype in dtypes:
+            for array_name, array in arrays.items():
+                data = np.ascontiguousarray(array, dtype=dtype)
+                offset += -offset % ALIGNMENT
+                index[dtype][array_name] = {"offset": offset, "shape": list(data.shape)}
+                blobs.append((offset, data))
+                offset += data.nbytes
+        header["groups"].append({"models": names, "num_layers": len(members[0].units), "arrays": index})
+        for position, name in enumerate(names):
+            header["models"][name] = {"group": group_index, "position": position,
+                                      "dropout_rates": stacks[name].dropout_rates,
+                                      "sha256": artifact_hash(paths[name])}
+
+    header_bytes = json.dumps(header).encode()
+    # Offset di header relatif terhadap awal area data, yang dimulai setelah header (rata ke 64 byte)
+    data_start = len(MAGIC) + 8 + len(header_bytes)
+    data_start += -data_start % ALIGNMENT
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for blob_offset, data in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(data.tobytes())
+    os.replace(tmp_path, path)
+    return header
+
+
+class WeightStore:
+    """File bobot bersama yang dipetakan read-only; semua objek inferensi adalah view di atas memmap ini."""
+
+    def __init__(self, path, dtype="float32"):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} bukan file bobot LSTMWS.")
+            header_length = int.from_bytes(f.read(8), "little")
+            self.header = json.loads(f.read(header_length))
+        if self.header["version"] != WEIGHT_STORE_VERSION:
+            raise ValueError(f"Versi file bobot {self.header['version']} tidak didukung (diharapkan {WEIGHT_STORE_VERSION}).")
+        if dtype not in self.header["dtypes"]:
+            raise ValueError(f"File bobot tidak berisi salinan {dtype} (tersedia: {', '.join(self.header['dtypes'])}).")
+        data_start = len(MAGIC) + 8 + header_length
+        data_start += -data_start % ALIGNMENT
+        self.path = path
+        self.dtype = dtype
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start)
+        self._groups = [self._group_arrays(group) for group in self.header["groups"]]
+
+    def _group_arrays(self, group):
+        arrays = {}
+        for name, entry in group["arrays"][self.dtype].items():
+            count = int(np.prod(entry["shape"]))
+            arrays[name] = np.frombuffer(self._buffer, dtype=self.dtype, count=count,
+                                         offset=entry["offset"]).reshape(entry["shape"])
+        return arrays
+
+    @property
+    def models(self):
+        return list(self.header["models"])
+
+    @property
+    def nbytes(self):
+        return int(self._buffer.nbytes)
+
+    def is_fresh(self, model_path):
+        """True jika file .keras masih sama dengan yang ditulis ke store (dibandingkan lewat SHA-256)."""
+        entry = self.header["models"].get(os.path.basename(model_path))
+        return entry is not None and entry["sha256"] == artifact_hash(model_path)
+
+    def _group_weights(self, group_index):
+        arrays = self._groups[group_index]
+        num_layers = self.header["groups"][group_index]["num_layers"]
+        lstm_weights = [(arrays[f"lstm{i}_kernel"], arrays[f"lstm{i}_recurrent_kernel"], arrays[f"lstm{i}_bias"])
+                        for i in range(num_layers)]
+        return lstm_weights, arrays["dense_kernel"], arrays["dense_bias"]
+
+    def stack(self, name):
+        """LSTMStack untuk satu model (nama file .keras); bobotnya view di atas memmap."""
+        entry = self.header["models"][name]
+        lstm_weights, dense_kernel, dense_bias = self._group_weights(entry["group"])
+        position = entry["position"]
+        return LSTMStack([tuple(w[position] for w in layer) for layer in lstm_weights],
+                         (dense_kernel[position], dense_bias[position]), entry["dropout_rates"])
+
+    def group(self, names):
+        """
+        LSTMStackGroup untuk model-model ini. Jika sama persis (dan berurutan sama) dengan satu kelompok
+        di store, bobotnya view tanpa salinan; selain itu bobot diambil (disalin) dengan np.take.
+        """
+        entries = [self.header["models"][name] for name in names]
+        group_index = entries[0]["group"]
+        if any(entry["group"] != group_index for entry in entries):
+            raise ValueError("Semua model dalam satu grup harus memiliki arsitektur yang sama.")
+        lstm_weights, dense_kernel, dense_bias = self._group_weights(group_index)
+        if list(names) != self.header["groups"][group_index]["models"]:
+            positions = [entry["position"] for entry in entries]
+            lstm_weights = [tuple(np.take(w, positions, axis=0) for w in layer) for layer in lstm_weights]
+            dense_kernel, dense_bias = np.take(dense_kernel, positions, axis=0), np.take(dense_bias, positions, axis=0)
+        return LSTMStackGroup.from_stacked_weights(lstm_weights, dense_kernel, dense_bias)
+
+
+@functools.lru_cache(maxsize=4)
+def _open_weight_store(path, mtime_ns, dtype):
+    return WeightStore(path, dtype)
+
+
+def open_weight_store(path, dtype=None):
+    """WeightStore untuk path ini (satu memmap per proses), atau None jika file belum dibuat."""
+    dtype = dtype or os.environ.get("WEIGHT_STORE_DTYPE", "float32")
+    try:
+        return _open_weight_store(path, os.stat(path).st_mtime_ns, dtype)
+    except FileNotFoundError:
+        return None
+
+
+def load_shared_stack(model_path):
+    """LSTMStack dari store bersama jika ada dan masih sesuai dengan file .keras; selain itu None."""
+    store = open_weight_store(weight_store_path_for(model_path))
+    if store is None:
+        return None
+    if not store.is_fresh(model_path):
+        warnings.warn(f"{store.path} tidak sesuai dengan {os.path.basename(model_path)}; "
+                      "jalankan ulang `python weight_store.py build`. Memuat dari file .keras.")
+        return None
+    return store.stack(os.path.basename(model_path))
+
+
+def load_shared_group(model_paths):
+    """LSTMStackGroup tanpa salinan dari store bersama, atau None jika store tidak ada/tidak sesuai."""
+    store = open_weight_store(weight_store_path_for(model_paths[0]))
+    if store is None or not all(store.is_fresh(model_path) for model_path in model_paths):
+        return None
+    return store.group([os.path.basename(model_path) for model_path in model_paths])
+
+
+def _memory_kb():
+    """Rss, Pss, dan memori privat (kB) proses ini dari /proc/self/smaps_rollup (Linux)."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": values["Rss"], "pss": values["Pss"], "private": values["Private_Clean"] + values["Private_Dirty"]}
+
+
+def _measure_worker(mode, store_path, dtype, window_size, barrier, results):
+    """
+    Proses worker: memuat semua model (per emiten + satu grup per arsitektur, seperti dashboard) dari file
+    .keras ("keras-archive") atau dari store bersama ("mmap"), lalu melaporkan selisih memorinya.
+    """
+    before = _memory_kb()
+    store = WeightStore(store_path, dtype)
+    artifacts_dir = os.path.dirname(store_path)
+    engines = []
+    for group in store.header["groups"]:
+        if mode == "mmap":
+            stacks = [store.stack(name) for name in group["models"]]
+            engines.append(store.group(group["models"]))
+        else:
+            stacks = [LSTMStack.from_keras_archive(os.path.join(artifacts_dir, name)) for name in group["models"]]
+            engines.append(LSTMStackGroup(stacks))
+        engines.extend(stacks)
+    for engine in engines:
+        if isinstance(engine, LSTMStackGroup):
+            engine.predict(np.zeros((engine.num_models, 1, window_size, 1), dtype=np.float32))
+        else:
+            engine.predict(np.zeros((1, window_size, 1), dtype=np.float32))
+    # Semua worker memegang modelnya bersamaan agar Pss mencerminkan halaman yang dibagi
+    barrier.wait()
+    after = _memory_kb()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def measure_worker_memory(store_path, workers=4, mode="mmap", dtype="float32", window_size=25):
+    """Menjalankan `workers` proses (spawn) yang masing-masing memuat semua model; mengembalikan selisih memori per worker."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_measure_worker, args=(mode, store_path, dtype, window_size, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    deltas = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return deltas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Membuat dan mengukur file bobot bersama (memory-mapped).")
+    parser.add_argument("--artifacts-dir", default=DEFAULT_ARTIFACTS_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Menulis semua *_model.keras ke model_weights.lstmws.")
+    build_parser.add_argument("--float16", action="store_true", help="Sertakan salinan bobot float16.")
+    measure_parser = subparsers.add_parser("measure", help="Membandingkan memori per worker: file .keras vs memmap.")
+    measure_parser.add_argument("--workers", type=int, default=4)
+    measure_parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                                help="Salinan bobot yang dipetakan pada mode mmap.")
+    args = parser.parse_args(argv)
+
+    # Urutan model mengikuti emiten_dict agar grup dashboard (urutan emiten sama) tetap berupa view tanpa salinan
+    emiten_dict = build_emiten_dict(args.artifacts_dir)
+    model_paths = [info["model_file"] for info in emiten_dict.values() if os.path.exists(info["model_file"])]
+    model_paths += [variant["model_file"] for info in emiten_dict.values() for variant in info["direct_variants"].values()]
+    model_paths += [path for path in sorted(glob.glob(os.path.join(glob.escape(args.artifacts_dir), "*_model.keras")))
+                    if path not in model_paths]
+    if not model_paths:
+        print(f"Tidak ada *_model.keras di {args.artifacts_dir}.")
+        return 1
+    store_path = os.path.join(args.artifacts_dir, WEIGHT_STORE_FILE_NAME)
+    if args.command == "build":
+        header = write_weight_store(store_path, model_paths, args.float16)
+        print(f"{len(header['models'])} model dalam {len(header['groups'])} kelompok arsitektur "
+              f"({', '.join(header['dtypes'])}) ditulis ke {store_path} ({os.path.getsize(store_path) / 1024 / 1024:.1f} MB)")
+        return 0
+
+    if open_weight_store(store_path, args.dtype) is None:
+        print(f"{store_path} belum ada; jalankan `python weight_store.py build` terlebih dahulu.")
+        return 1
+    print(f"{len(model_paths)} model, {args.workers} worker (selisih memori setelah memuat semua model, kB per worker):")
+    for mode in ("keras-archive", "mmap"):
+        deltas = measure_worker_memory(store_path, args.workers, mode, args.dtype)
+        summary = {key: int(np.median([delta[key] for delta in deltas])) for key in deltas[0]}
+        print(f"  {mode:14s} Rss {summary['rss']:8,d}   Pss {summary['pss']:8,d}   privat {summary['private']:8,d}")
+    print("Memori privat adalah tambahan nyata per worker; halaman memmap dibagi dan dihitung sekali di page cache.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())